@@ -0,0 +1,279 @@
+"""
+Concurrent Plaid fan-out for a single decision.
+
+After identity verification, the Accounts, Transactions, Bank Income, Signal,
+Beacon and Trust Index calls are independent, so they are issued together and
+end-to-end latency becomes the slowest call instead of the sum of all six.
+Each call has its own timeout; if a call the decision depends on fails, the
+rest are cancelled and the application is routed to manual review.
+
+Measure the speedup offline against the latency-injecting stub:
+
+    python async_pipeline.py --apps 20
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from credit_engine import (
+    LOAN_APPLICATIONS,
+    MetricsContext,
+    agent_make_decision,
+    build_audit_record,
+    new_audit_id,
+    plaid_bank_income,
+    plaid_beacon_check,
+    plaid_get_accounts,
+    plaid_get_transactions,
+    plaid_identity_verify,
+    plaid_signal_score,
+    plaid_trust_index,
+)
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+PLAID_ENDPOINTS = {
+    "identity": plaid_identity_verify,
+    "accounts": plaid_get_accounts,
+    "transactions": plaid_get_transactions,
+    "bank_income": plaid_bank_income,
+    "signal": plaid_signal_score,
+    "beacon": plaid_beacon_check,
+    "trust": plaid_trust_index,
+}
+
+# Calls issued concurrently once identity is verified
+FANOUT_CALLS = ("accounts", "transactions", "bank_income", "signal", "beacon", "trust")
+
+# A decision can't be rendered without these; the rest are informational
+REQUIRED_CALLS = frozenset({"transactions", "bank_income", "signal", "beacon", "trust"})
+
+DEFAULT_TIMEOUT_S = 5.0
+
+# Typical sandbox round trips (ms), used by the stub backend
+DEFAULT_LATENCY_MS = {
+    "identity": 180,
+    "accounts": 120,
+    "transactions": 350,
+    "bank_income": 400,
+    "signal": 150,
+    "beacon": 200,
+    "trust": 220,
+}
+
+
+class PlaidBackendError(Exception):
+    """A Plaid call failed upstream"""
+
+
+class SimulatedPlaidBackend:
+    """Serves the local plaid_* simulators with no added latency"""
+
+    async def call(self, endpoint: str, app_data: dict) -> dict:
+        return PLAID_ENDPOINTS[endpoint](app_data)
+
+
+class LatencyInjectingBackend(SimulatedPlaidBackend):
+    """
+    Stub backend that sleeps like a network round trip before answering.
+    `failure_rate` makes a fraction of calls raise PlaidBackendError.
+    """
+
+    def __init__(self, latency_ms: dict = None, jitter: float = 0.2, failure_rate: float = 0.0, seed: int = None):
+        self.latency_ms = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+
+    async def call(self, endpoint: str, app_data: dict) -> dict:
+        base = self.latency_ms.get(endpoint, 100) / 1000
+        await asyncio.sleep(base * (1 + self._rng.uniform(-self.jitter, self.jitter)))
+        if self._rng.random() < self.failure_rate:
+            raise PlaidBackendError(f"{endpoint}: upstream returned 503")
+        return await super().call(endpoint, app_data)
+
+
+# =============================================================================
+# FAN-OUT
+# =============================================================================
+
+def _describe(exc: BaseException) -> str:
+    if isinstance(exc, asyncio.TimeoutError):
+        return "TimeoutError"
+    return f"{type(exc).__name__}: {exc}"
+
+
+async def _timed_call(backend, endpoint: str, app_data: dict, timeout: float):
+    return await asyncio.wait_for(backend.call(endpoint, app_data), timeout)
+
+
+async def fetch_plaid_data(app_data: dict, backend=None, timeouts: dict = None,
+                           required=REQUIRED_CALLS, concurrent: bool = True) -> dict:
+    """
+    Issue the FANOUT_CALLS and collect what comes back.
+    Returns {"results": {endpoint: response}, "errors": {endpoint: message},
+    "cancelled": [endpoints]}. A failed required call cancels the calls
+    still in flight. concurrent=False awaits them one by one (baseline).
+    Any exception a call raises is a failure of that call, in both modes.
+    """
+    backend = backend or SimulatedPlaidBackend()
+    timeouts = timeouts or {}
+    results, errors, cancelled = {}, {}, []
+
+    if not concurrent:
+        for endpoint in FANOUT_CALLS:
+            try:
+                results[endpoint] = await _timed_call(backend, endpoint, app_data, timeouts.get(endpoint, DEFAULT_TIMEOUT_S))
+            except Exception as exc:  # same as task.exception() in the concurrent path
+                errors[endpoint] = _describe(exc)
+                if endpoint in required:
+                    cancelled = [e for e in FANOUT_CALLS if e not in results and e not in errors]
+                    break
+        return {"results": results, "errors": errors, "cancelled": cancelled}
+
+    tasks = {
+        asyncio.create_task(_timed_call(backend, endpoint, app_data, timeouts.get(endpoint, DEFAULT_TIMEOUT_S))): endpoint
+        for endpoint in FANOUT_CALLS
+    }
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                endpoint = tasks[task]
+                exc = task.exception()
+                if exc is None:
+                    results[endpoint] = task.result()
+                    continue
+                errors[endpoint] = _describe(exc)
+                if endpoint in required and pending:
+                    in_flight = {tasks[t] for t in pending}
+                    cancelled.extend(e for e in FANOUT_CALLS if e in in_flight)
+                    for t in pending:
+                        t.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    pending = set()
+    finally:
+        # Caller was cancelled (or an unexpected error escaped): don't leak calls
+        for task in pending:
+            task.cancel()
+    return {"results": results, "errors": errors, "cancelled": cancelled}
+
+
+def unavailable_decision(missing) -> dict:
+    """Route to a human when required Plaid data couldn't be fetched"""
+    return {
+        "decision": "MANUAL_REVIEW",
+        "reason": f"Plaid data unavailable ({', '.join(sorted(missing))}) - automated decision not possible",
+        "score": 0,
+        "max_score": 100,
+        "factors": [(endpoint, "FAIL", "Unavailable - call failed, timed out or was cancelled") for endpoint in sorted(missing)],
+        "timestamp": datetime.now().isoformat(),
+        "audit_id": new_audit_id()
+    }
+
+
+# =============================================================================
+# ASYNC DECISION PIPELINE
+# =============================================================================
+
+async def decide_async(application_id: str, app_data: dict, backend=None, timeouts: dict = None,
+                       concurrent: bool = True) -> dict:
+    """
+    Identity gate, then concurrent data + risk fan-out, then metrics and
+    agent_make_decision. Same result shape as run_decision_pipeline plus
+    "errors", "cancelled" and "latency_ms".
+    """
+    backend = backend or SimulatedPlaidBackend()
+    timeouts = timeouts or {}
+    started = time.perf_counter()
+
+    try:
+        identity = await _timed_call(backend, "identity", app_data, timeouts.get("identity", DEFAULT_TIMEOUT_S))
+    except Exception as exc:
+        return {
+            "decision": unavailable_decision(["identity"]),
+            "errors": {"identity": _describe(exc)},
+            "cancelled": list(FANOUT_CALLS),
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        }
+
+    fetched = await fetch_plaid_data(app_data, backend, timeouts, concurrent=concurrent)
+    results = fetched["results"]
+    result = {
+        "identity": identity,
+        "accounts": results.get("accounts"),
+        "transactions": results.get("transactions"),
+        "bank_income": results.get("bank_income"),
+        "errors": fetched["errors"],
+        "cancelled": fetched["cancelled"],
+    }
+
+    missing = [endpoint for endpoint in REQUIRED_CALLS if endpoint not in results]
+    if missing:
+        result["decision"] = unavailable_decision(missing)
+    else:
+        metrics_ctx = MetricsContext(app_data)
+        loan_amount = app_data["loan_amount"]
+        plaid_signals = {"signal": results["signal"], "beacon": results["beacon"], "trust": results["trust"]}
+        metrics = {"debt": metrics_ctx.debt(loan_amount), "liquidity": metrics_ctx.liquidity(loan_amount)}
+        decision = agent_make_decision(app_data, plaid_signals, metrics)
+        result.update({
+            "cash_flow": metrics_ctx.cash_flow(),
+            "metrics": metrics,
+            "plaid_signals": plaid_signals,
+            "decision": decision,
+            "audit": build_audit_record(application_id, app_data, decision, plaid_signals, metrics),
+        })
+
+    result["latency_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+async def decide_many(applications: dict, backend=None, max_in_flight: int = 32, **kwargs) -> dict:
+    """Decide a mapping of application_id -> app_data with bounded concurrency"""
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def one(application_id, app_data):
+        async with semaphore:
+            return application_id, await decide_async(application_id, app_data, backend, **kwargs)
+
+    pairs = await asyncio.gather(*(one(app_id, app) for app_id, app in applications.items()))
+    return dict(pairs)
+
+
+# =============================================================================
+# OFFLINE LATENCY BENCHMARK
+# =============================================================================
+
+async def _benchmark(n_apps: int, failure_rate: float, seed: int):
+    apps = list(LOAN_APPLICATIONS.items())
+    for label, concurrent in (("sequential", False), ("concurrent", True)):
+        backend = LatencyInjectingBackend(failure_rate=failure_rate, seed=seed)
+        latencies, outcomes = [], {}
+        for i in range(n_apps):
+            app_id, app_data = apps[i % len(apps)]
+            result = await decide_async(app_id, app_data, backend, concurrent=concurrent)
+            latencies.append(result["latency_ms"])
+            outcome = result["decision"]["decision"]
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{label:>10}: p50 {p50:7.1f} ms | p99 {p99:7.1f} ms | {outcomes}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare sequential vs concurrent Plaid calls against a latency stub")
+    parser.add_argument("--apps", type=int, default=20, help="decisions to run per mode")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of stub calls that fail")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    asyncio.run(_benchmark(args.apps, args.failure_rate, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+Secondary indexes over the persisted audit log.
+
+Each indexed field is a flat column file (one fixed-width value per audit
+record, in log order) that is memory-mapped for queries. Next to every
+column sits a sorted copy plus the permutation that produced it, so point
+lookups and range predicates are two binary searches. refresh() only parses
+records appended since the last refresh; their rows are scanned directly
+until enough accumulate to be merged into the sorted runs in linear time.
+A merge writes a new generation of sorted files and switches to it through
+the state file, so an interrupted merge leaves the previous generation in
+use and readers' memory maps are never rewritten under them.
+
+    python audit_index.py audit_log/ --decision DENIED --applicant "Bright Future LLC" \\
+        --since 2025-03-01 --until 2025-04-01 --max-dscr 1.2
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from audit_log import segment_number, segment_path, segment_paths
+
+# =============================================================================
+# INDEXED FIELDS
+# =============================================================================
+# Categorical fields are interned to int32 codes per index; equality
+# predicates on them become one-code ranges.
+CATEGORICAL_FIELDS = ("application_id", "applicant", "decision")
+
+# Numeric fields: name -> path inside the audit record
+NUMERIC_FIELDS = {
+    "loan_amount": ("loan_amount",),
+    "dscr": ("credit_metrics", "dscr"),
+    "dti_ratio": ("credit_metrics", "dti_ratio"),
+    "runway_months": ("credit_metrics", "runway_months"),
+    "signal_score": ("risk_scores", "signal_score"),
+    "trust_index": ("risk_scores", "trust_index"),
+}
+
+COLUMN_DTYPES = {
+    "audit_key": np.int64,  # 63-bit hash of audit_id
+    "timestamp": np.int64,  # microseconds since epoch
+    **{name: np.int32 for name in CATEGORICAL_FIELDS},
+    **{name: np.float64 for name in NUMERIC_FIELDS},
+}
+# Where each record lives in the log (not indexed)
+LOCATION_DTYPES = {"segment": np.uint32, "offset": np.uint64}
+
+INDEX_DIRNAME = "index"
+STATE_FILE = "state.json"
+MIN_MERGE_ROWS = 65_536
+
+
+def audit_key(audit_id: str) -> int:
+    digest = hashlib.blake2b(audit_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value) -> int:
+    """ISO string, date or datetime -> microseconds since the epoch (naive = as recorded)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return (value - (_EPOCH if value.tzinfo is None else _EPOCH_UTC)) // _MICROSECOND
+
+
+def _lookup(record: dict, path: tuple) -> float:
+    try:
+        for key in path:
+            record = record[key]
+        return float(record)
+    except (KeyError, TypeError, ValueError):
+        return float("nan")
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+class AuditIndex:
+    """Incrementally built, memory-mapped secondary indexes for one audit log"""
+
+    def __init__(self, log_directory: str, index_directory: str = None, merge_fraction: float = 0.125):
+        self.log_directory = log_directory
+        self.directory = index_directory or os.path.join(log_directory, INDEX_DIRNAME)
+        self.merge_fraction = merge_fraction
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.state = {"segment": 1, "offset": 0, "count": 0, "sorted_count": 0, "generation": 0}
+        state_path = os.path.join(self.directory, STATE_FILE)
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+            self.state.setdefault("generation", 0)
+
+        self.vocab = {name: self._load_vocab(name) for name in CATEGORICAL_FIELDS}
+        self._truncate_columns()
+        self._segment_files = {}
+        self._open_maps()
+
+    def __len__(self) -> int:
+        return self.state["count"]
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _sorted_path(self, name: str, kind: str, generation: int) -> str:
+        """`kind` is "sorted" or "order"; generation 0 is the unversioned layout"""
+        if generation == 0:
+            return self._path(f"{name}.{kind}.npy")
+        return self._path(f"{name}.{kind}.{generation}.npy")
+
+    def _remove_other_generations(self):
+        """Delete sorted files not in the current generation (left by an interrupted merge)"""
+        current = {
+            os.path.basename(self._sorted_path(name, kind, self.state["generation"]))
+            for name in COLUMN_DTYPES for kind in ("sorted", "order")
+        }
+        for filename in os.listdir(self.directory):
+            stale = filename.endswith(".npy.tmp") or (
+                filename.endswith(".npy") and (".sorted." in filename or ".order." in filename)
+            )
+            if stale and filename not in current:
+                os.remove(self._path(filename))
+
+    def _load_vocab(self, field: str) -> dict:
+        values = {}
+        path = self._path(f"{field}.vocab")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    values.setdefault(json.loads(line), len(values))
+        return values
+
+    def _truncate_columns(self):
+        """Drop rows written after the last saved state (interrupted refresh)"""
+        for name, dtype in {**COLUMN_DTYPES, **LOCATION_DTYPES}.items():
+            path = self._path(f"{name}.col")
+            keep = self.state["count"] * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > keep:
+                os.truncate(path, keep)
+
+    def _open_maps(self):
+        count = self.state["count"]
+        self.columns = {}
+        for name, dtype in {**COLUMN_DTYPES, **LOCATION_DTYPES}.items():
+            path = self._path(f"{name}.col")
+            self.columns[name] = (np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+                                  if count else np.empty(0, dtype=dtype))
+        self.sorted_keys, self.orders = {}, {}
+        if self.state["sorted_count"]:
+            generation = self.state["generation"]
+            for name in COLUMN_DTYPES:
+                self.sorted_keys[name] = np.load(self._sorted_path(name, "sorted", generation), mmap_mode="r")
+                self.orders[name] = np.load(self._sorted_path(name, "order", generation), mmap_mode="r")
+
+    @staticmethod
+    def _write_durably(path: str, write):
+        """write(file) to a temporary file, fsync it and rename it into place"""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _save_state(self):
+        payload = json.dumps(self.state).encode()
+        self._write_durably(self._path(STATE_FILE), lambda f: f.write(payload))
+
+    # -------------------------------------------------------------------------
+    # Incremental build
+    # -------------------------------------------------------------------------
+
+    def refresh(self, batch_rows: int = 100_000) -> int:
+        """Index records appended to the log since the last refresh; returns how many"""
+        added = 0
+        for path in segment_paths(self.log_directory):
+            segment = segment_number(path)
+            if segment < self.state["segment"]:
+                continue
+            offset = self.state["offset"] if segment == self.state["segment"] else 0
+            with open(path, "rb") as f:
+                f.seek(offset)
+                rows = []
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # being written; picked up next refresh
+                    rows.append((offset, json.loads(line)))
+                    offset += len(line)
+                    if len(rows) >= batch_rows:
+                        added += self._append_rows(segment, offset, rows)
+                        rows = []
+                added += self._append_rows(segment, offset, rows)
+
+        tail = self.state["count"] - self.state["sorted_count"]
+        if tail and tail >= max(MIN_MERGE_ROWS, self.merge_fraction * self.state["sorted_count"]):
+            self.merge()
+        else:
+            self._open_maps()
+        return added
+
+    def _append_rows(self, segment: int, end_offset: int, rows: list) -> int:
+        values = {name: [] for name in {**COLUMN_DTYPES, **LOCATION_DTYPES}}
+        new_vocab = {name: [] for name in CATEGORICAL_FIELDS}
+        for offset, record in rows:
+            values["segment"].append(segment)
+            values["offset"].append(offset)
+            values["audit_key"].append(audit_key(record["audit_id"]))
+            values["timestamp"].append(to_micros(record["timestamp"]))
+            for field in CATEGORICAL_FIELDS:
+                vocab = self.vocab[field]
+                value = record.get(field)
+                code = vocab.get(value)
+                if code is None:
+                    code = vocab[value] = len(vocab)
+                    new_vocab[field].append(value)
+                values[field].append(code)
+            for field, path in NUMERIC_FIELDS.items():
+                values[field].append(_lookup(record, path))
+
+        for field, added in new_vocab.items():
+            if added:
+                with open(self._path(f"{field}.vocab"), "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(value) + "\n" for value in added)
+        for name, dtype in {**COLUMN_DTYPES, **LOCATION_DTYPES}.items():
+            with open(self._path(f"{name}.col"), "ab") as f:
+                np.asarray(values[name], dtype=dtype).tofile(f)
+
+        self.state.update(segment=segment, offset=end_offset, count=self.state["count"] + len(rows))
+        self._save_state()
+        return len(rows)
+
+    def merge(self):
+        """
+        Fold unsorted tail rows into each sorted index (linear-time merge).
+        The merged indexes are written as the next generation; the state file
+        switches to it only once every file is durable.
+        """
+        self._open_maps()
+        start, count = self.state["sorted_count"], self.state["count"]
+        previous, generation = self.state["generation"], self.state["generation"] + 1
+        self._remove_other_generations()
+        for name in COLUMN_DTYPES:
+            tail = np.asarray(self.columns[name][start:count])
+            tail_order = np.argsort(tail, kind="stable")
+            tail_keys = tail[tail_order]
+            if start:
+                old_keys = np.asarray(self.sorted_keys[name])
+                positions = np.searchsorted(old_keys, tail_keys, side="right")
+                keys = np.insert(old_keys, positions, tail_keys)
+                order = np.insert(np.asarray(self.orders[name]), positions, tail_order + start)
+            else:
+                keys, order = tail_keys, tail_order.astype(np.int64)
+            self._write_durably(self._sorted_path(name, "sorted", generation), lambda f: np.save(f, keys))
+            self._write_durably(self._sorted_path(name, "order", generation), lambda f: np.save(f, order))
+        self.state.update(sorted_count=count, generation=generation)
+        self._save_state()
+        self._open_maps()
+        # Readers that mapped the previous generation keep their (unlinked) files
+        for name in COLUMN_DTYPES:
+            for kind in ("sorted", "order"):
+                path = self._sorted_path(name, kind, previous)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def _condition(self, field: str, value) -> tuple:
+        """Predicate -> (column, low, high); half-open [low, high), None = unbounded"""
+        if field == "audit_id":
+            key = audit_key(value)
+            return "audit_key", key, key + 1
+        if field in CATEGORICAL_FIELDS:
+            code = self.vocab[field].get(value)
+            if code is None:
+                return None
+            return field, code, code + 1
+        if field == "timestamp":
+            low, high = value
+            return "timestamp", None if low is None else to_micros(low), None if high is None else to_micros(high)
+        if field in NUMERIC_FIELDS:
+            if isinstance(value, tuple):
+                return field, value[0], value[1]
+            return field, value, np.nextafter(value, np.inf)
+        raise ValueError(f"Unknown audit index field: {field}")
+
+    def _sorted_range(self, column: str, low, high) -> tuple:
+        keys = self.sorted_keys.get(column)
+        if keys is None:
+            return 0, 0
+        i0 = 0 if low is None else int(np.searchsorted(keys, low, side="left"))
+        if high is not None:
+            i1 = int(np.searchsorted(keys, high, side="left"))
+        elif keys.dtype.kind == "f":
+            i1 = int(np.searchsorted(keys, np.nan, side="left"))  # NaN (missing) sorts last
+        else:
+            i1 = len(keys)
+        return i0, i1
+
+    @staticmethod
+    def _matches(values: np.ndarray, low, high) -> np.ndarray:
+        mask = values == values  # excludes NaN
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values < high
+        return mask
+
+    def query(self, limit: int = None, **predicates) -> np.ndarray:
+        """
+        Row numbers (log order) of records matching every predicate.
+        Categorical fields and audit_id take a value; timestamp takes a
+        (start, end) pair; numeric fields take a value or a (low, high) pair.
+        Ranges are half-open, None leaves a side unbounded:
+
+            index.query(applicant="Bright Future LLC", decision="DENIED",
+                        timestamp=("2025-03-01", "2025-04-01"), dscr=(None, 1.2))
+        """
+        conditions = []
+        for field, value in predicates.items():
+            condition = self._condition(field, value)
+            if condition is None:
+                return np.empty(0, dtype=np.int64)
+            conditions.append(condition)
+        sorted_count, count = self.state["sorted_count"], self.state["count"]
+        if not conditions:
+            rows = np.arange(count, dtype=np.int64)
+            return rows[:limit] if limit is not None else rows
+
+        # Drive from the most selective sorted range; check the rest per row
+        ranges = [self._sorted_range(*c) for c in conditions]
+        best = min(range(len(conditions)), key=lambda i: ranges[i][1] - ranges[i][0])
+        column, low, high = conditions[best]
+        i0, i1 = ranges[best]
+        rows = np.array(self.orders[column][i0:i1]) if i1 > i0 else np.empty(0, dtype=np.int64)
+        if count > sorted_count:
+            tail = np.asarray(self.columns[column][sorted_count:count])
+            rows = np.concatenate([rows, np.nonzero(self._matches(tail, low, high))[0] + sorted_count])
+
+        for i, (column, low, high) in enumerate(conditions):
+            if i != best and len(rows):
+                rows = rows[self._matches(self.columns[column][rows], low, high)]
+        rows.sort()
+        return rows[:limit] if limit is not None else rows
+
+    def count(self, **predicates) -> int:
+        return len(self.query(**predicates))
+
+    def fetch(self, rows) -> list:
+        """Full audit records for row numbers returned by query()"""
+        records = []
+        for row in np.asarray(rows, dtype=np.int64).tolist():
+            segment = int(self.columns["segment"][row])
+            handle = self._segment_files.get(segment)
+            if handle is None:
+                handle = self._segment_files[segment] = open(segment_path(self.log_directory, segment), "rb")
+            handle.seek(int(self.columns["offset"][row]))
+            records.append(json.loads(handle.readline()))
+        return records
+
+    def find(self, limit: int = None, **predicates) -> list:
+        return self.fetch(self.query(limit=limit, **predicates))
+
+    def get(self, audit_id: str):
+        """Point lookup by audit_id; None when absent"""
+        for record in self.find(audit_id=audit_id):
+            if record["audit_id"] == audit_id:
+                return record
+        return None
+
+    def close(self):
+        for handle in self._segment_files.values():
+            handle.close()
+        self._segment_files = {}
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the audit log through its secondary indexes")
+    parser.add_argument("log_directory")
+    parser.add_argument("--audit-id")
+    parser.add_argument("--application-id")
+    parser.add_argument("--applicant")
+    parser.add_argument("--decision", choices=("APPROVED", "MANUAL_REVIEW", "DENIED"))
+    parser.add_argument("--since", help="ISO timestamp, inclusive")
+    parser.add_argument("--until", help="ISO timestamp, exclusive")
+    parser.add_argument("--min-dscr", type=float)
+    parser.add_argument("--max-dscr", type=float, help="exclusive")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--count", action="store_true", help="print only the number of matches")
+    args = parser.parse_args(argv)
+
+    index = AuditIndex(args.log_directory)
+    index.refresh()
+    predicates = {}
+    for field in ("audit_id", "application_id", "applicant", "decision"):
+        if getattr(args, field) is not None:
+            predicates[field] = getattr(args, field)
+    if args.since or args.until:
+        predicates["timestamp"] = (args.since, args.until)
+    if args.min_dscr is not None or args.max_dscr is not None:
+        predicates["dscr"] = (args.min_dscr, args.max_dscr)
+
+    if args.count:
+        print(index.count(**predicates))
+        return
+    for record in index.find(limit=args.limit, **predicates):
+        print(json.dumps(record, default=str))
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer locking is skipped
+    fcntl = None
+
+# =============================================================================
+# AUDIT IDS
+# =============================================================================
+# AUD-YYYYMMDD-<12 hex ms since epoch><6 hex pid><4 hex sequence>
+# The timestamp keeps IDs sortable, the pid separates concurrent worker
+# processes on one host, and the sequence separates decisions within the same
+# millisecond. If the sequence overflows or the clock steps back, the
+# generator borrows the next millisecond, so IDs never repeat or go backwards.
+AUDIT_ID_SEQUENCE_BITS = 16
+
+
+class AuditIdGenerator:
+    """Monotonic, collision-free audit IDs for one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid() & 0xFFFFFF
+        self._last_ms = 0
+        self._sequence = 0
+
+    def __call__(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                self._sequence += 1
+                if self._sequence >> AUDIT_ID_SEQUENCE_BITS:
+                    self._last_ms += 1
+                    self._sequence = 0
+            ms, sequence = self._last_ms, self._sequence
+        day = datetime.fromtimestamp(ms / 1000).strftime("%Y%m%d")
+        return f"AUD-{day}-{ms:012x}{self._pid:06x}{sequence:04x}"
+
+
+new_audit_id = AuditIdGenerator()
+if hasattr(os, "register_at_fork"):
+    # A forked worker gets its own pid and must not continue the parent's sequence
+    os.register_at_fork(after_in_child=new_audit_id._reset)
+
+
+# =============================================================================
+# APPEND-ONLY SEGMENT LOG
+# =============================================================================
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def segment_paths(directory: str) -> list:
+    """Segment files in write order"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def segment_number(path: str) -> int:
+    return int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+def segment_path(directory: str, number: int) -> str:
+    return os.path.join(directory, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+
+
+def _truncate_torn_tail(path: str) -> int:
+    """Drop a partial last line left by a crash mid-write; returns the file size"""
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return size
+        window = min(size, 1 << 20)
+        while True:
+            f.seek(size - window)
+            cut = f.read(window).rfind(b"\n")
+            if cut >= 0 or window == size:
+                break
+            window = min(size, window * 2)
+        keep = size - window + cut + 1 if cut >= 0 else 0
+        f.truncate(keep)
+        return keep
+
+
+class AuditLog:
+    """
+    Durable, append-only audit trail in rotating JSONL segment files.
+
+    append() only serializes and enqueues; a background committer writes
+    everything queued since the last commit with one write() and one fsync
+    (group commit), so throughput is bounded by serialization, not by disk
+    syncs. Segments roll over at `segment_bytes`. Only one AuditLog may
+    write to a directory at a time.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 commit_interval: float = 0.005, max_batch: int = 8192, fsync: bool = True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = self._acquire_directory_lock()
+
+        existing = segment_paths(directory)
+        self._segment = segment_number(existing[-1]) if existing else 1
+        self._size = _truncate_torn_tail(existing[-1]) if existing else 0
+        self._file = open(segment_path(directory, self._segment), "ab")
+
+        self._cond = threading.Condition()
+        self._pending = []
+        self._appended = 0  # records accepted
+        self._committed = 0  # records durably written
+        self._closing = False
+        self._error = None
+        self._committer = threading.Thread(target=self._commit_loop, name="audit-log-commit", daemon=True)
+        self._committer.start()
+
+    def _acquire_directory_lock(self):
+        lock_file = open(os.path.join(self.directory, "LOCK"), "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise RuntimeError(f"Audit log {self.directory} is already open by another writer")
+        return lock_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------------------------------------------------------
+    # Writers
+    # -------------------------------------------------------------------------
+
+    def append(self, record: dict, durable: bool = False) -> int:
+        """
+        Queue one audit record and return its sequence number in this
+        session. With durable=True, block until it has been fsynced. Raises
+        the writer's error once a write has failed.
+        """
+        line = json.dumps(record, default=str, separators=(",", ":")).encode() + b"\n"
+        with self._cond:
+            if self._error is not None:
+                raise self._error
+            if self._closing:
+                raise ValueError("Audit log is closed")
+            self._pending.append(line)
+            self._appended += 1
+            sequence = self._appended
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        if durable:
+            self.wait_durable(sequence)
+        return sequence
+
+    def wait_durable(self, sequence: int = None):
+        """Block until record `sequence` (default: everything appended so far) is on disk"""
+        with self._cond:
+            target = self._appended if sequence is None else sequence
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._committed >= target or self._error is not None)
+            if self._error is not None:
+                raise self._error
+
+    flush = wait_durable
+
+    def close(self):
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._committer.join()
+        self._file.close()
+        self._lock_file.close()
+        if self._error is not None:
+            raise self._error
+
+    # -------------------------------------------------------------------------
+    # Group commit
+    # -------------------------------------------------------------------------
+
+    def _commit_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing, timeout=self.commit_interval)
+                batch, self._pending = self._pending, []
+                last = self._appended
+                closing = self._closing
+            if batch:
+                try:
+                    self._write(b"".join(batch))
+                except OSError as exc:
+                    with self._cond:
+                        self._error = exc
+                        self._cond.notify_all()
+                    return
+            with self._cond:
+                self._committed = last
+                self._cond.notify_all()
+            if closing and not batch:
+                return
+
+    def _write(self, data: bytes):
+        if self._size and self._size + len(data) > self.segment_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._size += len(data)
+
+    def _rotate(self):
+        self._file.close()
+        self._segment += 1
+        self._size = 0
+        self._file = open(segment_path(self.directory, self._segment), "ab")
+        if self.fsync and hasattr(os, "O_DIRECTORY"):
+            # Make the new segment's directory entry durable too
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+# =============================================================================
+# READERS
+# =============================================================================
+
+def read_audit_log(directory: str):
+    """Yield every committed audit record in write order"""
+    for path in segment_paths(directory):
+        with open(path, "rb") as f:
+            for line in f:
+                if line.endswith(b"\n"):
+                    yield json.loads(line)
@@ -0,0 +1,244 @@
+"""
+Headless batch decisioning.
+
+Streams applications from JSONL or CSV, runs each one through the same
+identity -> data -> metrics -> risk -> agent_make_decision pipeline as the
+Streamlit app, and writes decisions and audit records as it goes. Memory use
+is constant: one application is in flight at a time.
+
+    python batch_runner.py applications.jsonl --decisions decisions.jsonl --audit audit.jsonl
+    python batch_runner.py applications.jsonl --audit-log audit_log/
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from audit_log import AuditLog
+from credit_engine import run_decision_pipeline
+
+# =============================================================================
+# INPUT READERS
+# =============================================================================
+# CSV rows carry the nested Plaid payloads as JSON-encoded cells
+CSV_JSON_FIELDS = ("linked_accounts", "transactions_90d", "bank_income", "risk_signals")
+CSV_NUMERIC_FIELDS = ("loan_amount", "years_in_business", "owner_fico")
+
+DECISION_FIELDS = ("application_id", "decision", "score", "max_score", "reason", "audit_id", "timestamp")
+
+
+def _number(value: str):
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _split_record(record: dict, line_no: int) -> tuple:
+    """Accept {"application_id", "application": {...}} or a flat app_data with application_id"""
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    if "application" in record:
+        return record.get("application_id") or f"ROW-{line_no}", record["application"]
+    app_data = dict(record)
+    return app_data.pop("application_id", None) or f"ROW-{line_no}", app_data
+
+
+class MalformedRecord:
+    """Stands in for the app_data of an input line that could not be parsed"""
+
+    def __init__(self, exc: Exception):
+        self.reason = f"{type(exc).__name__}: {exc}"
+
+
+def read_jsonl(stream, report_malformed: bool = False):
+    """
+    (application_id, app_data) per line. A line that can't be parsed raises,
+    or with report_malformed yields ("ROW-<line_no>", MalformedRecord).
+    """
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = _split_record(json.loads(line), line_no)
+        except (TypeError, ValueError) as exc:
+            if not report_malformed:
+                raise
+            record = f"ROW-{line_no}", MalformedRecord(exc)
+        yield record
+
+
+def _parse_csv_row(row: dict) -> dict:
+    for field in CSV_JSON_FIELDS:
+        row[field] = json.loads(row[field])
+    for field in CSV_NUMERIC_FIELDS:
+        if row.get(field) not in (None, ""):
+            row[field] = _number(row[field])
+    if "plaid_linked" in row:
+        row["plaid_linked"] = row["plaid_linked"].strip().lower() in ("1", "true", "yes")
+    return row
+
+
+def read_csv(stream, report_malformed: bool = False):
+    """(application_id, app_data) per row; malformed rows as in read_jsonl"""
+    for line_no, row in enumerate(csv.DictReader(stream), 1):
+        try:
+            record = _split_record(_parse_csv_row(row), line_no)
+        except (AttributeError, KeyError, TypeError, ValueError) as exc:
+            if not report_malformed:
+                raise
+            record = f"ROW-{line_no}", MalformedRecord(exc)
+        yield record
+
+
+def detect_format(path: str, explicit: str = None) -> str:
+    if explicit:
+        return explicit
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+# =============================================================================
+# PROGRESS
+# =============================================================================
+
+class ProgressMeter:
+    """Prints processed count and throughput to stderr at most every `interval` seconds"""
+
+    def __init__(self, interval: float = 2.0, stream=sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        self.processed = 0
+        self.errors = 0
+        self.decisions = Counter()
+
+    def record(self, decision: str = None):
+        self.processed += 1
+        if decision is None:
+            self.errors += 1
+        else:
+            self.decisions[decision] += 1
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def throughput(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def report(self, final: bool = False):
+        label = "done" if final else "progress"
+        counts = ", ".join(f"{k}={v}" for k, v in sorted(self.decisions.items()))
+        print(
+            f"[{label}] {self.processed:,} applications | {self.throughput():,.0f}/s | "
+            f"errors={self.errors}" + (f" | {counts}" if counts else ""),
+            file=self.stream, flush=True
+        )
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+class DecisionWriter:
+    """Writes decision rows as JSONL or CSV depending on the output extension"""
+
+    def __init__(self, stream, fmt: str):
+        self.stream = stream
+        self._csv = csv.DictWriter(stream, fieldnames=DECISION_FIELDS) if fmt == "csv" else None
+        if self._csv:
+            self._csv.writeheader()
+
+    def write(self, row: dict):
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self.stream.write(json.dumps(row, default=str) + "\n")
+
+
+def run_batch(records, decisions_out: DecisionWriter, audit_out=None, progress: ProgressMeter = None,
+              flush_every: int = 1000, audit_log: AuditLog = None) -> ProgressMeter:
+    """
+    Decide every (application_id, app_data) pair, writing results as they
+    complete. Audit records go to `audit_out` (a text stream) and/or the
+    durable `audit_log`. Malformed input lines (MalformedRecord) and
+    applications the pipeline rejects are written as ERROR rows.
+    """
+    progress = progress or ProgressMeter()
+    for count, (application_id, app_data) in enumerate(records, 1):
+        if isinstance(app_data, MalformedRecord):
+            decisions_out.write({"application_id": application_id, "decision": "ERROR", "reason": app_data.reason})
+            progress.record(None)
+            continue
+        try:
+            result = run_decision_pipeline(application_id, app_data)
+        except (KeyError, TypeError, ValueError) as exc:
+            decisions_out.write({"application_id": application_id, "decision": "ERROR", "reason": f"{type(exc).__name__}: {exc}"})
+            progress.record(None)
+            continue
+
+        decision = result["decision"]
+        decisions_out.write({"application_id": application_id, **{k: decision[k] for k in DECISION_FIELDS[1:]}})
+        if audit_out is not None:
+            audit_out.write(json.dumps(result["audit"], default=str) + "\n")
+        if audit_log is not None:
+            audit_log.append(result["audit"])
+        progress.record(decision["decision"])
+
+        if count % flush_every == 0:
+            decisions_out.stream.flush()
+            if audit_out is not None:
+                audit_out.flush()
+    if audit_log is not None:
+        audit_log.flush()
+    progress.report(final=True)
+    return progress
+
+
+def _open_output(path: str):
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run credit decisions over a JSONL or CSV file of applications")
+    parser.add_argument("input", help="applications file (.jsonl or .csv), or - for stdin")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="input format (default: from extension)")
+    parser.add_argument("--decisions", default="-", help="decisions output (.jsonl or .csv), default stdout")
+    parser.add_argument("--audit", help="audit records output (JSONL)")
+    parser.add_argument("--audit-log", help="directory of the durable append-only audit log")
+    parser.add_argument("--progress-interval", type=float, default=2.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    fmt = detect_format(args.input, args.format)
+    reader = read_csv if fmt == "csv" else read_jsonl
+    in_stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    decisions_stream = _open_output(args.decisions)
+    audit_stream = _open_output(args.audit) if args.audit else None
+    audit_log = AuditLog(args.audit_log) if args.audit_log else None
+    out_format = "csv" if os.path.splitext(args.decisions)[1].lower() == ".csv" else "jsonl"
+
+    try:
+        progress = run_batch(
+            reader(in_stream, report_malformed=True),
+            DecisionWriter(decisions_stream, out_format),
+            audit_stream,
+            ProgressMeter(args.progress_interval),
+            audit_log=audit_log,
+        )
+    finally:
+        if audit_log is not None:
+            audit_log.close()
+        for stream in (in_stream, decisions_stream, audit_stream):
+            if stream not in (None, sys.stdin, sys.stdout):
+                stream.close()
+    return 1 if progress.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Cold-import benchmark for the decision engine.
+
+Each module is imported in a fresh interpreter several times and the median
+wall time of the import statement is reported, so worker cold start can be
+compared between the headless core and the Streamlit UI.
+
+    python benchmarks/import_time.py --runs 7
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = ("numpy", "credit_engine", "portfolio_scoring", "decision_service", "plaid_credit_agent")
+
+PROBE = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def import_seconds(module: str, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the engine and UI modules")
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per module")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<22}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for module in args.modules:
+        timings = import_seconds(module, args.runs)
+        print(f"{module:<22}{statistics.median(timings) * 1000:>12.1f}{min(timings) * 1000:>10.1f}{max(timings) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
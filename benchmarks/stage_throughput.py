@@ -0,0 +1,141 @@
+"""
+Per-stage throughput, latency and memory of the decision engine.
+
+For each (applications, transactions per application) size, synthetic
+applications are generated and every stage is timed call by call over the
+whole population: cash flow, debt, liquidity and merchant concentration
+metrics, the three Plaid risk functions and agent_make_decision. Stages downstream of cash flow get
+precomputed inputs, so each row measures only its own function. Peak memory
+is taken from a separate tracemalloc pass so tracing doesn't skew timings.
+
+    python benchmarks/stage_throughput.py --apps 1000 10000 --transactions 30 120 480
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from credit_engine import (  # noqa: E402
+    agent_make_decision,
+    calculate_cash_flow_metrics,
+    calculate_debt_metrics,
+    calculate_liquidity_metrics,
+    plaid_beacon_check,
+    plaid_signal_score,
+    plaid_trust_index,
+)
+from merchant_normalization import calculate_merchant_concentration  # noqa: E402
+from synthetic_data import generate_applications  # noqa: E402
+
+# =============================================================================
+# STAGES
+# =============================================================================
+# Each stage maps (app_data, inputs) -> result; `inputs` holds the results of
+# earlier stages for the same application.
+STAGES = (
+    ("cash_flow", lambda app, inputs: calculate_cash_flow_metrics(app)),
+    ("debt", lambda app, inputs: calculate_debt_metrics(app, app["loan_amount"], inputs["cash_flow"])),
+    ("liquidity", lambda app, inputs: calculate_liquidity_metrics(app, app["loan_amount"], inputs["cash_flow"])),
+    ("merchants", lambda app, inputs: calculate_merchant_concentration(app)),
+    ("signal", lambda app, inputs: plaid_signal_score(app)),
+    ("beacon", lambda app, inputs: plaid_beacon_check(app)),
+    ("trust", lambda app, inputs: plaid_trust_index(app)),
+    ("decision", lambda app, inputs: agent_make_decision(
+        app,
+        {"signal": inputs["signal"], "beacon": inputs["beacon"], "trust": inputs["trust"]},
+        {"debt": inputs["debt"], "liquidity": inputs["liquidity"]},
+    )),
+)
+
+
+def time_stage(stage, applications: list, inputs: list) -> np.ndarray:
+    """Per-call latency in nanoseconds; results are stored into `inputs`"""
+    name, fn = stage
+    clock = time.perf_counter_ns
+    latencies = np.empty(len(applications), dtype=np.int64)
+    for i, app in enumerate(applications):
+        started = clock()
+        result = fn(app, inputs[i])
+        latencies[i] = clock() - started
+        inputs[i][name] = result
+    return latencies
+
+
+def peak_memory(stage, applications: list, inputs: list) -> int:
+    """Peak bytes allocated while running the stage over every application"""
+    name, fn = stage
+    tracemalloc.start()
+    try:
+        results = [fn(app, inputs[i]) for i, app in enumerate(applications)]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del results
+    return peak
+
+
+def run_size(n_apps: int, per_app: int, seed: int, memory: bool) -> list:
+    applications = list(generate_applications(n_apps, per_app, seed).values())
+    inputs = [{} for _ in applications]
+    rows = []
+    for stage in STAGES:
+        latencies = time_stage(stage, applications, inputs)
+        total_s = latencies.sum() / 1e9
+        rows.append({
+            "stage": stage[0],
+            "applications": n_apps,
+            "transactions_per_app": per_app,
+            "throughput_per_s": n_apps / total_s if total_s > 0 else float("inf"),
+            "p50_us": float(np.percentile(latencies, 50)) / 1e3,
+            "p99_us": float(np.percentile(latencies, 99)) / 1e3,
+            "peak_mib": peak_memory(stage, applications, inputs) / 2**20 if memory else None,
+        })
+    return rows
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+def print_rows(rows: list):
+    print(f"{'stage':<11}{'apps':>9}{'txns/app':>10}{'apps/s':>14}{'p50 us':>10}{'p99 us':>10}{'peak MiB':>10}")
+    for row in rows:
+        peak = f"{row['peak_mib']:>10.2f}" if row["peak_mib"] is not None else f"{'-':>10}"
+        print(
+            f"{row['stage']:<11}{row['applications']:>9,}{row['transactions_per_app']:>10,}"
+            f"{row['throughput_per_s']:>14,.0f}{row['p50_us']:>10.1f}{row['p99_us']:>10.1f}{peak}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each decision stage as applications and transactions grow")
+    parser.add_argument("--apps", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--transactions", type=int, nargs="+", default=[10, 60, 250])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--json", help="also write result rows to this file")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for n_apps in args.apps:
+        for per_app in args.transactions:
+            started = time.perf_counter()
+            size_rows = run_size(n_apps, per_app, args.seed, not args.no_memory)
+            print_rows(size_rows)
+            print(f"  ({time.perf_counter() - started:.1f}s including generation)\n")
+            rows.extend(size_rows)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as out:
+            json.dump(rows, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
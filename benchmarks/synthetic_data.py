@@ -0,0 +1,116 @@
+"""
+Synthetic Plaid-shaped loan applications at any size.
+
+Every random field for the whole population is drawn in one NumPy call and
+the per-application dicts are assembled from plain Python lists, so a
+million transactions take a couple of seconds to generate. Output has the same
+shape as credit_engine.LOAN_APPLICATIONS.
+
+    from synthetic_data import generate_applications
+    apps = generate_applications(10_000, transactions_per_app=120, seed=7)
+"""
+import numpy as np
+
+# =============================================================================
+# TEMPLATES
+# =============================================================================
+# (name, category, merchant, sign, low amount, high amount)
+TRANSACTION_TEMPLATES = (
+    ("STRIPE TRANSFER", ["Transfer", "Credit"], "Stripe", 1, 2_000, 15_000),
+    ("SHOPIFY PAYOUT", ["Transfer", "Credit"], "Shopify", 1, 1_000, 9_000),
+    ("GUSTO PAYROLL", ["Transfer", "Payroll"], "Gusto", -1, 3_000, 25_000),
+    ("COMMERCIAL LEASE PMT", ["Payment", "Rent"], "Parkview Properties", -1, 1_500, 9_000),
+    ("AWS SERVICES", ["Service", "Software"], "Amazon Web Services", -1, 50, 4_000),
+    ("INVENTORY PURCHASE", ["Payment", "Merchandise"], "Alibaba", -1, 500, 20_000),
+    ("FACEBOOK ADS", ["Service", "Advertising"], "Meta", -1, 200, 5_000),
+)
+# Inflows are drawn more often so a typical applicant is roughly break-even
+TEMPLATE_WEIGHTS = (0.26, 0.14, 0.12, 0.08, 0.14, 0.14, 0.12)
+
+BUSINESS_TYPES = ("E-commerce (Shopify)", "SaaS Startup", "Restaurant", "Construction", "Consulting")
+INCOME_STABILITY = ("HIGH", "MEDIUM", "LOW")
+LOAN_AMOUNTS = (10_000, 25_000, 50_000, 75_000, 150_000, 250_000)
+WINDOW_END = np.datetime64("2025-01-27")
+
+
+# =============================================================================
+# GENERATOR
+# =============================================================================
+
+def _transactions(rng, n_apps: int, per_app: int) -> list:
+    """per_app transactions for each of n_apps applicants, newest first"""
+    total = n_apps * per_app
+    kinds = rng.choice(len(TRANSACTION_TEMPLATES), total, p=TEMPLATE_WEIGHTS)
+    lows = np.array([t[4] for t in TRANSACTION_TEMPLATES], dtype=np.float64)[kinds]
+    highs = np.array([t[5] for t in TRANSACTION_TEMPLATES], dtype=np.float64)[kinds]
+    signs = np.array([t[3] for t in TRANSACTION_TEMPLATES], dtype=np.float64)[kinds]
+    amounts = np.round(lows + rng.random(total) * (highs - lows), 2) * signs
+    ages = np.sort(rng.integers(0, 90, (n_apps, per_app)), axis=1).ravel()
+    dates = (WINDOW_END - ages).astype(str)
+
+    templates = [(name, category, merchant) for name, category, merchant, *_ in TRANSACTION_TEMPLATES]
+    rows = [
+        {"date": day, "name": templates[k][0], "amount": amount, "category": templates[k][1], "merchant": templates[k][2]}
+        for day, k, amount in zip(dates.tolist(), kinds.tolist(), amounts.tolist())
+    ]
+    return [rows[i * per_app:(i + 1) * per_app] for i in range(n_apps)]
+
+
+def generate_applications(n_apps: int, transactions_per_app: int = 60, seed: int = 0) -> dict:
+    """
+    n_apps applications keyed SYN-000001, SYN-000002, ...
+    Category lists are shared objects (as Plaid client libraries return
+    them) and must not be mutated.
+    """
+    rng = np.random.default_rng(seed)
+    transactions = _transactions(rng, n_apps, transactions_per_app)
+
+    checking = np.round(rng.lognormal(10.0, 1.0, n_apps), 2).tolist()
+    savings = np.round(rng.lognormal(10.5, 1.2, n_apps) * (rng.random(n_apps) < 0.6), 2).tolist()
+    card_balance = np.round(-rng.uniform(0, 30_000, n_apps), 2).tolist()
+    card_limit = rng.choice([10_000, 25_000, 50_000], n_apps).tolist()
+    verified_income = np.round(rng.lognormal(10.3, 0.8, n_apps), -2).tolist()
+    stability = rng.choice(INCOME_STABILITY, n_apps, p=(0.5, 0.3, 0.2)).tolist()
+    history = rng.choice([3, 6, 8, 12, 24, 36, 84], n_apps).tolist()
+    years = rng.choice([0.5, 1, 2, 3, 5, 7, 12], n_apps).tolist()
+    loan_amount = rng.choice(LOAN_AMOUNTS, n_apps).tolist()
+    business_type = rng.choice(BUSINESS_TYPES, n_apps).tolist()
+    fico = rng.integers(560, 820, n_apps).tolist()
+    nsf = rng.choice([0, 0, 0, 0, 1, 2, 5], n_apps).tolist()
+    negative_days = rng.choice([0, 0, 0, 3, 5, 20], n_apps).tolist()
+    account_age = rng.integers(60, 3_650, n_apps).tolist()
+    beacon = (rng.random(n_apps) < 0.03).astype(int).tolist()
+
+    applications = {}
+    for i in range(n_apps):
+        app_id = f"SYN-{i + 1:06d}"
+        applications[app_id] = {
+            "business_name": f"Synthetic Business {i + 1}",
+            "business_type": business_type[i],
+            "years_in_business": years[i],
+            "loan_amount": loan_amount[i],
+            "loan_purpose": "Working Capital",
+            "owner_name": f"Owner {i + 1}",
+            "owner_fico": fico[i],
+            "plaid_linked": True,
+            "linked_accounts": [
+                {"institution": "Chase", "name": "Business Checking", "type": "depository", "subtype": "checking", "balance": checking[i], "account_id": f"acc_{i}_chk"},
+                {"institution": "Chase", "name": "Business Savings", "type": "depository", "subtype": "savings", "balance": savings[i], "account_id": f"acc_{i}_sav"},
+                {"institution": "American Express", "name": "Business Card", "type": "credit", "subtype": "credit card", "balance": card_balance[i], "limit": card_limit[i], "account_id": f"acc_{i}_cc"},
+            ],
+            "transactions_90d": transactions[i],
+            "bank_income": {
+                "verified_income": verified_income[i],
+                "income_sources": [{"source": "Stripe", "monthly_avg": verified_income[i], "confidence": 0.9}],
+                "income_stability": stability[i],
+                "months_of_history": history[i],
+            },
+            "risk_signals": {
+                "nsf_overdraft_count_90d": nsf[i],
+                "negative_balance_days_90d": negative_days[i],
+                "account_age_days": account_age[i],
+                "fraud_signals": ["Beacon consortium match"] if beacon[i] else [],
+                "beacon_network_flags": beacon[i],
+            },
+        }
+    return applications
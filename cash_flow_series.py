@@ -0,0 +1,186 @@
+import numpy as np
+
+from transaction_store import TransactionTable
+
+# =============================================================================
+# TIME-BUCKETED CASH FLOW
+# =============================================================================
+# calculate_cash_flow_metrics summarizes a fixed 90-day window. These metrics
+# cover the applicant's whole transaction history instead. Transactions are
+# binned by calendar month (and week) with datetime64 arithmetic into a dense
+# (applicant, bucket) matrix, and every statistic below is a reduction over
+# that matrix, so a whole book of multi-year histories takes one pass.
+# Each applicant's span runs from their first to their last transaction
+# month; months inside the span without transactions count as zero.
+
+# Features available to decision policies (see decision_policy.decision_features)
+SERIES_FEATURES = (
+    "history_months",
+    "monthly_net_mean",
+    "monthly_net_volatility",
+    "cash_flow_stability",
+    "net_cash_flow_trend",
+    "seasonality_strength",
+    "lowest_month_end_balance",
+    "worst_week_net",
+)
+# Every field calculate_cash_flow_series returns; the month can only be quoted in reasons
+SERIES_FIELDS = SERIES_FEATURES + ("lowest_balance_month",)
+
+# Decimal places the features are rounded to (scalar and batch paths alike)
+SERIES_DIGITS = {
+    "history_months": 0,
+    "monthly_net_mean": 2,
+    "monthly_net_volatility": 2,
+    "cash_flow_stability": 3,
+    "net_cash_flow_trend": 2,
+    "seasonality_strength": 3,
+    "lowest_month_end_balance": 2,
+    "worst_week_net": 2,
+}
+
+# Seasonality needs every calendar month observed at least twice
+MIN_SEASONAL_MONTHS = 24
+
+
+def _bucket_index(table: TransactionTable, unit: str) -> tuple:
+    """(dated mask, bucket number per dated transaction, first bucket as datetime64)"""
+    dated = ~np.isnat(table.dates)
+    days = table.dates[dated].astype(np.int64)
+    if not len(days):
+        return dated, days, np.datetime64("NaT", unit)
+    if unit == "W":
+        buckets = days // 7  # numpy weeks count from the epoch in 7-day steps
+    else:
+        # Calendar conversion of every date is slow; convert each distinct day once
+        first_day = days.min()
+        day_range = np.arange(first_day, days.max() + 1).astype("datetime64[D]")
+        buckets = day_range.astype(f"datetime64[{unit}]").astype(np.int64)[days - first_day]
+    origin = buckets.min()
+    return dated, buckets - origin, np.datetime64(int(origin), unit)
+
+
+def bucket_totals(table: TransactionTable, unit: str = "M") -> dict:
+    """
+    Per-owner inflow, outflow and net totals per `unit` bucket ("M" month,
+    "W" week) as (n_owners, n_buckets) matrices, with the first bucket as a
+    datetime64 and a `span` mask of the buckets between each owner's first
+    and last transaction. Outflows are absolute values.
+    """
+    dated, index, origin = _bucket_index(table, unit)
+    width = int(index.max()) + 1 if len(index) else 0
+    amounts = table.amounts[dated]
+    owners = table.owners[dated]
+
+    cells = owners * width + index
+    size = table.n_owners * width
+    inflows = np.bincount(cells, weights=np.where(amounts > 0, amounts, 0.0), minlength=size)
+    outflows = np.bincount(cells, weights=np.where(amounts < 0, -amounts, 0.0), minlength=size)
+
+    first = np.full(table.n_owners, width, dtype=np.int64)
+    last = np.full(table.n_owners, -1, dtype=np.int64)
+    np.minimum.at(first, owners, index)
+    np.maximum.at(last, owners, index)
+    columns = np.arange(width)
+    return {
+        "origin": origin,
+        "inflows": inflows.reshape(table.n_owners, width),
+        "outflows": outflows.reshape(table.n_owners, width),
+        "net": (inflows - outflows).reshape(table.n_owners, width),
+        "span": (columns >= first[:, None]) & (columns <= last[:, None]),
+    }
+
+
+def series_metrics(table: TransactionTable, ending_balances=None) -> dict:
+    """
+    Per-owner multi-month cash flow statistics:
+      history_months            months in the owner's span
+      monthly_net_mean          average monthly net cash flow
+      monthly_net_volatility    standard deviation of monthly net cash flow
+      cash_flow_stability       1 - volatility / average monthly inflow, clipped to [0, 1]
+      net_cash_flow_trend       least-squares slope of monthly net ($ per month)
+      seasonality_strength      share of detrended variance explained by calendar month
+      lowest_month_end_balance  lowest month-end balance, walked back from `ending_balances`
+      lowest_balance_month      the month it occurred (datetime64[M])
+      worst_week_net            lowest weekly net cash flow
+    `ending_balances` is each owner's current balance (default 0, which makes
+    month-end balances relative to today).
+    """
+    n_owners = table.n_owners
+    monthly = bucket_totals(table, "M")
+    net = monthly["net"]
+    width = net.shape[1]
+    span = monthly["span"]
+    months = span.sum(axis=1)
+    has_history = months > 0
+    safe_months = np.maximum(months, 1)
+
+    net = np.where(span, net, 0.0)
+    mean = net.sum(axis=1) / safe_months
+    deviation = np.where(span, net - mean[:, None], 0.0)
+    variance = (deviation ** 2).sum(axis=1) / safe_months
+    volatility = np.sqrt(variance)
+    mean_inflow = np.where(span, monthly["inflows"], 0.0).sum(axis=1) / safe_months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stability = np.where(mean_inflow > 0, np.clip(1 - volatility / mean_inflow, 0.0, 1.0), 0.0)
+
+    # Least-squares trend over each owner's own months
+    first_month = span.argmax(axis=1) if width else np.zeros(n_owners, dtype=np.int64)
+    x = np.where(span, np.arange(width) - first_month[:, None], 0).astype(np.float64)
+    x_centered = np.where(span, x - (x.sum(axis=1) / safe_months)[:, None], 0.0)
+    sxx = (x_centered ** 2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trend = np.where(sxx > 0, (x_centered * deviation).sum(axis=1) / sxx, 0.0)
+
+    # Seasonality: variance of calendar-month means of the detrended series
+    residual = np.where(span, deviation - trend[:, None] * x_centered, 0.0)
+    residual_variance = (residual ** 2).sum(axis=1) / safe_months
+    calendar = (monthly["origin"].astype(np.int64) + np.arange(width)) % 12 if width else np.zeros(0, dtype=np.int64)
+    one_hot = (calendar[:, None] == np.arange(12)).astype(np.float64)
+    calendar_sums = residual @ one_hot
+    calendar_counts = span.astype(np.float64) @ one_hot
+    with np.errstate(divide="ignore", invalid="ignore"):
+        calendar_means = np.where(calendar_counts > 0, calendar_sums / calendar_counts, 0.0)
+        between = (calendar_counts * calendar_means ** 2).sum(axis=1) / safe_months
+        seasonality = np.where(
+            (months >= MIN_SEASONAL_MONTHS) & (residual_variance > 0), between / residual_variance, 0.0
+        )
+
+    # Month-end balances, walked back from the current balance
+    ending = np.zeros(n_owners) if ending_balances is None else np.asarray(ending_balances, dtype=np.float64)
+    balances = ending[:, None] - (net.sum(axis=1)[:, None] - np.cumsum(net, axis=1))
+    balances = np.where(span, balances, np.inf)
+    lowest = balances.argmin(axis=1) if width else np.zeros(n_owners, dtype=np.int64)
+    lowest_balance = np.where(has_history, balances[np.arange(n_owners), lowest] if width else 0.0, np.nan)
+    lowest_month = np.where(has_history, monthly["origin"] + lowest, np.datetime64("NaT", "M"))
+
+    weekly = bucket_totals(table, "W")
+    worst_week = np.where(weekly["span"], weekly["net"], np.inf).min(axis=1, initial=np.inf)
+
+    return {
+        "history_months": months.astype(np.float64),
+        "monthly_net_mean": np.where(has_history, mean, np.nan),
+        "monthly_net_volatility": np.where(has_history, volatility, np.nan),
+        "cash_flow_stability": stability,
+        "net_cash_flow_trend": trend,
+        "seasonality_strength": seasonality,
+        "lowest_month_end_balance": lowest_balance,
+        "lowest_balance_month": lowest_month,
+        "worst_week_net": np.where(np.isfinite(worst_week), worst_week, np.nan),
+    }
+
+
+def liquid_balance(app_data: dict) -> float:
+    """Current positive depository balance (same as the liquidity metrics)"""
+    return sum(a["balance"] for a in app_data["linked_accounts"] if a["type"] == "depository" and a["balance"] > 0)
+
+
+def calculate_cash_flow_series(app_data: dict) -> dict:
+    """series_metrics for one applicant, as plain Python values"""
+    txns = TransactionTable.from_transactions(app_data["transactions_90d"])
+    metrics = series_metrics(txns, [liquid_balance(app_data)])
+    result = {name: round(float(metrics[name][0]), SERIES_DIGITS[name]) for name in SERIES_FEATURES}
+    result["history_months"] = int(result["history_months"])
+    month = metrics["lowest_balance_month"][0]
+    result["lowest_balance_month"] = None if np.isnat(month) else str(month)
+    return result
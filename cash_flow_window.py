@@ -0,0 +1,162 @@
+from bisect import bisect_right
+from collections import deque
+from datetime import date
+
+from credit_engine import calculate_debt_metrics, calculate_liquidity_metrics
+from transaction_store import CASH_FLOW_WINDOW_DAYS, DEFAULT_VOCABULARY, window_months
+
+# =============================================================================
+# INCREMENTAL SLIDING-WINDOW CASH FLOW
+# =============================================================================
+# Running totals are kept in integer cents so adding and evicting the same
+# transaction never leaves floating-point residue, however long the window
+# has been running. Entries are bucketed by day: a late arrival joins its
+# day's bucket, and only a late arrival on a day not seen yet shifts the
+# ordered list of days, which holds at most window_days entries however
+# many transactions the window contains.
+
+INFLOW, OUTFLOW = 0, 1
+
+
+def _ordinal(value) -> int:
+    """Day ordinal of a date or ISO date string; None if it is missing or unparseable"""
+    if isinstance(value, date):
+        return value.toordinal()
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+class CashFlowWindow:
+    """
+    Per-applicant cash flow over the trailing `window_days`.
+    append() and eviction are O(1) amortized; a late arrival on a new day
+    costs O(window_days) at most. Every metric reads the running totals, so
+    nothing is rescanned.
+    """
+
+    def __init__(self, window_days: int = CASH_FLOW_WINDOW_DAYS, vocabulary=DEFAULT_VOCABULARY):
+        self.window_days = window_days
+        self.vocabulary = vocabulary
+        self.as_of = None  # ordinal of the newest date seen (or advanced to)
+        self._days = deque()  # ordinals that have entries, ascending
+        self._by_day = {}  # ordinal -> [(cents, category_code), ...]
+        self._count = 0
+        self._totals = [0] * (2 + len(vocabulary.labels))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @classmethod
+    def from_transactions(cls, transactions: list, window_days: int = CASH_FLOW_WINDOW_DAYS) -> "CashFlowWindow":
+        window = cls(window_days)
+        for t in sorted(transactions, key=lambda t: str(t.get("date") or "")):
+            window.append(t)
+        return window
+
+    # -------------------------------------------------------------------------
+    # Events
+    # -------------------------------------------------------------------------
+
+    def append(self, transaction: dict) -> bool:
+        """
+        Add a Plaid transaction; returns False if it is already outside the
+        window, or has no usable date to place it in the window by
+        """
+        ordinal = _ordinal(transaction.get("date"))
+        if ordinal is None or (self.as_of is not None and ordinal <= self.as_of - self.window_days):
+            return False
+
+        entry = (round(transaction["amount"] * 100), self.vocabulary.code(transaction.get("category", [])))
+        bucket = self._by_day.get(ordinal)
+        if bucket is None:
+            bucket = self._by_day[ordinal] = []
+            if not self._days or ordinal > self._days[-1]:
+                self._days.append(ordinal)
+            else:
+                self._days.insert(bisect_right(self._days, ordinal), ordinal)
+        bucket.append(entry)
+        self._count += 1
+        self._apply(entry, 1)
+
+        if self.as_of is None or ordinal > self.as_of:
+            self.advance_to(ordinal)
+        return True
+
+    def extend(self, transactions) -> int:
+        return sum(self.append(t) for t in transactions)
+
+    def advance_to(self, as_of) -> int:
+        """Move the window end forward and evict expired entries; returns how many"""
+        ordinal = as_of if isinstance(as_of, int) else _ordinal(as_of)
+        if ordinal is None:
+            raise ValueError(f"Not a date: {as_of!r}")
+        if self.as_of is not None and ordinal < self.as_of:
+            raise ValueError("Window cannot move backwards")
+        self.as_of = ordinal
+        cutoff = ordinal - self.window_days
+        evicted = 0
+        while self._days and self._days[0] <= cutoff:
+            for entry in self._by_day.pop(self._days.popleft()):
+                self._apply(entry, -1)
+                evicted += 1
+        self._count -= evicted
+        return evicted
+
+    def _apply(self, entry: tuple, sign: int):
+        cents, code = entry
+        if cents > 0:
+            self._totals[INFLOW] += sign * cents
+        elif cents < 0:
+            self._totals[OUTFLOW] += sign * cents
+        mask = self.vocabulary.mask(code)
+        while mask:
+            low = mask & -mask
+            self._totals[1 + low.bit_length()] += sign * cents
+            mask ^= low
+
+    # -------------------------------------------------------------------------
+    # Reads (O(1))
+    # -------------------------------------------------------------------------
+
+    @property
+    def inflows(self) -> float:
+        return self._totals[INFLOW] / 100
+
+    @property
+    def outflows(self) -> float:
+        return abs(self._totals[OUTFLOW]) / 100
+
+    def category_total(self, label: str) -> float:
+        return abs(self._totals[2 + self.vocabulary.labels.index(label)]) / 100
+
+    def cash_flow_metrics(self) -> dict:
+        """
+        Same fields as calculate_cash_flow_metrics, for the current window.
+        Totals are exact to the cent, so a derived figure can differ from the
+        float-summed batch path only on a rounding tie.
+        """
+        inflows = self.inflows
+        outflows = self.outflows
+        months = window_months(self.window_days)
+        monthly_inflow = inflows / months
+        monthly_outflow = outflows / months
+        monthly_net = monthly_inflow - monthly_outflow
+
+        return {
+            "total_inflows_90d": round(inflows, 2),
+            "total_outflows_90d": round(outflows, 2),
+            "monthly_avg_inflow": round(monthly_inflow, 2),
+            "monthly_avg_outflow": round(monthly_outflow, 2),
+            "monthly_net_cash_flow": round(monthly_net, 2),
+            "payroll_90d": round(self.category_total("Payroll"), 2),
+            "rent_90d": round(self.category_total("Rent"), 2),
+            "operating_margin": round((monthly_net / monthly_inflow * 100) if monthly_inflow > 0 else 0, 1)
+        }
+
+    def debt_metrics(self, app_data: dict, loan_amount: int) -> dict:
+        return calculate_debt_metrics(app_data, loan_amount, self.cash_flow_metrics())
+
+    def liquidity_metrics(self, app_data: dict, loan_amount: int) -> dict:
+        return calculate_liquidity_metrics(app_data, loan_amount, self.cash_flow_metrics())
@@ -0,0 +1,409 @@
+"""
+Declarative credit decision policy.
+
+A policy is plain data (a dict, or a JSON file with the same shape): the
+scored factors with their tiers, points, statuses and reason templates,
+override rules, and the score cutoffs that turn points into a decision.
+compile_policy() validates it once and turns every single-feature factor
+into an ascending cutoff array, so one application is bucketed with
+bisect and a whole book with np.searchsorted.
+
+DEFAULT_POLICY reproduces the original hard-coded agent_make_decision.
+
+    python decision_policy.py --dump > policy.json
+    DECISION_POLICY_PATH=policy.json streamlit run plaid_credit_agent.py
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import string
+import sys
+import threading
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+from cash_flow_series import SERIES_FIELDS
+
+# =============================================================================
+# LABELS
+# =============================================================================
+DECISION_LABELS = np.array(["APPROVED", "MANUAL_REVIEW", "DENIED"])
+FACTOR_STATUS_LABELS = np.array(["PASS", "MARGINAL", "FAIL"])
+
+DECISION_LABEL_LIST = DECISION_LABELS.tolist()
+
+PASS, MARGINAL, FAIL = 0, 1, 2
+APPROVED, MANUAL_REVIEW, DENIED = 0, 1, 2
+
+# =============================================================================
+# DEFAULT POLICY
+# =============================================================================
+# Tiers are listed strictest first; a tier applies when every feature in its
+# "min" is >= the threshold, and the last tier (no "min") is the fallback.
+# Reason templates are str.format()ed with the decision features.
+DEFAULT_POLICY = {
+    "version": "credit-policy-v1",
+    "max_score": 100,
+    "factors": [
+        {"name": "Signal Score", "tiers": [
+            {"min": {"signal_score": 80}, "points": 25, "status": "PASS", "reason": "{signal_score}/100 - Low ACH return risk"},
+            {"min": {"signal_score": 60}, "points": 15, "status": "MARGINAL", "reason": "{signal_score}/100 - Moderate ACH risk"},
+            {"points": 5, "status": "FAIL", "reason": "{signal_score}/100 - High ACH return risk"},
+        ]},
+        {"name": "Trust Index", "tiers": [
+            {"min": {"trust_index": 0.90}, "points": 20, "status": "PASS", "reason": "{trust_index:.2f} - High network trust"},
+            {"min": {"trust_index": 0.75}, "points": 12, "status": "MARGINAL", "reason": "{trust_index:.2f} - Moderate network trust"},
+            {"points": 0, "status": "FAIL", "reason": "{trust_index:.2f} - Low network trust"},
+        ]},
+        {"name": "Beacon Fraud", "tiers": [
+            {"min": {"fraud_detected": 1}, "points": 0, "status": "FAIL", "reason": "Fraud detected: {fraud_signals}"},
+            {"points": 15, "status": "PASS", "reason": "No fraud signals in consortium network"},
+        ]},
+        {"name": "DSCR", "tiers": [
+            {"min": {"dscr": 1.5}, "points": 20, "status": "PASS", "reason": "{dscr}x - Strong debt service coverage"},
+            {"min": {"dscr": 1.2}, "points": 12, "status": "MARGINAL", "reason": "{dscr}x - Adequate debt service coverage"},
+            {"min": {"dscr": 1.0}, "points": 6, "status": "MARGINAL", "reason": "{dscr}x - Minimal debt service coverage"},
+            {"points": 0, "status": "FAIL", "reason": "{dscr}x - Insufficient debt service coverage"},
+        ]},
+        {"name": "Liquidity", "tiers": [
+            {"min": {"runway_months": 6}, "points": 10, "status": "PASS", "reason": "{runway_months} months runway"},
+            {"min": {"runway_months": 3}, "points": 5, "status": "MARGINAL", "reason": "{runway_months} months runway"},
+            {"points": 0, "status": "FAIL", "reason": "{runway_months} months runway - Low cash buffer"},
+        ]},
+        {"name": "Income Verification", "tiers": [
+            {"min": {"income_stability_high": 1, "months_of_history": 12}, "points": 10, "status": "PASS",
+             "reason": "Verified ${verified_income:,}/mo - High stability"},
+            {"min": {"months_of_history": 6}, "points": 5, "status": "MARGINAL",
+             "reason": "Verified ${verified_income:,}/mo - Limited history"},
+            {"points": 0, "status": "FAIL", "reason": "Insufficient income history ({months_of_history} months)"},
+        ]},
+    ],
+    # Checked in order before the score; the first match decides
+    "overrides": [
+        {"min": {"fraud_detected": 1}, "decision": "DENIED", "reason": "Fraud signals detected in Beacon network"},
+    ],
+    # Strictest first; the last entry (no min_score) is the fallback
+    "score_cutoffs": [
+        {"min_score": 75, "decision": "APPROVED", "reason": "Strong credit profile (Score: {score}/{max_score})"},
+        {"min_score": 55, "decision": "MANUAL_REVIEW", "reason": "Marginal credit profile requires human review (Score: {score}/{max_score})"},
+        {"decision": "DENIED", "reason": "Credit profile does not meet underwriting criteria (Score: {score}/{max_score})"},
+    ],
+}
+
+
+# Fields decision_features() provides; policies may only test or quote these.
+# Some can be quoted in reasons but not compared against a threshold.
+FEATURE_NAMES = (
+    "signal_score", "trust_index", "fraud_detected", "fraud_signals", "dscr", "runway_months",
+    "income_stability_high", "months_of_history", "verified_income",
+    *SERIES_FIELDS,
+)
+QUOTE_ONLY_FEATURES = ("fraud_signals", "lowest_balance_month")
+
+
+def decision_features(app_data: dict, plaid_signals: dict, metrics: dict) -> dict:
+    """Everything a policy can test or quote, from agent_make_decision's inputs"""
+    income = app_data["bank_income"]
+    return {
+        "signal_score": plaid_signals["signal"]["signal_score"],
+        "trust_index": plaid_signals["trust"]["trust_index"],
+        "fraud_detected": plaid_signals["beacon"]["fraud_detected"],
+        "fraud_signals": plaid_signals["beacon"]["fraud_signals"],
+        "dscr": metrics["debt"]["dscr"],
+        "runway_months": metrics["liquidity"]["runway_months"],
+        "income_stability_high": income["income_stability"] == "HIGH",
+        "months_of_history": income["months_of_history"],
+        "verified_income": income["verified_income"],
+        # Whole-history monthly statistics, when computed (cash_flow_series.py)
+        **metrics.get("cash_flow_series", {}),
+    }
+
+
+# =============================================================================
+# COMPILER
+# =============================================================================
+
+class PolicyError(ValueError):
+    pass
+
+
+def _check_conditions(condition: dict, where: str):
+    for feature in condition:
+        if feature not in FEATURE_NAMES or feature in QUOTE_ONLY_FEATURES:
+            raise PolicyError(f"{where} tests unknown numeric feature {feature!r}")
+
+
+def _template_fields(template: str, where: str, known: tuple) -> set:
+    """Fields a reason template quotes; each must be one of `known`"""
+    try:
+        names = [name for _, name, _, _ in string.Formatter().parse(template) if name is not None]
+    except (TypeError, ValueError) as exc:
+        raise PolicyError(f"{where} has a malformed reason template {template!r}: {exc}") from exc
+    fields = {re.split(r"[.\[]", name, maxsplit=1)[0] for name in names}
+    if any(not field or field.isdigit() for field in fields):
+        raise PolicyError(f"{where} reason {template!r} has a positional field; name the feature")
+    unknown = sorted(fields - set(known))
+    if unknown:
+        raise PolicyError(f"{where} reason {template!r} quotes unknown field(s) {', '.join(unknown)}")
+    return fields
+
+
+def _lookup_label(labels: np.ndarray, value: str, what: str) -> int:
+    matches = np.nonzero(labels == value)[0]
+    if not len(matches):
+        raise PolicyError(f"Unknown {what} {value!r}; expected one of {labels.tolist()}")
+    return int(matches[0])
+
+
+class CompiledFactor:
+    """One factor as arrays: tier i applies when all of its minimums hold"""
+
+    def __init__(self, spec: dict):
+        self.name = spec["name"]
+        tiers = spec["tiers"]
+        if not tiers or "min" in tiers[-1]:
+            raise PolicyError(f"Factor {self.name!r} needs a fallback tier without 'min'")
+        if any("min" not in tier or not tier["min"] for tier in tiers[:-1]):
+            raise PolicyError(f"Only the last tier of {self.name!r} may omit 'min'")
+        for tier in tiers[:-1]:
+            _check_conditions(tier["min"], f"Factor {self.name!r}")
+        self.reason_fields = set().union(*(
+            _template_fields(tier["reason"], f"Factor {self.name!r}", FEATURE_NAMES) for tier in tiers
+        ))
+
+        self.points = np.array([tier["points"] for tier in tiers], dtype=np.int64)
+        self.status = np.array([_lookup_label(FACTOR_STATUS_LABELS, tier["status"], "status") for tier in tiers], dtype=np.int8)
+        self.reasons = [tier["reason"] for tier in tiers]
+        # Plain-Python copies for the per-application path
+        self.tier_results = [(tier["points"], tier["status"]) for tier in tiers]
+        self.conditions = [tuple(tier["min"].items()) for tier in tiers[:-1]]
+
+        features = {feature for condition in self.conditions for feature, _ in condition}
+        # Single-feature factors with strictly descending cutoffs bucket by binary search
+        self.feature = None
+        if len(features) == 1 and all(len(c) == 1 for c in self.conditions):
+            cutoffs = [float(c[0][1]) for c in self.conditions]
+            if all(a > b for a, b in zip(cutoffs, cutoffs[1:])):
+                self.feature = features.pop()
+                self.cutoffs = cutoffs[::-1]  # ascending for bisect / searchsorted
+                self.cutoff_array = np.array(self.cutoffs)
+        self.features = tuple(sorted({f for condition in self.conditions for f, _ in condition}))
+        # Identical factors in different policies share evaluated results
+        self.signature = (tuple(self.conditions), tuple(self.points.tolist()), tuple(self.status.tolist()))
+
+    def tier(self, features: dict) -> int:
+        if self.feature is not None:
+            value = features[self.feature]
+            if value != value:  # NaN fails every >= test
+                return len(self.points) - 1
+            return len(self.cutoffs) - bisect_right(self.cutoffs, value)
+        for i, condition in enumerate(self.conditions):
+            if all(features[feature] >= threshold for feature, threshold in condition):
+                return i
+        return len(self.points) - 1
+
+    def tiers(self, columns: dict) -> np.ndarray:
+        if self.feature is not None:
+            values = np.asarray(columns[self.feature], dtype=np.float64)
+            tier = len(self.cutoffs) - np.searchsorted(self.cutoff_array, values, side="right")
+            tier[np.isnan(values)] = len(self.points) - 1
+            return tier
+        masks = [_all_at_least(columns, condition) for condition in self.conditions]
+        n = len(next(iter(columns.values())))
+        masks.append(np.ones(n, dtype=bool))
+        return np.argmax(np.vstack(masks), axis=0)
+
+
+def _all_at_least(columns: dict, condition: tuple) -> np.ndarray:
+    mask = None
+    for feature, threshold in condition:
+        hit = np.asarray(columns[feature], dtype=np.float64) >= threshold
+        mask = hit if mask is None else mask & hit
+    return mask
+
+
+class CompiledPolicy:
+    """
+    A validated policy. decide() evaluates one application's features;
+    evaluate() evaluates feature columns for a whole book.
+    """
+
+    def __init__(self, spec: dict):
+        self.spec = copy.deepcopy(spec)
+        self.version = spec.get("version", "unversioned")
+        self.max_score = spec.get("max_score", 100)
+        self.factors = [CompiledFactor(factor) for factor in spec["factors"]]
+        self.factor_names = tuple(f.name for f in self.factors)
+
+        self.overrides = [
+            (tuple(rule["min"].items()), _lookup_label(DECISION_LABELS, rule["decision"], "decision"), rule["reason"])
+            for rule in spec.get("overrides", [])
+        ]
+        if any(not condition for condition, _, _ in self.overrides):
+            raise PolicyError("Every override needs a non-empty 'min'")
+        for condition, _, _ in self.overrides:
+            _check_conditions(dict(condition), "An override")
+        cutoffs = spec["score_cutoffs"]
+        if not cutoffs or "min_score" in cutoffs[-1]:
+            raise PolicyError("score_cutoffs needs a fallback entry without 'min_score'")
+        self.score_cutoffs = [
+            (rule.get("min_score"), _lookup_label(DECISION_LABELS, rule["decision"], "decision"), rule["reason"])
+            for rule in cutoffs
+        ]
+        self.features = tuple(sorted(
+            {f for factor in self.factors for f in factor.features}
+            | {f for condition, _, _ in self.overrides for f, _ in condition}
+        ))
+        # Features decide() quotes in reasons, which must be computed even if nothing tests them
+        outcome_fields = FEATURE_NAMES + ("score", "max_score")
+        quoted = set().union(
+            *(factor.reason_fields for factor in self.factors),
+            *(_template_fields(reason, "An override or score cutoff", outcome_fields)
+              for _, _, reason in self.overrides + self.score_cutoffs),
+        )
+        self.reason_fields = tuple(sorted(quoted - {"score", "max_score"}))
+
+    def decide(self, features: dict) -> dict:
+        """Decision, reason, score, max_score and explainable factors for one application"""
+        score = 0
+        factors = []
+        for factor in self.factors:
+            tier = factor.tier(features)
+            points, status = factor.tier_results[tier]
+            score += points
+            factors.append((factor.name, status, factor.reasons[tier].format_map(features)))
+
+        fields = {**features, "score": score, "max_score": self.max_score}
+        for condition, decision, reason in self.overrides:
+            if all(features[feature] >= threshold for feature, threshold in condition):
+                break
+        else:
+            for min_score, decision, reason in self.score_cutoffs:
+                if min_score is None or score >= min_score:
+                    break
+        return {
+            "decision": DECISION_LABEL_LIST[decision],
+            "reason": reason.format_map(fields),
+            "score": score,
+            "max_score": self.max_score,
+            "factors": factors,
+        }
+
+    def evaluate(self, columns: dict, cache: dict = None) -> dict:
+        """
+        Vectorized decide(): score, decision codes and per-factor points/status
+        arrays. Policies evaluated over the same columns can pass one `cache`
+        dict so factors and overrides they have in common are computed once.
+        """
+        cache = {} if cache is None else cache
+        factor_points, factor_status = {}, {}
+        for factor in self.factors:
+            if factor.signature not in cache:
+                tier = factor.tiers(columns)
+                cache[factor.signature] = (factor.points[tier], factor.status[tier])
+            factor_points[factor.name], factor_status[factor.name] = cache[factor.signature]
+        score = sum(factor_points.values())
+
+        conditions = []
+        for condition, _, _ in self.overrides:
+            if condition not in cache:
+                cache[condition] = _all_at_least(columns, condition)
+            conditions.append(cache[condition])
+        choices = [decision for _, decision, _ in self.overrides]
+        for min_score, decision, _ in self.score_cutoffs[:-1]:
+            conditions.append(score >= min_score)
+            choices.append(decision)
+        decision = np.select(conditions, choices, self.score_cutoffs[-1][1]).astype(np.int8)
+
+        return {
+            "score": score,
+            "decision_code": decision,
+            "decision": DECISION_LABELS[decision],
+            "factor_points": factor_points,
+            "factor_status": {name: FACTOR_STATUS_LABELS[status] for name, status in factor_status.items()},
+            "factor_status_code": factor_status,
+        }
+
+
+def compile_policy(spec: dict) -> CompiledPolicy:
+    if not isinstance(spec, dict):
+        raise PolicyError(f"A policy must be a JSON object, not {type(spec).__name__}")
+    try:
+        return CompiledPolicy(spec)
+    except (AttributeError, KeyError, TypeError) as exc:
+        raise PolicyError(f"Malformed policy: {type(exc).__name__}: {exc}") from exc
+
+
+# =============================================================================
+# HOT RELOAD
+# =============================================================================
+
+class PolicyStore:
+    """
+    The active policy, reloaded from `path` when the file changes.
+    The file's mtime is checked at most every `check_interval` seconds. A
+    policy that fails to load or compile is reported in `last_error` and
+    the previous policy stays active.
+    """
+
+    def __init__(self, path: str = None, check_interval: float = 1.0, default: dict = DEFAULT_POLICY):
+        self.path = path
+        self.check_interval = check_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._policy = compile_policy(default)
+        self._mtime = None
+        self._next_check = 0.0
+        if path:
+            self._reload()
+
+    def current(self) -> CompiledPolicy:
+        if self.path and time.monotonic() >= self._next_check:
+            self._reload()
+        return self._policy
+
+    def load(self, spec: dict) -> CompiledPolicy:
+        """Activate a policy given as a dict"""
+        self._policy = compile_policy(spec)
+        return self._policy
+
+    def _reload(self):
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return
+                with open(self.path, encoding="utf-8") as f:
+                    self._policy = compile_policy(json.load(f))
+                self._mtime = mtime
+                self.last_error = None
+            except (OSError, ValueError) as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+
+
+# Process-wide active policy; point DECISION_POLICY_PATH at a JSON policy file to override
+DECISION_POLICY = PolicyStore(os.environ.get("DECISION_POLICY_PATH"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dump or validate a decision policy")
+    parser.add_argument("--dump", action="store_true", help="print DEFAULT_POLICY as JSON")
+    parser.add_argument("--check", metavar="PATH", help="compile a policy file and report errors")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            policy = compile_policy(json.load(f))
+        print(f"{policy.version}: {len(policy.factors)} factors, features {', '.join(policy.features)}")
+    else:
+        json.dump(DEFAULT_POLICY, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
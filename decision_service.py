@@ -0,0 +1,359 @@
+"""
+Headless HTTP decision service.
+
+Exposes the decision engine over JSON/HTTP for a loan-origination system.
+Requests are parsed on the server's connection threads (HTTP/1.1
+keep-alive) and scored on a configurable thread or process worker pool.
+
+    python decision_service.py --port 8080 --workers 4 --pool process --audit-log audit_log/
+
+Endpoints (POST bodies are {"application_id": ..., "application": {...}};
+"application" may be omitted for the demo LOAN_APPLICATIONS ids):
+
+    POST /v1/identity          Plaid Identity + Layer verification
+    POST /v1/metrics           cash flow, debt and liquidity metrics
+    POST /v1/risk              Signal, Beacon and Trust Index
+    POST /v1/decision          full pipeline: decision + audit record
+    POST /v1/decisions/batch   {"applications": [...]} decided in worker-sized chunks
+    POST /v1/plaid/invalidate  {"item_id": ...} drop cached Plaid responses for an item
+    GET  /healthz              liveness and pool configuration
+    GET  /metrics/latency      per-endpoint request count and latency percentiles
+    GET  /metrics/stages       pipeline stage and Plaid call timings (JSON)
+    GET  /metrics/cache        Plaid response cache counters (this process)
+    GET  /metrics              the same timings in Prometheus text format
+
+With a process pool, Plaid call timings stay in the worker processes; stage
+timings are still reported because the server re-observes them from each
+decision's audit record. Set PLAID_CACHE_PATH so the worker processes share
+one on-disk Plaid response cache and see invalidations.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from audit_log import AuditLog
+from credit_engine import (
+    LOAN_APPLICATIONS,
+    MetricsContext,
+    plaid_beacon_check,
+    plaid_identity_verify,
+    plaid_signal_score,
+    plaid_trust_index,
+    run_decision_pipeline,
+)
+from response_cache import PLAID_RESPONSE_CACHE
+from stage_metrics import STAGE_METRICS
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+LATENCY_WINDOW = 4096
+
+# =============================================================================
+# WORKER FUNCTIONS (top level so a process pool can pickle them)
+# =============================================================================
+
+def _identity(application_id: str, app_data: dict) -> dict:
+    return PLAID_RESPONSE_CACHE.get_or_fetch("identity", app_data, plaid_identity_verify)
+
+
+def _metrics(application_id: str, app_data: dict) -> dict:
+    metrics_ctx = MetricsContext(app_data)
+    loan_amount = app_data["loan_amount"]
+    return {
+        "cash_flow": metrics_ctx.cash_flow(),
+        "debt": metrics_ctx.debt(loan_amount),
+        "liquidity": metrics_ctx.liquidity(loan_amount),
+    }
+
+
+def _risk(application_id: str, app_data: dict) -> dict:
+    return {
+        "signal": plaid_signal_score(app_data),
+        "beacon": plaid_beacon_check(app_data),
+        "trust": plaid_trust_index(app_data),
+    }
+
+
+def _decision(application_id: str, app_data: dict) -> dict:
+    result = run_decision_pipeline(application_id, app_data, MetricsContext(app_data))
+    return {"application_id": application_id, "decision": result["decision"], "audit": result["audit"]}
+
+
+def _decision_chunk(items: list) -> list:
+    """Decide a chunk of (application_id, app_data) pairs in one worker task"""
+    results = []
+    for application_id, app_data in items:
+        try:
+            results.append(_decision(application_id, app_data))
+        except (KeyError, TypeError, ValueError) as exc:
+            results.append({"application_id": application_id, "error": f"{type(exc).__name__}: {exc}"})
+    return results
+
+
+HANDLERS = {
+    "/v1/identity": _identity,
+    "/v1/metrics": _metrics,
+    "/v1/risk": _risk,
+    "/v1/decision": _decision,
+}
+
+
+# =============================================================================
+# LATENCY TRACKING
+# =============================================================================
+
+class LatencyTracker:
+    """Request counts plus a sliding window of latencies per endpoint"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counts = {}
+        self._errors = {}
+
+    def observe(self, endpoint: str, seconds: float, ok: bool = True):
+        with self._lock:
+            if endpoint not in self._samples:
+                self._samples[endpoint] = deque(maxlen=self.window)
+                self._counts[endpoint] = 0
+                self._errors[endpoint] = 0
+            self._samples[endpoint].append(seconds)
+            self._counts[endpoint] += 1
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = {endpoint: sorted(values) for endpoint, values in self._samples.items()}
+            counts = dict(self._counts)
+            errors = dict(self._errors)
+
+        def pct(values, q):
+            return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 3)
+
+        return {
+            endpoint: {
+                "count": counts[endpoint],
+                "errors": errors[endpoint],
+                "p50_ms": pct(values, 0.50),
+                "p95_ms": pct(values, 0.95),
+                "p99_ms": pct(values, 0.99),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+            }
+            for endpoint, values in samples.items()
+        }
+
+
+# =============================================================================
+# HTTP SERVER
+# =============================================================================
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    # numpy scalars and anything else json can't encode natively
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _resolve_application(body: dict) -> tuple:
+    application_id = body.get("application_id")
+    app_data = body.get("application")
+    if app_data is None:
+        if application_id not in LOAN_APPLICATIONS:
+            raise RequestError(400, "Provide 'application' or a known 'application_id'")
+        app_data = LOAN_APPLICATIONS[application_id]
+    return application_id or "UNSPECIFIED", app_data
+
+
+class DecisionService(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers: int = None, pool: str = "thread", batch_chunk: int = 64,
+                 audit_log: AuditLog = None):
+        super().__init__(address, DecisionRequestHandler)
+        self.workers = workers or os.cpu_count() or 1
+        self.pool_kind = pool
+        self.batch_chunk = batch_chunk
+        executor = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+        self.pool = executor(max_workers=self.workers)
+        self.latency = LatencyTracker()
+        self.audit_log = audit_log
+        self.started = time.time()
+
+    def record_decisions(self, results: list):
+        """
+        Persist audit records before the response goes out (the server is
+        the log's single writer; concurrent requests share one fsync) and,
+        since process workers have their own STAGE_METRICS, fold their stage
+        timings into ours.
+        """
+        fold_timings = self.pool_kind == "process" and STAGE_METRICS.enabled
+        last_sequence = None
+        for result in results:
+            audit = result.get("audit")
+            if audit is None:
+                continue
+            if self.audit_log is not None:
+                last_sequence = self.audit_log.append(audit)
+            if fold_timings:
+                for stage, ms in audit.get("stage_timings_ms", {}).items():
+                    STAGE_METRICS.observe("stage", stage, round(ms * 1e6))
+        if last_sequence is not None:
+            self.audit_log.wait_durable(last_sequence)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        if self.audit_log is not None:
+            self.audit_log.close()
+
+    def decide_batch(self, items: list) -> list:
+        chunks = [items[i:i + self.batch_chunk] for i in range(0, len(items), self.batch_chunk)]
+        results = []
+        for chunk_result in self.pool.map(_decision_chunk, chunks):
+            results.extend(chunk_result)
+        self.record_decisions(results)
+        return results
+
+
+class DecisionRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: connections are reused across requests
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    server_version = "CreditDecisionService/1.0"
+
+    def log_message(self, format, *args):
+        # Per-request logging is too expensive at service QPS; latency is tracked instead
+        pass
+
+    def _send(self, status: int, payload, content_type: str = "application/json"):
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"Body exceeds {MAX_BODY_BYTES} bytes")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as exc:
+            raise RequestError(400, f"Invalid JSON: {exc}")
+        if not isinstance(body, dict):
+            raise RequestError(400, "Body must be a JSON object")
+        return body
+
+    def _timed(self, endpoint: str, handler):
+        started = time.perf_counter()
+        ok = False
+        try:
+            status, payload = handler()
+            ok = status < 400
+        except RequestError as exc:
+            status, payload = exc.status, {"error": str(exc)}
+        except (KeyError, TypeError, ValueError) as exc:
+            status, payload = 400, {"error": f"{type(exc).__name__}: {exc}"}
+        except Exception as exc:
+            # e.g. a worker process died (BrokenProcessPool); report it rather than drop the connection
+            traceback.print_exc(file=sys.stderr)
+            status, payload = 500, {"error": f"Internal error: {type(exc).__name__}"}
+        self._send(status, payload)
+        self.server.latency.observe(endpoint, time.perf_counter() - started, ok)
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._timed(self.path, lambda: (200, {
+                "status": "ok",
+                "uptime_s": round(time.time() - self.server.started, 1),
+                "pool": self.server.pool_kind,
+                "workers": self.server.workers,
+            }))
+        elif self.path == "/metrics/latency":
+            self._send(200, self.server.latency.snapshot())
+        elif self.path == "/metrics/stages":
+            self._send(200, STAGE_METRICS.snapshot())
+        elif self.path == "/metrics/cache":
+            self._send(200, PLAID_RESPONSE_CACHE.stats())
+        elif self.path == "/metrics":
+            self._send(200, STAGE_METRICS.prometheus_text(), "text/plain; version=0.0.4")
+        else:
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        if self.path == "/v1/decisions/batch":
+            self._timed(self.path, self._handle_batch)
+        elif self.path == "/v1/plaid/invalidate":
+            self._timed(self.path, self._handle_invalidate)
+        elif self.path in HANDLERS:
+            self._timed(self.path, self._handle_single)
+        else:
+            # Drain the body so the keep-alive connection stays usable
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def _handle_single(self):
+        application_id, app_data = _resolve_application(self._read_json())
+        result = self.server.pool.submit(HANDLERS[self.path], application_id, app_data).result()
+        if self.path == "/v1/decision":
+            self.server.record_decisions([result])
+        return 200, result
+
+    def _handle_invalidate(self):
+        item_id = self._read_json().get("item_id")
+        if not isinstance(item_id, str) or not item_id:
+            raise RequestError(400, "'item_id' must be a non-empty string")
+        if self.server.pool_kind == "process" and not PLAID_RESPONSE_CACHE.path:
+            # Each worker process has its own memory tier, which only the shared disk tier can reach
+            raise RequestError(409, "Invalidation needs PLAID_CACHE_PATH when workers are processes")
+        return 200, {"item_id": item_id, "removed": PLAID_RESPONSE_CACHE.invalidate(item_id)}
+
+    def _handle_batch(self):
+        body = self._read_json()
+        applications = body.get("applications")
+        if not isinstance(applications, list):
+            raise RequestError(400, "'applications' must be a list")
+        items = [_resolve_application(entry) for entry in applications]
+        return 200, {"results": self.server.decide_batch(items)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve credit decisions over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="worker pool size (default: CPU count)")
+    parser.add_argument("--pool", choices=("thread", "process"), default="thread")
+    parser.add_argument("--batch-chunk", type=int, default=64, help="applications per worker task in batch requests")
+    parser.add_argument("--audit-log", help="directory of the durable append-only audit log")
+    args = parser.parse_args(argv)
+
+    audit_log = AuditLog(args.audit_log) if args.audit_log else None
+    server = DecisionService((args.host, args.port), args.workers, args.pool, args.batch_chunk, audit_log)
+    print(f"Decision service on http://{args.host}:{args.port} ({args.pool} pool x {server.workers})", file=sys.stderr)
+    # Orchestrators stop us with SIGTERM; exit through server_close so pool workers are reaped
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Versioned on-disk store of per-application decision features.
+
+Features (Signal score, Trust Index, Beacon fraud flag, cash-flow, debt and
+liquidity metrics, income fields) are stored as .npy column files. Each
+entry is keyed by application ID and the content hash of the application
+payload. The store is namespaced by FEATURE_VERSION, so changing the feature
+code never serves stale values. Re-scoring memory-maps the stored columns
+and only flattens and computes features for new or changed applications.
+
+    python feature_store.py feature_store/ --stats
+    python feature_store.py feature_store/ --compact --prune
+"""
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+
+from metrics_cache import application_fingerprint
+from portfolio_scoring import FEATURE_VERSION, applications_to_columns, batch_decision_features
+
+# =============================================================================
+# STORAGE LAYOUT
+# =============================================================================
+# <directory>/<feature version>/MANIFEST.json lists the live parts in write
+# order. Each part-NNNNNNNN/ directory holds one .npy file per feature plus
+# the application IDs and content hashes of its rows. A later part supersedes
+# earlier rows for the same application. Parts are written under a .tmp name
+# and renamed into place before the manifest references them.
+MANIFEST_FILE = "MANIFEST.json"
+PART_PREFIX = "part-"
+KEY_COLUMNS = ("application_id", "fingerprint")
+DEFAULT_MAX_PARTS = 16
+
+
+def _part_name(number: int) -> str:
+    return f"{PART_PREFIX}{number:08d}"
+
+
+class FeatureStore:
+    """
+    Persistent feature vectors for one feature version.
+    Arrays returned by gather()/load() may be read-only memory maps. Only one
+    process may write to a store directory at a time; other processes open
+    it with read_only=True, which never creates or deletes files.
+    """
+
+    def __init__(self, directory: str, version: str = FEATURE_VERSION, max_parts: int = DEFAULT_MAX_PARTS,
+                 read_only: bool = False):
+        self.root = directory
+        self.version = version
+        self.directory = os.path.join(directory, version)
+        self.max_parts = max_parts
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        self.manifest = {"version": version, "next_part": 1, "parts": [], "columns": {}}
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        if not read_only:
+            self._remove_orphans()
+        self._open_parts()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, application_id) -> bool:
+        return application_id in self._rows
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+
+    def _remove_orphans(self):
+        """Delete parts left behind by an interrupted put() or compact()"""
+        live = set(self.manifest["parts"])
+        for name in os.listdir(self.directory):
+            if name.startswith(PART_PREFIX) and name not in live:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _open_parts(self):
+        self._parts = []  # one {column: memmap} per part
+        self._offsets = [0]  # global row number of each part's first row
+        self._rows = {}  # application_id -> (global row, fingerprint)
+        for name in self.manifest["parts"]:
+            self._open_part(name)
+
+    def _open_part(self, name: str):
+        path = os.path.join(self.directory, name)
+        part = {
+            column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+            for column in (*KEY_COLUMNS, *self.manifest["columns"])
+        }
+        base = self._offsets[-1]
+        for row, (application_id, fingerprint) in enumerate(
+                zip(part["application_id"].tolist(), part["fingerprint"].tolist())):
+            self._rows[application_id] = (base + row, fingerprint)
+        self._parts.append(part)
+        self._offsets.append(base + len(part["application_id"]))
+
+    def _save_manifest(self):
+        tmp = os.path.join(self.directory, MANIFEST_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, os.path.join(self.directory, MANIFEST_FILE))
+
+    def _write_part(self, columns: dict) -> str:
+        name = _part_name(self.manifest["next_part"])
+        self.manifest["next_part"] += 1
+        tmp = os.path.join(self.directory, name + ".tmp")
+        os.makedirs(tmp, exist_ok=True)
+        for column, values in columns.items():
+            np.save(os.path.join(tmp, f"{column}.npy"), values)
+        os.replace(tmp, os.path.join(self.directory, name))
+        return name
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+
+    def lookup(self, application_ids, fingerprints) -> np.ndarray:
+        """Stored row of each application, or -1 when missing or its content changed"""
+        rows = np.full(len(application_ids), -1, dtype=np.int64)
+        for i, (application_id, fingerprint) in enumerate(zip(application_ids, fingerprints)):
+            entry = self._rows.get(application_id)
+            if entry is not None and entry[1] == fingerprint:
+                rows[i] = entry[0]
+        hits = int((rows >= 0).sum())
+        self.hits += hits
+        self.misses += len(rows) - hits
+        return rows
+
+    def gather(self, rows) -> dict:
+        """Feature columns for stored rows (from lookup); a contiguous run is returned zero-copy"""
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = self.manifest["columns"]
+        if not len(rows):
+            return {column: np.empty(0, dtype=dtype) for column, dtype in columns.items()}
+
+        parts = np.searchsorted(self._offsets, rows, side="right") - 1
+        first, last = int(rows[0]), int(rows[-1])
+        if parts[0] == parts[-1] and last - first == len(rows) - 1 and np.all(np.diff(rows) == 1):
+            part, start = self._parts[parts[0]], first - self._offsets[parts[0]]
+            return {column: part[column][start:start + len(rows)] for column in columns}
+
+        result = {column: np.empty(len(rows), dtype=dtype) for column, dtype in columns.items()}
+        for p in np.unique(parts):
+            selected = parts == p
+            local = rows[selected] - self._offsets[p]
+            for column in columns:
+                result[column][selected] = self._parts[p][column][local]
+        return result
+
+    def load(self) -> tuple:
+        """(application_ids, features) for every live entry, zero-copy after compact()"""
+        if len(self._parts) == 1 and len(self._rows) == self._offsets[-1]:
+            part = self._parts[0]
+            return part["application_id"], {column: part[column] for column in self.manifest["columns"]}
+        application_ids = list(self._rows)
+        return np.asarray(application_ids), self.gather([self._rows[a][0] for a in application_ids])
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+
+    def put(self, application_ids, fingerprints, features: dict):
+        """Persist feature rows; they supersede stored rows for the same applications"""
+        if not len(application_ids):
+            return
+        if self.read_only:
+            raise ValueError(f"Feature store {self.directory} is open read-only")
+        columns = {column: np.asarray(values) for column, values in features.items()}
+        schema = {column: values.dtype.str for column, values in columns.items()}
+        if any(values.dtype == object for values in columns.values()):
+            raise ValueError("Feature columns must have a fixed-width dtype to be stored")
+        if self.manifest["columns"] and schema != self.manifest["columns"]:
+            raise ValueError(f"Feature columns changed without a version bump (store has {self.version})")
+        self.manifest["columns"] = schema
+
+        name = self._write_part({
+            "application_id": np.asarray(application_ids, dtype=str),
+            "fingerprint": np.asarray(fingerprints, dtype="S"),
+            **columns,
+        })
+        self.manifest["parts"].append(name)
+        self._save_manifest()
+        self._open_part(name)
+        if len(self.manifest["parts"]) > self.max_parts:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the live rows into a single part and delete the old parts"""
+        if self.read_only:
+            raise ValueError(f"Feature store {self.directory} is open read-only")
+        if len(self.manifest["parts"]) <= 1 and len(self._rows) == self._offsets[-1]:
+            return
+        application_ids = list(self._rows)
+        rows = [self._rows[a][0] for a in application_ids]
+        columns = {column: np.array(values) for column, values in self.gather(rows).items()}
+        old_parts = self.manifest["parts"]
+        name = self._write_part({
+            "application_id": np.asarray(application_ids, dtype=str),
+            "fingerprint": np.asarray([self._rows[a][1] for a in application_ids], dtype="S"),
+            **columns,
+        })
+        self.manifest["parts"] = [name]
+        self._save_manifest()
+        self._open_parts()
+        for old in old_parts:
+            shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+
+    def prune_versions(self) -> list:
+        """Delete stores written by other feature versions; returns their names"""
+        removed = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name != self.version and os.path.exists(os.path.join(path, MANIFEST_FILE)):
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(name)
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "applications": len(self._rows),
+            "stored_rows": self._offsets[-1],
+            "parts": len(self._parts),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# =============================================================================
+# CACHED FEATURE COMPUTATION
+# =============================================================================
+
+def application_features(applications: dict, store: FeatureStore = None, fingerprints=None) -> dict:
+    """
+    batch_decision_features for a mapping of application_id -> app_data, in
+    the mapping's order. With a store, unchanged applications are loaded from
+    disk; only new or changed ones are flattened, computed and persisted.
+    Hashing a payload costs about as much as computing its features in bulk,
+    so pass `fingerprints` (one content hash per application, e.g. from the
+    ingestion layer) when they are already known.
+    """
+    if store is None:
+        return batch_decision_features(applications_to_columns(applications))
+
+    application_ids = list(applications)
+    if fingerprints is None:
+        fingerprints = [application_fingerprint(applications[a]) for a in application_ids]
+    fingerprints = [f.encode() if isinstance(f, str) else f for f in fingerprints]
+    rows = store.lookup(application_ids, fingerprints)
+    missing = np.flatnonzero(rows < 0)
+    if not len(missing):
+        return store.gather(rows)
+
+    computed = batch_decision_features(applications_to_columns(
+        {application_ids[i]: applications[application_ids[i]] for i in missing}
+    ))
+    store.put([application_ids[i] for i in missing], [fingerprints[i] for i in missing], computed)
+    if len(missing) == len(rows):
+        return computed
+
+    hit = np.flatnonzero(rows >= 0)
+    stored = store.gather(rows[hit])
+    features = {}
+    for column, values in computed.items():
+        features[column] = np.empty(len(rows), dtype=values.dtype)
+        features[column][missing] = values
+        features[column][hit] = stored[column]
+    return features
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and maintain the application feature store")
+    parser.add_argument("directory")
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--compact", action="store_true", help="merge all parts into one")
+    parser.add_argument("--prune", action="store_true", help="delete stores of other feature versions")
+    args = parser.parse_args(argv)
+
+    store = FeatureStore(args.directory)
+    if args.compact:
+        store.compact()
+    if args.prune:
+        for name in store.prune_versions():
+            print(f"removed {name}")
+    if args.stats or not (args.compact or args.prune):
+        print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
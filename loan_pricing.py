@@ -0,0 +1,122 @@
+from functools import lru_cache
+
+import numpy as np
+
+# =============================================================================
+# LOAN PRICING GRID
+# =============================================================================
+# Default structure used for the headline decision (5-year term, 10% APR)
+LOAN_APR = 0.10
+LOAN_TERM_MONTHS = 60
+
+OFFER_TERMS_MONTHS = (12, 24, 36, 48, 60, 72, 84)
+
+# APR ladder offered per Plaid Signal risk tier
+RISK_TIER_APRS = {
+    "LOW": (0.08, 0.10, 0.12),
+    "MEDIUM": (0.12, 0.15, 0.18),
+    "HIGH": (0.18, 0.22, 0.26),
+}
+
+# Fractions of the requested amount to price as counter-offers
+OFFER_AMOUNT_FRACTIONS = (1.0, 0.75, 0.5)
+
+# Offers must clear the DSCR factor's "adequate coverage" band
+MIN_OFFER_DSCR = 1.2
+
+
+@lru_cache(maxsize=4096)
+def amortization_terms(apr: float, term_months: int) -> tuple:
+    """
+    (numerator, denominator) of the annuity factor for one APR/term.
+    payment = amount * numerator / denominator, evaluated in that order so
+    results are bit-identical to the original inline formula.
+    """
+    monthly_rate = apr / 12
+    if monthly_rate == 0:
+        return 1.0, float(term_months)
+    growth = (1 + monthly_rate) ** term_months
+    return monthly_rate * growth, growth - 1
+
+
+@lru_cache(maxsize=256)
+def amortization_grid(terms: tuple, aprs: tuple) -> tuple:
+    """Cached (terms x aprs) numerator/denominator arrays for the grid"""
+    numerators = np.empty((len(terms), len(aprs)))
+    denominators = np.empty((len(terms), len(aprs)))
+    for i, term in enumerate(terms):
+        for j, apr in enumerate(aprs):
+            numerators[i, j], denominators[i, j] = amortization_terms(apr, term)
+    numerators.flags.writeable = False
+    denominators.flags.writeable = False
+    return numerators, denominators
+
+
+def monthly_payment(loan_amount, apr: float = LOAN_APR, term_months: int = LOAN_TERM_MONTHS):
+    """Monthly payment on a fully amortizing loan (scalar or array amounts)"""
+    numerator, denominator = amortization_terms(apr, term_months)
+    if np.ndim(loan_amount):
+        loan_amount = np.asarray(loan_amount, dtype=np.float64)
+    return loan_amount * numerator / denominator
+
+
+def pricing_grid(amounts, net_operating_income: float, verified_income: float,
+                 terms=OFFER_TERMS_MONTHS, aprs=RISK_TIER_APRS["LOW"]) -> dict:
+    """
+    Payment, DSCR and DTI for every amount x term x APR combination at once.
+    Arrays are shaped (len(amounts), len(terms), len(aprs)) and use the same
+    formulas as calculate_debt_metrics.
+    """
+    terms = tuple(int(t) for t in terms)
+    aprs = tuple(float(a) for a in aprs)
+    numerators, denominators = amortization_grid(terms, aprs)
+    amounts = np.asarray(amounts, dtype=np.float64)
+
+    payment = amounts[:, None, None] * numerators[None] / denominators[None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dscr = np.where(payment > 0, net_operating_income / payment, 0.0)
+        dti = payment / verified_income * 100 if verified_income > 0 else np.full(payment.shape, 100.0)
+
+    return {
+        "amounts": amounts,
+        "terms": np.asarray(terms),
+        "aprs": np.asarray(aprs),
+        "monthly_payment": payment,
+        "dscr": dscr,
+        "dti_ratio": dti,
+    }
+
+
+def generate_offers(app_data: dict, cash_flow: dict, risk_tier: str,
+                    min_dscr: float = MIN_OFFER_DSCR) -> list:
+    """
+    Price the requested amount and counter-offer amounts across all terms and
+    the APR ladder for the applicant's risk tier; return offers that clear
+    min_dscr, largest amount first, then lowest payment.
+    """
+    amounts = [round(app_data["loan_amount"] * f, -2) for f in OFFER_AMOUNT_FRACTIONS]
+    grid = pricing_grid(
+        amounts,
+        cash_flow["monthly_net_cash_flow"],
+        app_data["bank_income"]["verified_income"],
+        aprs=RISK_TIER_APRS.get(risk_tier, RISK_TIER_APRS["HIGH"]),
+    )
+
+    # Filter on the DSCR as offered (rounded to 2 places), as loan_solver does;
+    # imported here because portfolio_scoring imports this module
+    from portfolio_scoring import py_round
+
+    eligible = np.argwhere(py_round(grid["dscr"], 2) >= min_dscr)
+    # Largest amount first, then lowest payment
+    order = np.lexsort((grid["monthly_payment"][tuple(eligible.T)], eligible[:, 0]))
+    offers = []
+    for a, t, r in eligible[order]:
+        offers.append({
+            "loan_amount": float(grid["amounts"][a]),
+            "term_months": int(grid["terms"][t]),
+            "apr": float(grid["aprs"][r]),
+            "monthly_payment": round(float(grid["monthly_payment"][a, t, r]), 2),
+            "dscr": round(float(grid["dscr"][a, t, r]), 2),
+            "dti_ratio": round(float(grid["dti_ratio"][a, t, r]), 1),
+        })
+    return offers
@@ -0,0 +1,215 @@
+"""
+Largest approvable loan amount (and term) per application.
+
+Only the DSCR feature depends on the loan amount, and every policy test is a
+">= threshold" on it, so the decision is a step function of DSCR with steps
+at the policy's DSCR thresholds. The solver evaluates the policy once per
+step (vectorized over the whole book), finds the lowest DSCR from which the
+application is approved, and inverts DSCR = net income / payment for the
+largest amount that reaches it on each term. Nothing is re-run per amount.
+
+    python loan_solver.py --input applications.jsonl --output counter_offers.csv
+    python loan_solver.py --rows 1000000
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+import numpy as np
+
+from decision_policy import APPROVED, DECISION_POLICY, CompiledPolicy, PolicyError
+from loan_pricing import LOAN_APR, LOAN_TERM_MONTHS, OFFER_TERMS_MONTHS, amortization_terms
+from portfolio_scoring import applications_to_columns, batch_decision_features, py_round
+
+# Counter-offers are whole multiples of this amount
+AMOUNT_STEP = 100
+
+# Policy features that change with the loan amount
+AMOUNT_FEATURES = ("dscr",)
+UNSUPPORTED_AMOUNT_FEATURES = ("dti_ratio", "loan_to_cash_ratio", "estimated_monthly_payment")
+
+
+def dscr_thresholds(policy: CompiledPolicy) -> list:
+    """Distinct DSCR thresholds the policy tests, ascending"""
+    conditions = [c for factor in policy.factors for c in factor.conditions]
+    conditions += [condition for condition, _, _ in policy.overrides]
+    return sorted({float(t) for condition in conditions for feature, t in condition if feature in AMOUNT_FEATURES})
+
+
+def dscr(amount, net_income, apr: float, term_months: int) -> np.ndarray:
+    """Rounded DSCR exactly as calculate_debt_metrics computes it"""
+    numerator, denominator = amortization_terms(apr, term_months)
+    payment = np.asarray(amount, dtype=np.float64) * numerator / denominator
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return py_round(np.where(payment > 0, net_income / payment, 0.0), 2)
+
+
+def largest_amount(net_income, floor: float, cap, apr: float, term_months: int) -> np.ndarray:
+    """
+    Largest multiple of AMOUNT_STEP, at most `cap`, whose DSCR is >= floor
+    (0 when even the smallest amount misses it).
+    """
+    net_income = np.asarray(net_income, dtype=np.float64)
+    cap = np.floor(np.asarray(cap, dtype=np.float64) / AMOUNT_STEP) * AMOUNT_STEP
+    if floor == -np.inf:
+        return cap
+    if floor <= 0:
+        # Met by any amount when net income is non-negative. A negative DSCR
+        # rises toward 0 as the amount grows, so only the cap can qualify.
+        return np.where((net_income >= 0) | (dscr(cap, net_income, apr, term_months) >= floor), cap, 0.0)
+
+    numerator, denominator = amortization_terms(apr, term_months)
+    # round(x, 2) >= floor for every x >= (floor rounded up to the cent) - 0.005
+    bound = np.ceil(floor * 100 - 1e-9) / 100 - 0.005
+    with np.errstate(divide="ignore", invalid="ignore"):
+        estimate = np.where(net_income > 0, net_income * denominator / (numerator * bound), 0.0)
+    amount = np.minimum(np.floor(estimate / AMOUNT_STEP) * AMOUNT_STEP, cap)
+    # The estimate can sit a step high because of rounding; confirm with the exact formula
+    for _ in range(3):
+        short = (amount > 0) & (dscr(amount, net_income, apr, term_months) < floor)
+        if not short.any():
+            break
+        amount = np.where(short, amount - AMOUNT_STEP, amount)
+    return np.maximum(amount, 0.0)
+
+
+def solve_max_loan(table, policy: CompiledPolicy = None, terms=OFFER_TERMS_MONTHS, apr: float = LOAN_APR,
+                   max_amount=None) -> dict:
+    """
+    Largest approvable amount per application, up to the requested amount
+    (or `max_amount`), over `terms`. Ties between terms go to the standard
+    LOAN_TERM_MONTHS, then to the shortest. An amount is only offered if
+    every smaller amount is approved as well. Rows with no approvable amount
+    get amount 0 and term 0. run_decision_pipeline prices every loan over
+    LOAN_TERM_MONTHS, so only offers on that term are approved as submitted;
+    pass terms=(LOAN_TERM_MONTHS,) for those.
+    """
+    policy = policy or DECISION_POLICY.current()
+    unsupported = set(UNSUPPORTED_AMOUNT_FEATURES) & set(policy.features)
+    if unsupported:
+        raise PolicyError(f"Cannot solve for the loan amount with policy tests on {sorted(unsupported)}")
+
+    features = batch_decision_features(table)
+    n_rows = len(features["dscr"])
+    net_income = features["monthly_net_cash_flow"]
+    cap = np.asarray(table["loan_amount"] if max_amount is None else max_amount, dtype=np.float64)
+    cap = np.broadcast_to(cap, (n_rows,))
+
+    # Decision on each DSCR step, from "no DSCR" up to the strictest threshold
+    floors = [-np.inf] + dscr_thresholds(policy)
+    approved = np.vstack([
+        policy.evaluate({**features, "dscr": np.full(n_rows, floor)})["decision_code"] == APPROVED
+        for floor in floors
+    ])
+    # approved_from[j]: approved on step j and every step above it
+    approved_from = np.logical_and.accumulate(approved[::-1], axis=0)[::-1]
+
+    ordered_terms = sorted(terms, key=lambda term: (term != LOAN_TERM_MONTHS, term))
+    best_amount = np.zeros(n_rows)
+    best_term = np.zeros(n_rows, dtype=np.int64)
+    unresolved = np.ones(n_rows, dtype=bool)
+    for j, floor in enumerate(floors):
+        candidates = approved_from[j] & unresolved
+        if not candidates.any():
+            continue
+        rows = np.flatnonzero(candidates)
+        amounts = np.vstack([largest_amount(net_income[rows], floor, cap[rows], apr, term) for term in ordered_terms])
+        pick = amounts.argmax(axis=0)
+        amount = amounts[pick, np.arange(len(rows))]
+        found = amount > 0
+        best_amount[rows[found]] = amount[found]
+        best_term[rows[found]] = np.asarray(ordered_terms)[pick[found]]
+        unresolved[rows[found]] = False
+
+    payment = np.zeros(n_rows)
+    offer_dscr = np.zeros(n_rows)
+    for term in set(best_term[best_term > 0].tolist()):
+        rows = best_term == term
+        numerator, denominator = amortization_terms(apr, term)
+        payment[rows] = py_round(best_amount[rows] * numerator / denominator, 2)
+        offer_dscr[rows] = dscr(best_amount[rows], net_income[rows], apr, term)
+    offer = policy.evaluate({**features, "dscr": offer_dscr})
+    requested = policy.evaluate(features)
+    offered = best_term > 0
+
+    result = {
+        "requested_amount": np.asarray(table["loan_amount"], dtype=np.float64),
+        "max_amount": best_amount,
+        "term_months": best_term,
+        "apr": np.full(n_rows, apr),
+        "monthly_payment": payment,
+        "dscr": offer_dscr,
+        # Rows without an offer keep the decision on the requested amount
+        "decision": np.where(offered, offer["decision"], requested["decision"]),
+        "score": np.where(offered, offer["score"], requested["score"]),
+    }
+    if "application_id" in table:
+        result["application_id"] = np.asarray(table["application_id"])
+    return result
+
+
+def max_approvable_loan(app_data: dict, policy: CompiledPolicy = None, terms=OFFER_TERMS_MONTHS) -> dict:
+    """solve_max_loan for one application; None when no amount is approvable"""
+    solution = solve_max_loan(applications_to_columns([app_data]), policy, terms)
+    if not solution["term_months"][0]:
+        return None
+    return {
+        "loan_amount": float(solution["max_amount"][0]),
+        "term_months": int(solution["term_months"][0]),
+        "apr": float(solution["apr"][0]),
+        "monthly_payment": float(solution["monthly_payment"][0]),
+        "dscr": float(solution["dscr"][0]),
+        "score": int(solution["score"][0]),
+    }
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+OUTPUT_FIELDS = ("application_id", "requested_amount", "max_amount", "term_months", "apr",
+                 "monthly_payment", "dscr", "decision", "score")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Largest approvable loan amount and term per application")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input", help="applications JSONL (as read by batch_runner)")
+    source.add_argument("--rows", type=int, default=100_000, help="synthetic book size when no --input")
+    parser.add_argument("--output", help="CSV of counter-offers (default: summary only)")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        from batch_runner import read_jsonl
+        with open(args.input, encoding="utf-8") as f:
+            table = applications_to_columns(dict(read_jsonl(f)))
+    else:
+        from parallel_scoring import synthetic_columns
+        table = synthetic_columns(args.rows)
+        table["application_id"] = np.array([f"ROW-{i}" for i in range(args.rows)], dtype=object)
+
+    started = time.perf_counter()
+    solution = solve_max_loan(table)
+    elapsed = time.perf_counter() - started
+
+    n_rows = len(solution["max_amount"])
+    offered = solution["term_months"] > 0
+    reduced = offered & (solution["max_amount"] < solution["requested_amount"])
+    print(f"{n_rows:,} applications in {elapsed:.2f}s ({n_rows / elapsed:,.0f}/s)", file=sys.stderr)
+    print(json.dumps({
+        "applications": n_rows,
+        "approvable_at_requested": int((offered & ~reduced).sum()),
+        "counter_offers": int(reduced.sum()),
+        "no_approvable_amount": int((~offered).sum()),
+    }, indent=2))
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(OUTPUT_FIELDS)
+            writer.writerows(zip(*(solution[name].tolist() for name in OUTPUT_FIELDS)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import functools
+import re
+import threading
+
+import numpy as np
+
+from transaction_store import TransactionTable
+
+# =============================================================================
+# CANONICAL MERCHANTS
+# =============================================================================
+# (canonical merchant, pattern over the cleaned, upper-case transaction name).
+# All rules are compiled into one alternation, so a name is matched in a
+# single regex search; the first rule that matches wins.
+MERCHANT_RULES = (
+    ("Stripe", r"\bSTRIPE\b"),
+    ("Shopify", r"\bSHOPIFY\b"),
+    ("Square", r"\bSQUARE\b|\bSQ\b|\bPATIENT PAYMENTS\b"),
+    ("PayPal", r"\bPAYPAL\b"),
+    ("Gusto", r"\bGUSTO\b"),
+    ("ADP", r"\bADP\b"),
+    ("Amazon Web Services", r"\bAWS\b|\bAMAZON WEB SERVICES\b"),
+    ("Google", r"\bGOOGLE\b"),
+    ("Intuit", r"\bQUICKBOOKS\b|\bINTUIT\b"),
+    ("Meta", r"\bFACEBOOK\b|\bMETA ADS\b|\bINSTAGRAM\b"),
+    ("LinkedIn", r"\bLINKEDIN\b"),
+    ("Alibaba", r"\bALIBABA\b"),
+    ("WeWork", r"\bWEWORK\b"),
+    ("Delta Dental", r"\bDELTA DENTAL\b|\bREIMBURSEMENT DELTA\b"),
+    ("Cigna", r"\bCIGNA\b"),
+    ("Aetna", r"\bAETNA\b"),
+)
+
+# Generic banking words dropped from names that match no rule
+# ("ACME SUPPLY PMT 4411" -> "Acme Supply")
+GENERIC_TOKENS = frozenset((
+    "ACH", "CREDIT", "DEBIT", "DEPOSIT", "ONLINE", "PAYMENT", "PAYOUT", "PMT",
+    "POS", "PURCHASE", "TRANSFER", "WIRE", "XFER",
+))
+
+# Past a normalizer's max_merchants, new merchants share this one
+OTHER_MERCHANT = "Other"
+
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+_HAS_DIGIT = re.compile(r"\d")
+
+
+def clean_name(name: str) -> str:
+    """Upper-case, punctuation-free name without reference numbers"""
+    tokens = _NON_ALNUM.sub(" ", str(name).upper()).split()
+    return " ".join(token for token in tokens if not _HAS_DIGIT.search(token))
+
+
+class MerchantNormalizer:
+    """
+    Maps raw transaction names to canonical merchants, interned to integer
+    codes. Names repeat heavily, so code() is memoized in a bounded LRU and a
+    repeated name costs one cache hit. Safe to share between threads. Once
+    `max_merchants` merchants are interned, new ones all get the code of
+    OTHER_MERCHANT, so a long-running process doesn't grow without bound.
+    """
+
+    def __init__(self, rules=MERCHANT_RULES, cache_size: int = 65_536, max_merchants: int = 100_000):
+        self.rules = tuple(rules)
+        self.max_merchants = max_merchants
+        self._matcher = re.compile("|".join(f"(?P<m{i}>{pattern})" for i, (_, pattern) in enumerate(self.rules)))
+        self._lock = threading.Lock()
+        self._codes = {}
+        self.merchants = []  # canonical name by code
+        self.code = functools.lru_cache(maxsize=cache_size)(self._code)
+
+    def __len__(self) -> int:
+        return len(self.merchants)
+
+    def _code(self, name: str) -> int:
+        merchant = self.normalize(name)
+        code = self._codes.get(merchant)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(merchant)
+                if code is None:
+                    if len(self.merchants) >= self.max_merchants - 1 and merchant != OTHER_MERCHANT:
+                        merchant = OTHER_MERCHANT  # the last slot is kept for it
+                        code = self._codes.get(merchant)
+                    if code is None:
+                        code = self._codes[merchant] = len(self.merchants)
+                        self.merchants.append(merchant)
+        return code
+
+    def normalize(self, name: str) -> str:
+        """Canonical merchant for one raw name (uncached)"""
+        cleaned = clean_name(name)
+        match = self._matcher.search(cleaned)
+        if match is not None:
+            return self.rules[int(match.lastgroup[1:])][0]
+        kept = [token for token in cleaned.split() if token not in GENERIC_TOKENS]
+        return " ".join(kept or cleaned.split()).title() or "Unknown"
+
+    def canonical(self, name: str) -> str:
+        return self.merchants[self.code(name)]
+
+    def codes(self, names) -> np.ndarray:
+        code = self.code
+        return np.fromiter((code(name) for name in names), dtype=np.int32)
+
+    def cache_info(self):
+        return self.code.cache_info()
+
+
+# Shared so merchant codes are stable across tables and applicants
+DEFAULT_NORMALIZER = MerchantNormalizer()
+
+
+# =============================================================================
+# MERCHANT CONCENTRATION
+# =============================================================================
+
+def transaction_merchant_codes(applications, normalizer: MerchantNormalizer = None) -> np.ndarray:
+    """Merchant code per transaction, in TransactionTable.from_applications order"""
+    code = (normalizer or DEFAULT_NORMALIZER).code
+    return np.fromiter(
+        (code(t.get("name") or t.get("merchant") or "") for app in applications for t in app["transactions_90d"]),
+        dtype=np.int32,
+    )
+
+
+def merchant_concentration(amounts, merchant_codes, owners, n_owners: int) -> dict:
+    """
+    Per-owner inflow concentration: distinct paying merchants, the largest
+    merchant and its share of inflows, and the Herfindahl index (sum of
+    squared shares; 1.0 means a single source of revenue).
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    merchant_codes = np.asarray(merchant_codes, dtype=np.int64)
+    owners = np.asarray(owners, dtype=np.int64)
+
+    inflow = amounts > 0
+    width = int(merchant_codes.max()) + 1 if len(merchant_codes) else 1
+    keys, position = np.unique(owners[inflow] * width + merchant_codes[inflow], return_inverse=True)
+    totals = np.bincount(position, weights=amounts[inflow], minlength=len(keys))
+    key_owner, key_merchant = keys // width, keys % width
+
+    owner_inflow = np.bincount(key_owner, weights=totals, minlength=n_owners)
+    share = totals / owner_inflow[key_owner] if len(keys) else totals
+
+    result = {
+        "inflow_merchants": np.bincount(key_owner, minlength=n_owners),
+        "top_merchant": np.full(n_owners, -1, dtype=np.int64),
+        "top_merchant_share": np.zeros(n_owners),
+        "inflow_hhi": np.bincount(key_owner, weights=share * share, minlength=n_owners),
+    }
+    if len(keys):
+        # keys are sorted, so each owner's merchants are contiguous
+        starts = np.flatnonzero(np.r_[True, key_owner[1:] != key_owner[:-1]])
+        # Largest share first within each owner; ties go to the lowest merchant code
+        top = np.lexsort((key_merchant, -share, key_owner))[starts]
+        result["top_merchant"][key_owner[top]] = key_merchant[top]
+        result["top_merchant_share"][key_owner[top]] = share[top]
+    return result
+
+
+def calculate_merchant_concentration(app_data: dict, normalizer: MerchantNormalizer = None) -> dict:
+    """Inflow concentration for one applicant, with the top merchant by name"""
+    normalizer = normalizer or DEFAULT_NORMALIZER
+    txns = TransactionTable.from_applications([app_data])
+    codes = transaction_merchant_codes([app_data], normalizer)
+    result = merchant_concentration(txns.amounts, codes, txns.owners, 1)
+    top = int(result["top_merchant"][0])
+    return {
+        "inflow_merchants": int(result["inflow_merchants"][0]),
+        "top_merchant": normalizer.merchants[top] if top >= 0 else None,
+        "top_merchant_share": round(float(result["top_merchant_share"][0]), 3),
+        "inflow_hhi": round(float(result["inflow_hhi"][0]), 3),
+    }
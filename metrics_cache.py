@@ -0,0 +1,76 @@
+import hashlib
+import marshal
+import pickle
+import threading
+from collections import OrderedDict
+
+# =============================================================================
+# CONTENT-ADDRESSED METRICS CACHE
+# =============================================================================
+MARSHAL_VERSION = 2
+
+
+def application_fingerprint(app_data: dict) -> str:
+    """
+    Content hash of an application payload.
+    marshal is the fastest serializer for plain dict/list/str/float payloads;
+    anything it can't encode (numpy scalars, datetimes) falls back to pickle.
+    Equal payloads built in the same key order hash identically.
+    """
+    try:
+        # Format 2 predates back-references, whose use depends on refcounts
+        payload = marshal.dumps(app_data, MARSHAL_VERSION)
+    except ValueError:
+        payload = pickle.dumps(app_data, protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class MetricsCache:
+    """
+    Thread-safe bounded LRU for derived metrics.
+    Keys are tuples starting with an application fingerprint; values are
+    shared between consumers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Compute outside the lock so nested lookups (debt -> cash flow) don't deadlock
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,255 @@
+"""
+Multi-core portfolio re-scoring over shared memory.
+
+The input columns are copied once into a shared-memory block and every
+worker maps the same block, scores a contiguous row range with
+score_portfolio, and writes its results into a shared output block at the
+same row offsets. Tasks are just (start, stop) pairs, so no rows are ever
+pickled and merging in order is free.
+
+    python parallel_scoring.py --rows 5000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from cash_flow_series import SERIES_FEATURES
+from decision_policy import DECISION_LABELS, DECISION_POLICY, FACTOR_STATUS_LABELS, CompiledPolicy, compile_policy
+from portfolio_scoring import score_portfolio
+
+# =============================================================================
+# SHARED COLUMN BLOCKS
+# =============================================================================
+INPUT_SPEC = {
+    "loan_amount": "f8",
+    "years_in_business": "f8",
+    "verified_income": "f8",
+    "income_stability": "?",  # True when "HIGH"; score_portfolio accepts either form
+    "months_of_history": "f8",
+    "nsf_overdraft_count_90d": "i8",
+    "negative_balance_days_90d": "i8",
+    "account_age_days": "i8",
+    "beacon_network_flags": "i8",
+    "total_inflows_90d": "f8",
+    "total_outflows_90d": "f8",
+    "liquid_assets": "f8",
+}
+# Cash-flow series columns (applications_to_columns) are shared too when the
+# table has them, and come back out as result columns like the metrics
+SERIES_SPEC = {name: "f8" for name in SERIES_FEATURES}
+
+
+def input_spec(table) -> dict:
+    """Input columns for `table`: the application columns plus any series columns it has"""
+    return {**INPUT_SPEC, **{name: dtype for name, dtype in SERIES_SPEC.items() if name in table}}
+
+
+METRIC_OUTPUTS = (
+    "signal_score", "trust_index", "monthly_avg_inflow", "monthly_net_cash_flow",
+    "estimated_monthly_payment", "dscr", "dti_ratio", "runway_months",
+    "loan_to_cash_ratio", "monthly_burn_rate",
+)
+
+
+def output_spec(policy: CompiledPolicy, series=()) -> dict:
+    """
+    Output columns for scoring under `policy` (one points/status pair per
+    factor) of a table with the `series` columns
+    """
+    return {
+        **{name: "f8" for name in METRIC_OUTPUTS},
+        **{name: SERIES_SPEC[name] for name in series},
+        "fraud_detected": "?",
+        "score": "i8",
+        "decision_code": "i1",
+        **{f"points:{name}": "i8" for name in policy.factor_names},
+        **{f"status:{name}": "i1" for name in policy.factor_names},
+    }
+
+
+DEFAULT_CHUNK_ROWS = 262_144
+
+
+def _layout(spec: dict, n_rows: int) -> tuple:
+    """Byte offset of each column (64-byte aligned) and the total block size"""
+    offsets, cursor = {}, 0
+    for name, dtype in spec.items():
+        offsets[name] = cursor
+        cursor += -(-np.dtype(dtype).itemsize * n_rows // 64) * 64
+    return offsets, max(cursor, 1)
+
+
+class SharedColumns:
+    """Named columns carved out of one shared-memory block"""
+
+    def __init__(self, spec: dict, n_rows: int, name: str = None):
+        self.spec = spec
+        self.n_rows = n_rows
+        offsets, size = _layout(spec, n_rows)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = _attach(name)
+            self.owner = False
+        self.columns = {
+            col: np.ndarray((n_rows,), dtype=dtype, buffer=self.shm.buf, offset=offsets[col])
+            for col, dtype in spec.items()
+        }
+
+    @property
+    def handle(self) -> tuple:
+        """Picklable description a worker can attach with"""
+        return self.spec, self.n_rows, self.shm.name
+
+    def close(self):
+        self.columns = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Pool workers share the parent's resource tracker, where registration is
+    # idempotent, so attaching never causes a second unlink; only the
+    # creating SharedColumns unlinks the block.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+# =============================================================================
+# WORKERS
+# =============================================================================
+_worker_blocks = {}
+
+
+def _init_worker(input_handle: tuple, output_handle: tuple, policy_spec: dict):
+    _worker_blocks["in"] = SharedColumns(*input_handle[:2], name=input_handle[2])
+    _worker_blocks["out"] = SharedColumns(*output_handle[:2], name=output_handle[2])
+    # Every worker scores with the parent's policy, not its own DECISION_POLICY
+    _worker_blocks["policy"] = compile_policy(policy_spec)
+
+
+def _score_rows(start: int, stop: int) -> int:
+    inputs = _worker_blocks["in"].columns
+    outputs = _worker_blocks["out"].columns
+    policy = _worker_blocks["policy"]
+    result = score_portfolio({name: column[start:stop] for name, column in inputs.items()}, policy)
+    _write_result(outputs, result, start, stop, policy)
+    return stop - start
+
+
+def _row_outputs(outputs: dict) -> list:
+    """Output columns copied straight from score_portfolio's result (not per-factor)"""
+    return [name for name in outputs if not name.startswith(("points:", "status:"))]
+
+
+def _write_result(outputs: dict, result: dict, start: int, stop: int, policy: CompiledPolicy):
+    for name in _row_outputs(outputs):
+        outputs[name][start:stop] = result[name]
+    for name in policy.factor_names:
+        outputs[f"points:{name}"][start:stop] = result["factor_points"][name]
+        outputs[f"status:{name}"][start:stop] = result["factor_status_code"][name]
+
+
+# =============================================================================
+# PARALLEL DRIVER
+# =============================================================================
+
+def _load_inputs(block: SharedColumns, table):
+    for name in block.spec:
+        column = np.asarray(table[name])
+        if name == "income_stability" and column.dtype != bool:
+            column = column == "HIGH"
+        block.columns[name][:] = column
+
+
+def _collect(outputs: dict, policy: CompiledPolicy) -> dict:
+    """Copy results out of shared memory in score_portfolio's result shape"""
+    result = {name: outputs[name].copy() for name in _row_outputs(outputs)}
+    result["decision"] = DECISION_LABELS[result["decision_code"]]
+    result["factor_points"] = {name: outputs[f"points:{name}"].copy() for name in policy.factor_names}
+    result["factor_status_code"] = {name: outputs[f"status:{name}"].copy() for name in policy.factor_names}
+    result["factor_status"] = {name: FACTOR_STATUS_LABELS[codes] for name, codes in result["factor_status_code"].items()}
+    return result
+
+
+def score_portfolio_parallel(table, workers: int = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                             policy: CompiledPolicy = None) -> dict:
+    """
+    score_portfolio across a process pool. Same result keys and values as
+    the single-process call, in input row order. The policy (default: the
+    active one when the call starts) is sent to every worker.
+    """
+    policy = policy or DECISION_POLICY.current()
+    workers = workers or os.cpu_count() or 1
+    n_rows = len(np.asarray(table["loan_amount"]))
+    if workers == 1 or n_rows <= chunk_rows:
+        return score_portfolio(table, policy)
+
+    inputs = SharedColumns(input_spec(table), n_rows)
+    outputs = SharedColumns(output_spec(policy, [name for name in SERIES_SPEC if name in table]), n_rows)
+    try:
+        _load_inputs(inputs, table)
+        ranges = [(start, min(start + chunk_rows, n_rows)) for start in range(0, n_rows, chunk_rows)]
+        initargs = (inputs.handle, outputs.handle, policy.spec)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+            list(pool.map(_score_rows, *zip(*ranges)))
+        result = _collect(outputs.columns, policy)
+    finally:
+        inputs.close()
+        outputs.close()
+
+    if "application_id" in table:
+        result["application_id"] = np.asarray(table["application_id"])
+    return result
+
+
+# =============================================================================
+# SCALING BENCHMARK
+# =============================================================================
+
+def synthetic_columns(n_rows: int, seed: int = 0) -> dict:
+    """Random application table with realistic ranges for every input column"""
+    rng = np.random.default_rng(seed)
+    return {
+        "loan_amount": rng.choice([25_000, 75_000, 150_000, 250_000], n_rows).astype(np.float64),
+        "years_in_business": rng.choice([0.5, 1, 2, 3, 7], n_rows).astype(np.float64),
+        "verified_income": rng.choice([5_000, 22_000, 48_000, 185_000], n_rows).astype(np.float64),
+        "income_stability": rng.choice(np.array(["HIGH", "MEDIUM", "LOW"], dtype=object), n_rows),
+        "months_of_history": rng.choice([3, 6, 8, 12, 24, 84], n_rows).astype(np.float64),
+        "nsf_overdraft_count_90d": rng.choice([0, 0, 0, 1, 2, 5], n_rows),
+        "negative_balance_days_90d": rng.choice([0, 0, 3, 5, 20], n_rows),
+        "account_age_days": rng.integers(30, 3000, n_rows),
+        "beacon_network_flags": (rng.random(n_rows) < 0.03).astype(np.int64),
+        "total_inflows_90d": np.round(rng.lognormal(11.5, 0.8, n_rows), 2),
+        "total_outflows_90d": np.round(rng.lognormal(11.4, 0.8, n_rows), 2),
+        "liquid_assets": np.round(rng.lognormal(11.5, 1.0, n_rows), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure parallel re-scoring throughput by worker count")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    table = synthetic_columns(args.rows)
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        started = time.perf_counter()
+        score_portfolio_parallel(table, workers, args.chunk_rows)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {args.rows / elapsed:>14,.0f} rows/s   speedup {baseline / elapsed:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
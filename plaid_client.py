@@ -0,0 +1,494 @@
+"""
+Pooled, rate-limited Plaid API client.
+
+PlaidClient is an async_pipeline backend (`await client.call(endpoint,
+app_data)`) that talks to the Plaid HTTP API. It adds:
+  - a keep-alive connection pool per host (HTTP/1.1 over asyncio streams)
+  - a token-bucket rate limit per endpoint
+  - retries with full-jitter exponential backoff on 429, 5xx, timeouts and
+    connection errors (Retry-After is honoured)
+  - single-flight coalescing: concurrent requests with the same endpoint and
+    payload (the same item) share one upstream call
+
+PlaidStubServer serves the local plaid_* simulators over the same HTTP
+interface, with injectable latency and failures. The client can be exercised
+end to end offline:
+
+    python plaid_client.py --apps 50 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import ssl
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from async_pipeline import PLAID_ENDPOINTS, PlaidBackendError
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+PLAID_ENVIRONMENTS = {
+    "sandbox": "https://sandbox.plaid.com",
+    "production": "https://production.plaid.com",
+}
+
+# Endpoint name (as used by async_pipeline) -> API path. Risk product paths
+# depend on what the lender has enabled; override them with `routes=`.
+PLAID_ROUTES = {
+    "identity": "/identity/get",
+    "accounts": "/accounts/get",
+    "transactions": "/transactions/get",
+    "bank_income": "/credit/bank_income/get",
+    "signal": "/signal/evaluate",
+    "beacon": "/beacon/user/get",
+    "trust": "/beacon/user/risk_check/get",
+}
+
+# (requests per second, burst) per endpoint; DEFAULT_RATE_LIMIT for the rest
+DEFAULT_RATE_LIMIT = (10.0, 20)
+DEFAULT_RATE_LIMITS = {
+    "transactions": (5.0, 10),
+    "bank_income": (2.0, 5),
+}
+
+DEFAULT_TIMEOUT_S = 10.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class PlaidAPIError(PlaidBackendError):
+    """Plaid answered with an error status"""
+
+    def __init__(self, status: int, message: str, error_code: str = None, retry_after: float = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+class TokenBucket:
+    """
+    `rate` tokens per second, up to `burst` banked. acquire() waits for a
+    token; waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Take one token; returns the seconds spent waiting for it (queueing included)"""
+        started = time.monotonic()
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+        return time.monotonic() - started
+
+
+# =============================================================================
+# CONNECTION POOL
+# =============================================================================
+
+class _Connection:
+    """One HTTP/1.1 connection; requests on it are sequential"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    async def request(self, host: str, path: str, body: bytes, headers: dict) -> tuple:
+        """POST `body`; returns (status, headers, body, keep_alive)"""
+        lines = [f"POST {path} HTTP/1.1", f"Host: {host}", "Content-Type: application/json",
+                 f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+        self.requests += 1
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            # The server closed an idle keep-alive connection
+            raise ConnectionResetError("Connection closed before a response")
+        version, status = status_line.decode("latin-1").split(None, 2)[:2]
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            payload = b"".join(chunks)
+            framed = True
+        elif "content-length" in response_headers:
+            payload = await self.reader.readexactly(int(response_headers["content-length"]))
+            framed = True
+        else:
+            payload = await self.reader.read()
+            framed = False
+
+        connection = response_headers.get("connection", "").lower()
+        keep_alive = framed and connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+        return int(status), response_headers, payload, keep_alive
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """
+    Keep-alive connections to one host, at most `max_connections` open.
+    Idle connections are reused most-recently-used first and dropped after
+    `idle_timeout` seconds, before a typical server would close them.
+    """
+
+    def __init__(self, host: str, port: int, use_ssl: bool = False, max_connections: int = 10,
+                 idle_timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_connections)
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self) -> _Connection:
+        await self._slots.acquire()
+        now = time.monotonic()
+        while self._idle:
+            connection, last_used = self._idle.pop()
+            if now - last_used < self.idle_timeout and not connection.reader.at_eof():
+                self.reused += 1
+                return connection
+            connection.close()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    def release(self, connection: _Connection, reusable: bool):
+        if reusable:
+            self._idle.append((connection, time.monotonic()))
+        else:
+            connection.close()
+        self._slots.release()
+
+    def close(self):
+        for connection, _ in self._idle:
+            connection.close()
+        self._idle.clear()
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+
+class PlaidClient:
+    """
+    Async Plaid client; use one per event loop and close() it when done
+    (or `async with PlaidClient(...) as client`). Coalesced callers share
+    one response object, which must be treated as read-only.
+    Credentials default to PLAID_CLIENT_ID / PLAID_SECRET, and the base URL
+    to PLAID_BASE_URL or the PLAID_ENV environment (sandbox).
+    """
+
+    def __init__(self, base_url: str = None, client_id: str = None, secret: str = None, routes: dict = None,
+                 rate_limits: dict = None, max_connections: int = 10, timeout: float = DEFAULT_TIMEOUT_S,
+                 max_retries: int = 3, backoff_base: float = 0.1, backoff_cap: float = 5.0, seed: int = None):
+        base_url = base_url or os.environ.get("PLAID_BASE_URL") or PLAID_ENVIRONMENTS[os.environ.get("PLAID_ENV", "sandbox")]
+        url = urlsplit(base_url)
+        use_ssl = url.scheme == "https"
+        self.host = url.netloc
+        self.base_path = url.path.rstrip("/")
+        self.pool = ConnectionPool(url.hostname, url.port or (443 if use_ssl else 80), use_ssl, max_connections)
+        self.routes = {**PLAID_ROUTES, **(routes or {})}
+        limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.buckets = {endpoint: TokenBucket(*limits.get(endpoint, DEFAULT_RATE_LIMIT)) for endpoint in self.routes}
+        self.headers = {
+            "PLAID-CLIENT-ID": client_id or os.environ.get("PLAID_CLIENT_ID", ""),
+            "PLAID-SECRET": secret or os.environ.get("PLAID_SECRET", ""),
+        }
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._rng = random.Random(seed)
+        self._in_flight = {}
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.throttled_s = 0.0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    async def call(self, endpoint: str, app_data: dict) -> dict:
+        """async_pipeline backend interface: the item is app_data["plaid_access_token"]"""
+        return await self.request(endpoint, {"access_token": app_data["plaid_access_token"]})
+
+    async def request(self, endpoint: str, payload: dict) -> dict:
+        """POST `payload` to `endpoint`, sharing the call with identical in-flight requests"""
+        self.requests += 1
+        key = (endpoint, json.dumps(payload, sort_keys=True))
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request_with_retries(endpoint, payload))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the call for the others sharing it
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited failure isn't logged
+
+    def _backoff(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        return self._rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def _request_with_retries(self, endpoint: str, payload: dict) -> dict:
+        body = json.dumps(payload).encode()
+        path = self.base_path + self.routes[endpoint]
+        for attempt in range(self.max_retries + 1):
+            self.throttled_s += await self.buckets[endpoint].acquire()
+            self.attempts += 1
+            try:
+                return await asyncio.wait_for(self._send(path, body), self.timeout)
+            except PlaidAPIError as exc:
+                if exc.status not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt, exc.retry_after)
+            except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError) as exc:
+                if attempt == self.max_retries:
+                    raise PlaidBackendError(f"{endpoint}: {type(exc).__name__}: {exc}") from exc
+                delay = self._backoff(attempt)
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _send(self, path: str, body: bytes) -> dict:
+        connection = await self.pool.acquire()
+        reusable = False
+        try:
+            status, headers, payload, reusable = await connection.request(self.host, path, body, self.headers)
+        finally:
+            # Timeouts and errors leave the connection mid-response: never reuse it
+            self.pool.release(connection, reusable)
+        if status >= 400:
+            try:
+                error = json.loads(payload)
+            except ValueError:
+                error = {}
+            retry_after = headers.get("retry-after")
+            raise PlaidAPIError(
+                status,
+                error.get("error_message") or payload[:200].decode("utf-8", "replace"),
+                error.get("error_code"),
+                float(retry_after) if retry_after else None,
+            )
+        return json.loads(payload)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "upstream_attempts": self.attempts,
+            "retries": self.retries,
+            "throttled_s": round(self.throttled_s, 3),
+            "connections_opened": self.pool.opened,
+            "connections_reused": self.pool.reused,
+        }
+
+
+# =============================================================================
+# LOCAL STUB SERVER
+# =============================================================================
+
+class PlaidStubServer(ThreadingHTTPServer):
+    """
+    Serves the plaid_* simulators at PLAID_ROUTES for the applications given
+    ({access_token: app_data}). `latency_ms` adds a delay per endpoint;
+    `failure_rate` and `rate_limit_rate` make that fraction of requests
+    answer 503 or 429. Counts requests per endpoint and connections accepted.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, applications: dict, latency_ms: dict = None, failure_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = None):
+        super().__init__(address, PlaidStubHandler)
+        self.applications = applications
+        self.latency_ms = latency_ms or {}
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.endpoints = {path: endpoint for endpoint, path in PLAID_ROUTES.items()}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_counts = {}
+        self.connections = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class PlaidStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        endpoint = self.server.endpoints.get(self.path)
+        if endpoint is None:
+            self._send(404, {"error_code": "NOT_FOUND", "error_message": f"Unknown path {self.path}"})
+            return
+        self.server.count(endpoint)
+        time.sleep(self.server.latency_ms.get(endpoint, 0) / 1000)
+
+        roll = self.server.roll()
+        if roll < self.server.rate_limit_rate:
+            self._send(429, {"error_code": "RATE_LIMIT_EXCEEDED", "error_message": "rate limit exceeded"},
+                       {"Retry-After": "0.05"})
+        elif roll < self.server.rate_limit_rate + self.server.failure_rate:
+            self._send(503, {"error_code": "INTERNAL_SERVER_ERROR", "error_message": "upstream unavailable"})
+        elif body.get("access_token") not in self.server.applications:
+            self._send(400, {"error_code": "INVALID_ACCESS_TOKEN", "error_message": "unknown access_token"})
+        else:
+            self._send(200, PLAID_ENDPOINTS[endpoint](self.server.applications[body["access_token"]]))
+
+
+# =============================================================================
+# OFFLINE BENCHMARK
+# =============================================================================
+
+async def _benchmark(applications: dict, base_url: str, args) -> tuple:
+    from async_pipeline import decide_many
+
+    # Generous limits so the benchmark measures pooling and coalescing, not throttling
+    limits = {endpoint: (1000.0, 1000) for endpoint in PLAID_ROUTES}
+    async with PlaidClient(base_url, "stub-client", "stub-secret", rate_limits=limits,
+                           max_connections=args.connections, seed=args.seed) as client:
+        started = time.perf_counter()
+        results = await decide_many(applications, client, max_in_flight=args.concurrency)
+        elapsed = time.perf_counter() - started
+        return results, elapsed, client.stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run decisions through PlaidClient against a local stub server")
+    parser.add_argument("--apps", type=int, default=50, help="decisions to run")
+    parser.add_argument("--concurrency", type=int, default=16, help="decisions in flight")
+    parser.add_argument("--connections", type=int, default=8, help="connection pool size")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of stub calls answering 503")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub latency per call")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    from credit_engine import LOAN_APPLICATIONS
+
+    # Several decisions per demo item, so concurrent identical calls are coalesced
+    items = list(LOAN_APPLICATIONS.items())
+    tokens = {app_id: {**app, "plaid_access_token": f"access-sandbox-{app_id}"} for app_id, app in items}
+    applications = {}
+    for i in range(args.apps):
+        app_id = items[i % len(items)][0]
+        applications[f"{app_id}-{i}"] = tokens[app_id]
+
+    server = PlaidStubServer(("127.0.0.1", 0), {app["plaid_access_token"]: app for app in tokens.values()},
+                             {endpoint: args.latency_ms for endpoint in PLAID_ROUTES}, args.failure_rate, seed=args.seed)
+    server.start()
+    try:
+        results, elapsed, stats = asyncio.run(_benchmark(applications, server.base_url, args))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    outcomes = {}
+    for result in results.values():
+        outcome = result["decision"]["decision"]
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    print(f"{len(results)} decisions in {elapsed:.2f}s: {outcomes}", file=sys.stderr)
+    print(json.dumps({
+        "client": stats,
+        "stub": {"requests": sum(server.request_counts.values()), "connections": server.connections},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
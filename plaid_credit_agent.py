@@ -1,25 +1,207 @@
+import json
+import os
 import streamlit as st
-import pandas as pd
-import numpy as np
 import time
-from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-import json
+
+from credit_engine import (
+    LOAN_APPLICATIONS,
+    MetricsContext,
+    agent_make_decision,
+    application_fingerprint,
+    build_audit_record,
+    calculate_cash_flow_metrics,
+    calculate_debt_metrics,
+    calculate_liquidity_metrics,
+    plaid_bank_income,
+    plaid_beacon_check,
+    plaid_get_accounts,
+    plaid_get_transactions,
+    plaid_identity_verify,
+    plaid_signal_score,
+    plaid_trust_index,
+    run_decision_pipeline,
+    score_decision,
+    stamp_decision,
+)
+from audit_log import AuditLog
+from decision_policy import DECISION_POLICY
+from loan_pricing import LOAN_TERM_MONTHS, generate_offers
+from loan_solver import max_approvable_loan
+from portfolio_dashboard import (
+    METRIC_RANGES,
+    ROW_COLUMNS,
+    decision_summary,
+    density_grid,
+    factor_status_rates,
+    metric_histogram,
+    row_order,
+    row_window,
+    score_histogram,
+    segment_mask,
+)
+
+# pandas and plotly are imported inside the UI functions that use them, so
+# `import plaid_credit_agent` stays cheap for tools that only need the engine
+# re-exports above.
 
 # =============================================================================
-# PAGE CONFIG
+# UI CACHING
 # =============================================================================
-st.set_page_config(
-    page_title="Credit Decisioning Agent | Plaid Infrastructure",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+
+# Optional pauses per step (seconds) for narrated live demos
+DEMO_STEP_DELAYS = {"identity": 0.8, "data": 1.0, "metrics": 0.8, "risk": 1.2, "decision": 0.6}
+
+# Agent lifecycle stage each UI step belongs to (audit record stage timings)
+STEP_LIFECYCLE_STAGES = {"identity": "perceive", "data": "perceive", "metrics": "reason", "risk": "verify", "decision": "act"}
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def run_stage_cached(stage: str, application_id: str, fingerprint: str, policy_version: str = None) -> dict:
+    """
+    Run one pipeline stage for an application, cached per application.
+    The fingerprint is part of the cache key so edited application data
+    is never served a stale result. The decision stage caches only the
+    scoring, keyed on the active policy's version so a policy reload is
+    re-scored; callers stamp each decision with stamp_decision. Identity
+    is never cached (see run_stage).
+    """
+    app_data = LOAN_APPLICATIONS[application_id]
+    if stage == "data":
+        return {
+            "accounts": plaid_get_accounts(app_data),
+            "transactions": plaid_get_transactions(app_data),
+            "bank_income": plaid_bank_income(app_data)
+        }
+    if stage == "metrics":
+        metrics_ctx = MetricsContext(app_data)
+        return {
+            "cash_flow": metrics_ctx.cash_flow(),
+            "debt": metrics_ctx.debt(app_data["loan_amount"]),
+            "liquidity": metrics_ctx.liquidity(app_data["loan_amount"])
+        }
+    if stage == "risk":
+        return {
+            "signal": plaid_signal_score(app_data),
+            "beacon": plaid_beacon_check(app_data),
+            "trust": plaid_trust_index(app_data)
+        }
+    if stage == "decision":
+        risk = run_stage_cached("risk", application_id, fingerprint)
+        metrics = run_stage_cached("metrics", application_id, fingerprint)
+        return score_decision(app_data, risk, {"debt": metrics["debt"], "liquidity": metrics["liquidity"]})
+    raise ValueError(f"Unknown pipeline stage: {stage}")
+
+# Rendered decisions are persisted here (one writer shared by all sessions)
+AUDIT_LOG_DIR = os.environ.get("AUDIT_LOG_DIR", "audit_log")
+
+@st.cache_resource(show_spinner=False)
+def shared_audit_log() -> AuditLog:
+    return AuditLog(AUDIT_LOG_DIR)
+
+@st.cache_resource(show_spinner=False)
+def gauge_figure(value: float, title: str, axis_max: float, bar_color: str, bands: tuple):
+    """Gauge indicator, built once per distinct value/style"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=value,
+        title={'text': title},
+        gauge={
+            'axis': {'range': [0, axis_max]},
+            'bar': {'color': bar_color},
+            'steps': [{'range': [low, high], 'color': color} for low, high, color in bands]
+        }
+    ))
+    fig.update_layout(height=200, margin=dict(t=80, b=0, l=30, r=30))
+    return fig
 
 # =============================================================================
-# CUSTOM STYLING
+# PORTFOLIO DATA
 # =============================================================================
-st.markdown("""
+# The scored book stays on the server (one copy shared by all sessions); the
+# browser only receives the aggregates and row pages built from it.
+# The book is the feature store's applications, re-scored under the active
+# policy. Without a feature store a synthetic book is shown, labelled as such.
+# A book is identified by a hashable key:
+#   ("store", <live parts>, <policy version>) or ("synthetic", rows, seed, <policy version>)
+
+FEATURE_STORE_DIR = os.environ.get("FEATURE_STORE_DIR", "feature_store")
+PORTFOLIO_SIZES = (10_000, 100_000, 250_000, 500_000)
+PORTFOLIO_PAGE_SIZES = (25, 50, 100)
+
+def stored_book_key(policy_version: str):
+    """Key of the feature store's current book, or None when there is no stored book"""
+    from feature_store import MANIFEST_FILE
+    from portfolio_scoring import FEATURE_VERSION
+
+    try:
+        with open(os.path.join(FEATURE_STORE_DIR, FEATURE_VERSION, MANIFEST_FILE), encoding="utf-8") as f:
+            parts = tuple(json.load(f)["parts"])
+    except (OSError, ValueError, KeyError):
+        return None
+    return ("store", parts, policy_version) if parts else None
+
+@st.cache_resource(show_spinner="Scoring portfolio...", max_entries=4)
+def scored_portfolio(book: tuple) -> dict:
+    from portfolio_scoring import score_features, score_portfolio
+
+    if book[0] == "store":
+        from feature_store import FeatureStore
+
+        application_ids, features = FeatureStore(FEATURE_STORE_DIR, read_only=True).load()
+        return score_features(features, application_ids=application_ids)
+    from parallel_scoring import synthetic_columns
+
+    _, n_rows, seed, _ = book
+    return score_portfolio(synthetic_columns(n_rows, seed))
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def portfolio_aggregates(book: tuple, decisions: tuple) -> dict:
+    """Everything the portfolio charts draw, for one segment of the book"""
+    result = scored_portfolio(book)
+    mask = segment_mask(result, decisions)
+    return {
+        "summary": decision_summary(result, mask),
+        "scores": score_histogram(result, mask=mask),
+        "factors": factor_status_rates(result, mask),
+        "dscr": metric_histogram(result["dscr"], METRIC_RANGES["dscr"], mask=mask),
+        "runway": metric_histogram(result["runway_months"], METRIC_RANGES["runway_months"], mask=mask),
+        "score_by_dscr": density_grid(
+            result["dscr"], result["score"], METRIC_RANGES["dscr"], (0, 100), bins=(40, 20), mask=mask
+        ),
+    }
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def portfolio_row_order(book: tuple, decisions: tuple, order_by: str, descending: bool):
+    result = scored_portfolio(book)
+    return row_order(result, segment_mask(result, decisions), order_by, descending)
+
+def run_stage(stage: str, application_id: str, fingerprint: str, demo_pacing: bool, stage_timings: dict = None) -> tuple:
+    """
+    Run a stage and return (result, elapsed_ms) so the trace reports real work.
+    Elapsed time is also added to `stage_timings` under its lifecycle stage.
+    """
+    if demo_pacing:
+        time.sleep(DEMO_STEP_DELAYS[stage])
+    started = time.perf_counter()
+    if stage == "identity":
+        # Each Execute is a new verification session with its own id and timestamp
+        result = plaid_identity_verify(LOAN_APPLICATIONS[application_id])
+    else:
+        policy_version = DECISION_POLICY.current().version if stage == "decision" else None
+        result = run_stage_cached(stage, application_id, fingerprint, policy_version)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if stage_timings is not None:
+        lifecycle = STEP_LIFECYCLE_STAGES[stage]
+        stage_timings[lifecycle] = round(stage_timings.get(lifecycle, 0.0) + elapsed_ms, 3)
+    return result, elapsed_ms
+
+# =============================================================================
+# PAGE CONFIG + STYLING
+# =============================================================================
+# Applied from main() so importing this module has no Streamlit side effects
+
+APP_CSS = """
 <style>
     /* Main theme colors - Plaid inspired */
     :root {
@@ -133,465 +315,123 @@ st.markdown("""
     #MainMenu {visibility: hidden;}
     footer {visibility: hidden;}
 </style>
-""", unsafe_allow_html=True)
+"""
 
-# =============================================================================
-# SIMULATED PLAID DATA
-# =============================================================================
-# These represent real loan applications a lender would process
-LOAN_APPLICATIONS = {
-    "APP-2025-0847": {
-        "business_name": "Bright Future LLC",
-        "business_type": "E-commerce (Shopify)",
-        "years_in_business": 3,
-        "loan_amount": 75000,
-        "loan_purpose": "Inventory Purchase",
-        "owner_name": "Sarah Chen",
-        "owner_fico": 720,
-        "plaid_linked": True,
-        "linked_accounts": [
-            {"institution": "Chase", "name": "Business Checking", "type": "depository", "subtype": "checking", "balance": 34521.00, "account_id": "acc_chase_001"},
-            {"institution": "Chase", "name": "Business Savings", "type": "depository", "subtype": "savings", "balance": 89200.00, "account_id": "acc_chase_002"},
-            {"institution": "American Express", "name": "Business Gold Card", "type": "credit", "subtype": "credit card", "balance": -12400.00, "limit": 50000, "account_id": "acc_amex_001"}
-        ],
-        "transactions_90d": [
-            {"date": "2025-01-27", "name": "STRIPE TRANSFER", "amount": 8420.00, "category": ["Transfer", "Credit"], "merchant": "Stripe"},
-            {"date": "2025-01-26", "name": "GUSTO PAYROLL", "amount": -12500.00, "category": ["Transfer", "Payroll"], "merchant": "Gusto"},
-            {"date": "2025-01-25", "name": "AWS SERVICES", "amount": -2340.00, "category": ["Service", "Software"], "merchant": "Amazon Web Services"},
-            {"date": "2025-01-24", "name": "STRIPE TRANSFER", "amount": 6200.00, "category": ["Transfer", "Credit"], "merchant": "Stripe"},
-            {"date": "2025-01-23", "name": "COMMERCIAL LEASE PMT", "amount": -4500.00, "category": ["Payment", "Rent"], "merchant": "Parkview Properties"},
-            {"date": "2025-01-22", "name": "QUICKBOOKS SUBSCRIPTION", "amount": -85.00, "category": ["Service", "Software"], "merchant": "Intuit"},
-            {"date": "2025-01-20", "name": "STRIPE TRANSFER", "amount": 11200.00, "category": ["Transfer", "Credit"], "merchant": "Stripe"},
-            {"date": "2025-01-18", "name": "INVENTORY - ALIBABA", "amount": -18500.00, "category": ["Payment", "Merchandise"], "merchant": "Alibaba"},
-            {"date": "2025-01-15", "name": "STRIPE TRANSFER", "amount": 9800.00, "category": ["Transfer", "Credit"], "merchant": "Stripe"},
-            {"date": "2025-01-12", "name": "GUSTO PAYROLL", "amount": -12500.00, "category": ["Transfer", "Payroll"], "merchant": "Gusto"},
-            {"date": "2025-01-10", "name": "FACEBOOK ADS", "amount": -3200.00, "category": ["Service", "Advertising"], "merchant": "Meta"},
-            {"date": "2025-01-08", "name": "STRIPE TRANSFER", "amount": 7650.00, "category": ["Transfer", "Credit"], "merchant": "Stripe"},
-        ],
-        "bank_income": {
-            "verified_income": 48000,  # Monthly
-            "income_sources": [{"source": "Stripe", "monthly_avg": 43000, "confidence": 0.94}, {"source": "Other", "monthly_avg": 5000, "confidence": 0.78}],
-            "income_stability": "HIGH",
-            "months_of_history": 24
-        },
-        "risk_signals": {
-            "nsf_overdraft_count_90d": 0,
-            "negative_balance_days_90d": 0,
-            "account_age_days": 1095,
-            "fraud_signals": [],
-            "beacon_network_flags": 0
-        }
-    },
-    "APP-2025-0923": {
-        "business_name": "QuickLaunch AI Inc",
-        "business_type": "SaaS Startup",
-        "years_in_business": 0.7,
-        "loan_amount": 150000,
-        "loan_purpose": "Working Capital / Runway Extension",
-        "owner_name": "Marcus Johnson",
-        "owner_fico": 695,
-        "plaid_linked": True,
-        "linked_accounts": [
-            {"institution": "Mercury", "name": "Operating Account", "type": "depository", "subtype": "checking", "balance": 12890.00, "account_id": "acc_merc_001"},
-            {"institution": "Brex", "name": "Corporate Card", "type": "credit", "subtype": "credit card", "balance": -28900.00, "limit": 75000, "account_id": "acc_brex_001"}
-        ],
-        "transactions_90d": [
-            {"date": "2025-01-27", "name": "INVESTOR WIRE - SEED", "amount": 50000.00, "category": ["Transfer", "Credit"], "merchant": "Wire Transfer"},
-            {"date": "2025-01-26", "name": "GUSTO PAYROLL", "amount": -18000.00, "category": ["Transfer", "Payroll"], "merchant": "Gusto"},
-            {"date": "2025-01-24", "name": "GOOGLE CLOUD", "amount": -4200.00, "category": ["Service", "Software"], "merchant": "Google"},
-            {"date": "2025-01-22", "name": "STRIPE PAYOUT", "amount": 4200.00, "category": ["Transfer", "Credit"], "merchant": "Stripe"},
-            {"date": "2025-01-20", "name": "AWS SERVICES", "amount": -3200.00, "category": ["Service", "Software"], "merchant": "Amazon Web Services"},
-            {"date": "2025-01-18", "name": "LINKEDIN ADS", "amount": -5500.00, "category": ["Service", "Advertising"], "merchant": "LinkedIn"},
-            {"date": "2025-01-15", "name": "STRIPE PAYOUT", "amount": 3800.00, "category": ["Transfer", "Credit"], "merchant": "Stripe"},
-            {"date": "2025-01-12", "name": "GUSTO PAYROLL", "amount": -18000.00, "category": ["Transfer", "Payroll"], "merchant": "Gusto"},
-            {"date": "2025-01-10", "name": "OFFICE RENT", "amount": -6500.00, "category": ["Payment", "Rent"], "merchant": "WeWork"},
-        ],
-        "bank_income": {
-            "verified_income": 22000,
-            "income_sources": [{"source": "Stripe", "monthly_avg": 18000, "confidence": 0.82}, {"source": "Investor Funding", "monthly_avg": 50000, "confidence": 0.65}],
-            "income_stability": "LOW",
-            "months_of_history": 8
-        },
-        "risk_signals": {
-            "nsf_overdraft_count_90d": 2,
-            "negative_balance_days_90d": 5,
-            "account_age_days": 240,
-            "fraud_signals": [],
-            "beacon_network_flags": 0
-        }
-    },
-    "APP-2025-1042": {
-        "business_name": "Riverside Dental Group",
-        "business_type": "Healthcare / Dental Practice",
-        "years_in_business": 7,
-        "loan_amount": 250000,
-        "loan_purpose": "Practice Expansion - New Location",
-        "owner_name": "Dr. Amanda Reyes",
-        "owner_fico": 780,
-        "plaid_linked": True,
-        "linked_accounts": [
-            {"institution": "Bank of America", "name": "Business Checking", "type": "depository", "subtype": "checking", "balance": 156000.00, "account_id": "acc_bofa_001"},
-            {"institution": "Bank of America", "name": "Money Market", "type": "depository", "subtype": "savings", "balance": 420000.00, "account_id": "acc_bofa_002"},
-            {"institution": "Chase", "name": "Ink Business Unlimited", "type": "credit", "subtype": "credit card", "balance": -8200.00, "limit": 35000, "account_id": "acc_chase_003"}
-        ],
-        "transactions_90d": [
-            {"date": "2025-01-27", "name": "INSURANCE REIMBURSEMENT - DELTA", "amount": 42000.00, "category": ["Transfer", "Credit"], "merchant": "Delta Dental"},
-            {"date": "2025-01-26", "name": "ADP PAYROLL", "amount": -65000.00, "category": ["Transfer", "Payroll"], "merchant": "ADP"},
-            {"date": "2025-01-25", "name": "PATIENT PAYMENTS - BATCH", "amount": 28500.00, "category": ["Transfer", "Credit"], "merchant": "Square"},
-            {"date": "2025-01-24", "name": "HENRY SCHEIN - SUPPLIES", "amount": -12400.00, "category": ["Payment", "Merchandise"], "merchant": "Henry Schein"},
-            {"date": "2025-01-23", "name": "INSURANCE REIMBURSEMENT - CIGNA", "amount": 38000.00, "category": ["Transfer", "Credit"], "merchant": "Cigna"},
-            {"date": "2025-01-22", "name": "COMMERCIAL LEASE", "amount": -8500.00, "category": ["Payment", "Rent"], "merchant": "Riverside Plaza LLC"},
-            {"date": "2025-01-20", "name": "INSURANCE REIMBURSEMENT - AETNA", "amount": 31000.00, "category": ["Transfer", "Credit"], "merchant": "Aetna"},
-            {"date": "2025-01-18", "name": "PATTERSON DENTAL", "amount": -8900.00, "category": ["Payment", "Merchandise"], "merchant": "Patterson Dental"},
-            {"date": "2025-01-15", "name": "PATIENT PAYMENTS - BATCH", "amount": 24200.00, "category": ["Transfer", "Credit"], "merchant": "Square"},
-            {"date": "2025-01-12", "name": "ADP PAYROLL", "amount": -65000.00, "category": ["Transfer", "Payroll"], "merchant": "ADP"},
-        ],
-        "bank_income": {
-            "verified_income": 185000,
-            "income_sources": [{"source": "Insurance Reimbursements", "monthly_avg": 142000, "confidence": 0.97}, {"source": "Patient Payments", "monthly_avg": 43000, "confidence": 0.95}],
-            "income_stability": "HIGH",
-            "months_of_history": 84
-        },
-        "risk_signals": {
-            "nsf_overdraft_count_90d": 0,
-            "negative_balance_days_90d": 0,
-            "account_age_days": 2520,
-            "fraud_signals": [],
-            "beacon_network_flags": 0
-        }
-    }
-}
+def configure_page():
+    st.set_page_config(
+        page_title="Credit Decisioning Agent | Plaid Infrastructure",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # =============================================================================
-# PLAID API SIMULATION FUNCTIONS
+# PORTFOLIO VIEW
 # =============================================================================
 
-def plaid_identity_verify(app_data: dict) -> dict:
-    """Simulate Plaid Identity + Layer verification"""
-    return {
-        "verified": True,
-        "verification_method": "plaid_layer",
-        "identity_match_score": 0.98,
-        "business_name_match": True,
-        "owner_name_match": True,
-        "address_match": True,
-        "verification_timestamp": datetime.now().isoformat(),
-        "session_id": f"plaid_session_{app_data['business_name'][:3].lower()}_{np.random.randint(10000, 99999)}"
-    }
-
-def plaid_get_accounts(app_data: dict) -> dict:
-    """Simulate Plaid Accounts endpoint"""
-    return {
-        "accounts": app_data["linked_accounts"],
-        "item_id": f"item_{np.random.randint(100000, 999999)}",
-        "request_id": f"req_{np.random.randint(100000, 999999)}"
-    }
-
-def plaid_get_transactions(app_data: dict) -> dict:
-    """Simulate Plaid Transactions endpoint"""
-    return {
-        "transactions": app_data["transactions_90d"],
-        "total_transactions": len(app_data["transactions_90d"]),
-        "request_id": f"req_{np.random.randint(100000, 999999)}"
-    }
-
-def plaid_bank_income(app_data: dict) -> dict:
-    """Simulate Plaid Bank Income endpoint (ML-verified income)"""
-    return {
-        "bank_income": app_data["bank_income"],
-        "confidence_level": "HIGH" if app_data["bank_income"]["income_stability"] == "HIGH" else "MEDIUM",
-        "request_id": f"req_{np.random.randint(100000, 999999)}"
-    }
+def histogram_bars(histogram: dict, name: str = None, color: str = None):
+    import plotly.graph_objects as go
 
-def plaid_signal_score(app_data: dict) -> dict:
-    """
-    Simulate Plaid Signal - ACH risk scoring
-    Uses 1000+ factors from bank data to predict ACH return risk
-    """
-    risk = app_data["risk_signals"]
-    
-    # Calculate base score (higher = lower risk, 0-100 scale)
-    base_score = 70
-    
-    # Adjustments based on risk factors
-    if risk["nsf_overdraft_count_90d"] == 0:
-        base_score += 15
-    else:
-        base_score -= (risk["nsf_overdraft_count_90d"] * 8)
-    
-    if risk["negative_balance_days_90d"] == 0:
-        base_score += 10
-    else:
-        base_score -= (risk["negative_balance_days_90d"] * 2)
-    
-    if risk["account_age_days"] > 365:
-        base_score += 5
-    if risk["account_age_days"] > 730:
-        base_score += 5
-    
-    base_score = max(0, min(100, base_score))
-    
-    return {
-        "signal_score": round(base_score, 1),
-        "risk_tier": "LOW" if base_score >= 75 else ("MEDIUM" if base_score >= 50 else "HIGH"),
-        "factors": {
-            "nsf_overdraft_history": "GOOD" if risk["nsf_overdraft_count_90d"] == 0 else "CONCERN",
-            "balance_stability": "GOOD" if risk["negative_balance_days_90d"] == 0 else "CONCERN",
-            "account_tenure": "ESTABLISHED" if risk["account_age_days"] > 365 else "NEW"
-        },
-        "request_id": f"req_{np.random.randint(100000, 999999)}"
-    }
+    edges = histogram["edges"]
+    return go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=histogram["counts"], width=edges[1] - edges[0],
+                  name=name, marker_color=color)
 
-def plaid_beacon_check(app_data: dict) -> dict:
-    """
-    Simulate Plaid Beacon - Fraud network consortium
-    Checks against 8,000+ apps' fraud data
-    """
-    return {
-        "fraud_detected": app_data["risk_signals"]["beacon_network_flags"] > 0,
-        "fraud_signals": app_data["risk_signals"]["fraud_signals"],
-        "network_alerts": app_data["risk_signals"]["beacon_network_flags"],
-        "identity_fraud_risk": "LOW",
-        "synthetic_fraud_risk": "LOW",
-        "request_id": f"req_{np.random.randint(100000, 999999)}"
-    }
+def render_portfolio():
+    import pandas as pd
+    import plotly.graph_objects as go
 
-def plaid_trust_index(app_data: dict) -> dict:
-    """
-    Simulate Plaid Trust Index v2 - Graph Neural Network fraud detection
-    Uses entity relationships across the Plaid network
-    """
-    risk = app_data["risk_signals"]
-    
-    # Higher = more trustworthy (0-1 scale)
-    trust_score = 0.85
-    
-    if risk["beacon_network_flags"] == 0:
-        trust_score += 0.08
-    else:
-        trust_score -= 0.30
-    
-    if risk["nsf_overdraft_count_90d"] == 0:
-        trust_score += 0.05
+    st.markdown("### Portfolio")
+    policy_version = DECISION_POLICY.current().version
+    book = stored_book_key(policy_version)
+    sources = ("Feature store", "Synthetic demo book") if book else ("Synthetic demo book",)
+    source = st.radio("Book", sources, horizontal=True)
+    if source == "Feature store":
+        st.caption(f"Applications in `{FEATURE_STORE_DIR}`, scored under policy {policy_version}")
+        col3 = st.columns(1)[0]
     else:
-        trust_score -= (risk["nsf_overdraft_count_90d"] * 0.08)
-    
-    if app_data["years_in_business"] >= 2:
-        trust_score += 0.02
-    
-    trust_score = max(0, min(1, trust_score))
-    
-    return {
-        "trust_index": round(trust_score, 3),
-        "percentile": int(trust_score * 100),
-        "entity_graph_signals": {
-            "connected_institutions": len(app_data["linked_accounts"]),
-            "account_velocity": "NORMAL",
-            "cross_network_risk": "LOW"
-        },
-        "request_id": f"req_{np.random.randint(100000, 999999)}"
-    }
+        if not book:
+            st.caption(f"No feature store at `{FEATURE_STORE_DIR}` (set FEATURE_STORE_DIR)")
+        st.warning("Synthetic demo book: generated applications, not real decisions")
+        col1, col2, col3 = st.columns([2, 1, 3])
+        n_rows = col1.select_slider("Decisions", options=PORTFOLIO_SIZES, value=PORTFOLIO_SIZES[1],
+                                    format_func=lambda n: f"{n:,}")
+        seed = int(col2.number_input("Seed", min_value=0, value=0, step=1))
+        book = ("synthetic", n_rows, seed, policy_version)
+    decisions = tuple(col3.multiselect("Decisions shown", ["APPROVED", "MANUAL_REVIEW", "DENIED"],
+                                       default=["APPROVED", "MANUAL_REVIEW", "DENIED"]))
+    aggregates = portfolio_aggregates(book, decisions)
+    summary = aggregates["summary"]
 
-# =============================================================================
-# CREDIT ANALYSIS FUNCTIONS
-# =============================================================================
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Decisions", f"{summary['rows']:,}")
+    col2.metric("Approval Rate", f"{summary['rates']['APPROVED']:.1%}")
+    col3.metric("Manual Review", f"{summary['rates']['MANUAL_REVIEW']:.1%}")
+    col4.metric("Mean Score", f"{summary['mean_score']:.1f}")
 
-def calculate_cash_flow_metrics(app_data: dict) -> dict:
-    """Calculate key cash flow metrics from transaction data"""
-    txns = app_data["transactions_90d"]
-    
-    inflows = sum(t["amount"] for t in txns if t["amount"] > 0)
-    outflows = abs(sum(t["amount"] for t in txns if t["amount"] < 0))
-    
-    # Categorize expenses
-    payroll = abs(sum(t["amount"] for t in txns if "Payroll" in str(t.get("category", []))))
-    rent = abs(sum(t["amount"] for t in txns if "Rent" in str(t.get("category", []))))
-    software = abs(sum(t["amount"] for t in txns if "Software" in str(t.get("category", []))))
-    
-    # Estimate monthly (data is 90 days)
-    monthly_inflow = inflows / 3
-    monthly_outflow = outflows / 3
-    monthly_net = monthly_inflow - monthly_outflow
-    
-    return {
-        "total_inflows_90d": round(inflows, 2),
-        "total_outflows_90d": round(outflows, 2),
-        "monthly_avg_inflow": round(monthly_inflow, 2),
-        "monthly_avg_outflow": round(monthly_outflow, 2),
-        "monthly_net_cash_flow": round(monthly_net, 2),
-        "payroll_90d": round(payroll, 2),
-        "rent_90d": round(rent, 2),
-        "operating_margin": round((monthly_net / monthly_inflow * 100) if monthly_inflow > 0 else 0, 1)
-    }
+    colors = {"APPROVED": "#16A34A", "MANUAL_REVIEW": "#F59E0B", "DENIED": "#DC2626"}
+    col1, col2 = st.columns(2)
+    with col1:
+        scores = aggregates["scores"]
+        fig = go.Figure([
+            histogram_bars({"edges": scores["edges"], "counts": counts}, label, colors[label])
+            for label, counts in scores["counts"].items()
+        ])
+        fig.update_layout(barmode="stack", title="Score Distribution", height=320, margin=dict(t=50, b=30))
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        factors = aggregates["factors"]
+        fig = go.Figure([
+            go.Bar(y=list(factors), x=[rates[status] for rates in factors.values()], name=status,
+                   orientation="h", marker_color=color)
+            for status, color in (("FAIL", "#DC2626"), ("MARGINAL", "#F59E0B"))
+        ])
+        fig.update_layout(barmode="stack", title="Factor Failure Rates", height=320, margin=dict(t=50, b=30),
+                          xaxis_tickformat=".0%")
+        st.plotly_chart(fig, use_container_width=True)
 
-def calculate_debt_metrics(app_data: dict, loan_amount: int) -> dict:
-    """Calculate debt service coverage ratio and related metrics"""
-    bank_income = app_data["bank_income"]["verified_income"]
-    cash_flow = calculate_cash_flow_metrics(app_data)
-    
-    # Get current debt payments (credit card minimums, etc.)
-    current_debt = sum(abs(a["balance"]) for a in app_data["linked_accounts"] if a["type"] == "credit")
-    credit_limit = sum(a.get("limit", 0) for a in app_data["linked_accounts"] if a["type"] == "credit")
-    utilization = (current_debt / credit_limit * 100) if credit_limit > 0 else 0
-    
-    # Estimate monthly payment on requested loan (simplified: 5-year term, 10% APR)
-    monthly_rate = 0.10 / 12
-    num_payments = 60
-    estimated_payment = loan_amount * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
-    
-    # DSCR = Net Operating Income / Debt Service
-    net_income = cash_flow["monthly_net_cash_flow"]
-    dscr = net_income / estimated_payment if estimated_payment > 0 else 0
-    
-    # DTI (Debt-to-Income)
-    dti = (estimated_payment / bank_income * 100) if bank_income > 0 else 100
-    
-    return {
-        "dscr": round(dscr, 2),
-        "dti_ratio": round(dti, 1),
-        "estimated_monthly_payment": round(estimated_payment, 2),
-        "current_debt": round(current_debt, 2),
-        "credit_utilization": round(utilization, 1),
-        "net_operating_income": round(net_income, 2)
-    }
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = go.Figure([histogram_bars(aggregates["dscr"], "DSCR", "#0055FF")])
+        fig.update_layout(title="DSCR", height=280, margin=dict(t=50, b=30))
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        grid = aggregates["score_by_dscr"]
+        fig = go.Figure(go.Heatmap(
+            x=(grid["x_edges"][:-1] + grid["x_edges"][1:]) / 2, y=(grid["y_edges"][:-1] + grid["y_edges"][1:]) / 2,
+            z=grid["counts"], colorscale="Blues",
+        ))
+        fig.update_layout(title="Score by DSCR", height=280, margin=dict(t=50, b=30),
+                          xaxis_title="DSCR", yaxis_title="Score")
+        st.plotly_chart(fig, use_container_width=True)
 
-def calculate_liquidity_metrics(app_data: dict, loan_amount: int) -> dict:
-    """Calculate liquidity and runway metrics"""
-    cash_flow = calculate_cash_flow_metrics(app_data)
-    
-    # Total liquid assets
-    liquid_assets = sum(a["balance"] for a in app_data["linked_accounts"] if a["type"] == "depository" and a["balance"] > 0)
-    
-    # Runway (months of expenses covered by cash)
-    monthly_burn = cash_flow["monthly_avg_outflow"]
-    runway_months = liquid_assets / monthly_burn if monthly_burn > 0 else 0
-    
-    # Loan-to-cash ratio
-    loan_to_cash = loan_amount / liquid_assets if liquid_assets > 0 else float('inf')
-    
-    return {
-        "liquid_assets": round(liquid_assets, 2),
-        "runway_months": round(runway_months, 1),
-        "loan_to_cash_ratio": round(loan_to_cash, 2),
-        "monthly_burn_rate": round(monthly_burn, 2)
-    }
+    # Decisions, one page at a time
+    st.markdown("#### Decisions")
+    col1, col2, col3, col4 = st.columns(4)
+    order_by = col1.selectbox("Sort by", ("row",) + ROW_COLUMNS)
+    descending = col2.toggle("Descending", value=False)
+    page_size = col3.selectbox("Rows per page", PORTFOLIO_PAGE_SIZES)
+    pages = max(1, -(-summary["rows"] // page_size))
+    page = int(col4.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1))
 
-# =============================================================================
-# AGENT DECISION ENGINE
-# =============================================================================
-
-def agent_make_decision(app_data: dict, plaid_signals: dict, metrics: dict) -> dict:
-    """
-    AI Agent decision logic for credit approval
-    Returns decision with explainable factors
-    """
-    signal = plaid_signals["signal"]
-    beacon = plaid_signals["beacon"]
-    trust = plaid_signals["trust"]
-    debt = metrics["debt"]
-    liquidity = metrics["liquidity"]
-    
-    # Decision factors
-    factors = []
-    score = 0
-    max_score = 100
-    
-    # Factor 1: Plaid Signal Score (25 points)
-    if signal["signal_score"] >= 80:
-        score += 25
-        factors.append(("Signal Score", "PASS", f"{signal['signal_score']}/100 - Low ACH return risk"))
-    elif signal["signal_score"] >= 60:
-        score += 15
-        factors.append(("Signal Score", "MARGINAL", f"{signal['signal_score']}/100 - Moderate ACH risk"))
-    else:
-        score += 5
-        factors.append(("Signal Score", "FAIL", f"{signal['signal_score']}/100 - High ACH return risk"))
-    
-    # Factor 2: Trust Index (20 points)
-    if trust["trust_index"] >= 0.90:
-        score += 20
-        factors.append(("Trust Index", "PASS", f"{trust['trust_index']:.2f} - High network trust"))
-    elif trust["trust_index"] >= 0.75:
-        score += 12
-        factors.append(("Trust Index", "MARGINAL", f"{trust['trust_index']:.2f} - Moderate network trust"))
-    else:
-        score += 0
-        factors.append(("Trust Index", "FAIL", f"{trust['trust_index']:.2f} - Low network trust"))
-    
-    # Factor 3: Beacon Fraud Check (15 points)
-    if not beacon["fraud_detected"]:
-        score += 15
-        factors.append(("Beacon Fraud", "PASS", "No fraud signals in consortium network"))
-    else:
-        score += 0
-        factors.append(("Beacon Fraud", "FAIL", f"Fraud detected: {beacon['fraud_signals']}"))
-    
-    # Factor 4: DSCR (20 points)
-    if debt["dscr"] >= 1.5:
-        score += 20
-        factors.append(("DSCR", "PASS", f"{debt['dscr']}x - Strong debt service coverage"))
-    elif debt["dscr"] >= 1.2:
-        score += 12
-        factors.append(("DSCR", "MARGINAL", f"{debt['dscr']}x - Adequate debt service coverage"))
-    elif debt["dscr"] >= 1.0:
-        score += 6
-        factors.append(("DSCR", "MARGINAL", f"{debt['dscr']}x - Minimal debt service coverage"))
-    else:
-        score += 0
-        factors.append(("DSCR", "FAIL", f"{debt['dscr']}x - Insufficient debt service coverage"))
-    
-    # Factor 5: Liquidity (10 points)
-    if liquidity["runway_months"] >= 6:
-        score += 10
-        factors.append(("Liquidity", "PASS", f"{liquidity['runway_months']} months runway"))
-    elif liquidity["runway_months"] >= 3:
-        score += 5
-        factors.append(("Liquidity", "MARGINAL", f"{liquidity['runway_months']} months runway"))
-    else:
-        score += 0
-        factors.append(("Liquidity", "FAIL", f"{liquidity['runway_months']} months runway - Low cash buffer"))
-    
-    # Factor 6: Income Verification (10 points)
-    income_data = app_data["bank_income"]
-    if income_data["income_stability"] == "HIGH" and income_data["months_of_history"] >= 12:
-        score += 10
-        factors.append(("Income Verification", "PASS", f"Verified ${income_data['verified_income']:,}/mo - High stability"))
-    elif income_data["months_of_history"] >= 6:
-        score += 5
-        factors.append(("Income Verification", "MARGINAL", f"Verified ${income_data['verified_income']:,}/mo - Limited history"))
-    else:
-        score += 0
-        factors.append(("Income Verification", "FAIL", f"Insufficient income history ({income_data['months_of_history']} months)"))
-    
-    # Make decision
-    if beacon["fraud_detected"]:
-        decision = "DENIED"
-        reason = "Fraud signals detected in Beacon network"
-    elif score >= 75:
-        decision = "APPROVED"
-        reason = f"Strong credit profile (Score: {score}/{max_score})"
-    elif score >= 55:
-        decision = "MANUAL_REVIEW"
-        reason = f"Marginal credit profile requires human review (Score: {score}/{max_score})"
-    else:
-        decision = "DENIED"
-        reason = f"Credit profile does not meet underwriting criteria (Score: {score}/{max_score})"
-    
-    return {
-        "decision": decision,
-        "reason": reason,
-        "score": score,
-        "max_score": max_score,
-        "factors": factors,
-        "timestamp": datetime.now().isoformat(),
-        "audit_id": f"AUD-{datetime.now().strftime('%Y%m%d')}-{np.random.randint(10000, 99999)}"
-    }
+    order = portfolio_row_order(book, decisions, None if order_by == "row" else order_by, descending)
+    window = row_window(scored_portfolio(book), order, (page - 1) * page_size, page_size)
+    money = st.column_config.NumberColumn(format="dollar")
+    st.dataframe(
+        pd.DataFrame(window),
+        use_container_width=True,
+        hide_index=True,
+        column_config={"monthly_net_cash_flow": money, "estimated_monthly_payment": money},
+    )
 
 # =============================================================================
 # STREAMLIT UI
 # =============================================================================
 
 def main():
+    import pandas as pd
+    
+    configure_page()
+    
     # Sidebar
     with st.sidebar:
         st.markdown("### Plaid Infrastructure")
@@ -632,6 +472,14 @@ PERCEIVE → REASON → VERIFY → ACT
 4. Decision + Audit trail
         """, language=None)
         
+        st.markdown("---")
+        view = st.radio("View", ("Single application", "Portfolio"))
+        demo_pacing = st.toggle(
+            "Demo pacing",
+            value=False,
+            help="Pause between steps for narrated walkthroughs. Off: each step completes as soon as its work does."
+        )
+        
         st.markdown("---")
         st.markdown("### Source")
         st.markdown("""
@@ -653,6 +501,10 @@ PERCEIVE → REASON → VERIFY → ACT
     </div>
     """, unsafe_allow_html=True)
     
+    if view == "Portfolio":
+        render_portfolio()
+        return
+
     # Application selector
     st.markdown("### Select Loan Application")
     
@@ -675,14 +527,15 @@ PERCEIVE → REASON → VERIFY → ACT
     
     if st.button("Execute Credit Decisioning", type="primary", use_container_width=True):
         app_data = LOAN_APPLICATIONS[selected_app_id]
+        fingerprint = application_fingerprint(app_data)
+        stage_timings = {}
         
         st.markdown("---")
         st.markdown("### Agent Processing Trace")
         
         # Step 1: Identity Verification
         with st.status("Step 1: Verifying identity via Plaid Layer...", expanded=True) as status:
-            time.sleep(0.8)
-            identity = plaid_identity_verify(app_data)
+            identity, elapsed_ms = run_stage("identity", selected_app_id, fingerprint, demo_pacing, stage_timings)
             st.markdown(f"""
             <span class="data-source-tag">PLAID LAYER</span>
             <span class="data-source-tag">PLAID IDENTITY</span>
@@ -692,14 +545,13 @@ PERCEIVE → REASON → VERIFY → ACT
             **Match Score:** {identity['identity_match_score']}  
             **Session:** `{identity['session_id']}`
             """, unsafe_allow_html=True)
-            status.update(label="Step 1: Identity Verified ✓", state="complete")
+            status.update(label=f"Step 1: Identity Verified ✓ ({elapsed_ms:.1f} ms)", state="complete")
         
         # Step 2: Fetch Financial Data
         with st.status("Step 2: Fetching financial data via MCP Server...", expanded=True) as status:
-            time.sleep(1.0)
-            accounts = plaid_get_accounts(app_data)
-            transactions = plaid_get_transactions(app_data)
-            bank_income = plaid_bank_income(app_data)
+            data, elapsed_ms = run_stage("data", selected_app_id, fingerprint, demo_pacing, stage_timings)
+            accounts = data["accounts"]
+            bank_income = data["bank_income"]
             
             st.markdown(f"""
             <span class="data-source-tag">PLAID MCP SERVER</span>
@@ -710,22 +562,26 @@ PERCEIVE → REASON → VERIFY → ACT
             # Show accounts
             st.markdown("**Linked Accounts:**")
             acc_df = pd.DataFrame(accounts["accounts"])
-            acc_df["balance"] = acc_df["balance"].apply(lambda x: f"${x:,.2f}")
-            st.dataframe(acc_df[["institution", "name", "type", "balance"]], use_container_width=True, hide_index=True)
+            st.dataframe(
+                acc_df[["institution", "name", "type", "balance"]],
+                use_container_width=True,
+                hide_index=True,
+                column_config={"balance": st.column_config.NumberColumn(format="dollar")},
+            )
             
             st.markdown(f"""
             **Bank Income (ML-Verified):** ${bank_income['bank_income']['verified_income']:,}/month  
             **Income Stability:** {bank_income['bank_income']['income_stability']}  
             **History:** {bank_income['bank_income']['months_of_history']} months
             """)
-            status.update(label="Step 2: Financial Data Retrieved ✓", state="complete")
+            status.update(label=f"Step 2: Financial Data Retrieved ✓ ({elapsed_ms:.1f} ms)", state="complete")
         
         # Step 3: Calculate Metrics
         with st.status("Step 3: Analyzing cash flow and credit metrics...", expanded=True) as status:
-            time.sleep(0.8)
-            cash_flow = calculate_cash_flow_metrics(app_data)
-            debt_metrics = calculate_debt_metrics(app_data, app_data["loan_amount"])
-            liquidity_metrics = calculate_liquidity_metrics(app_data, app_data["loan_amount"])
+            credit, elapsed_ms = run_stage("metrics", selected_app_id, fingerprint, demo_pacing, stage_timings)
+            cash_flow = credit["cash_flow"]
+            debt_metrics = credit["debt"]
+            liquidity_metrics = credit["liquidity"]
             
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("Monthly Revenue", f"${cash_flow['monthly_avg_inflow']:,.0f}")
@@ -733,14 +589,14 @@ PERCEIVE → REASON → VERIFY → ACT
             col3.metric("DTI Ratio", f"{debt_metrics['dti_ratio']}%")
             col4.metric("Cash Runway", f"{liquidity_metrics['runway_months']} mo")
             
-            status.update(label="Step 3: Credit Metrics Calculated ✓", state="complete")
+            status.update(label=f"Step 3: Credit Metrics Calculated ✓ ({elapsed_ms:.1f} ms)", state="complete")
         
         # Step 4: Risk Assessment
         with st.status("Step 4: Assessing risk via Signal + Beacon + Trust Index...", expanded=True) as status:
-            time.sleep(1.2)
-            signal = plaid_signal_score(app_data)
-            beacon = plaid_beacon_check(app_data)
-            trust = plaid_trust_index(app_data)
+            plaid_signals, elapsed_ms = run_stage("risk", selected_app_id, fingerprint, demo_pacing, stage_timings)
+            signal = plaid_signals["signal"]
+            beacon = plaid_signals["beacon"]
+            trust = plaid_signals["trust"]
             
             st.markdown(f"""
             <span class="data-source-tag">PLAID SIGNAL</span>
@@ -752,39 +608,17 @@ PERCEIVE → REASON → VERIFY → ACT
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=signal["signal_score"],
-                    title={'text': "<span style='color:#14B8A6'>Signal Score</span>"},
-                    gauge={
-                        'axis': {'range': [0, 100]},
-                        'bar': {'color': "#14B8A6"},
-                        'steps': [
-                            {'range': [0, 50], 'color': "#FEE2E2"},
-                            {'range': [50, 75], 'color': "#FEF3C7"},
-                            {'range': [75, 100], 'color': "#D1FAE5"}
-                        ]
-                    }
-                ))
-                fig.update_layout(height=200, margin=dict(t=80, b=0, l=30, r=30))
+                fig = gauge_figure(
+                    signal["signal_score"], "<span style='color:#14B8A6'>Signal Score</span>", 100, "#14B8A6",
+                    ((0, 50, "#FEE2E2"), (50, 75, "#FEF3C7"), (75, 100, "#D1FAE5"))
+                )
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=trust["trust_index"],
-                    title={'text': "Trust Index"},
-                    gauge={
-                        'axis': {'range': [0, 1]},
-                        'bar': {'color': "#0055FF"},
-                        'steps': [
-                            {'range': [0, 0.5], 'color': "#FEE2E2"},
-                            {'range': [0.5, 0.8], 'color': "#FEF3C7"},
-                            {'range': [0.8, 1], 'color': "#D1FAE5"}
-                        ]
-                    }
-                ))
-                fig.update_layout(height=200, margin=dict(t=80, b=0, l=30, r=30))
+                fig = gauge_figure(
+                    trust["trust_index"], "Trust Index", 1, "#0055FF",
+                    ((0, 0.5, "#FEE2E2"), (0.5, 0.8, "#FEF3C7"), (0.8, 1, "#D1FAE5"))
+                )
                 st.plotly_chart(fig, use_container_width=True)
             
             with col3:
@@ -798,18 +632,15 @@ PERCEIVE → REASON → VERIFY → ACT
                 </div>
                 """, unsafe_allow_html=True)
             
-            status.update(label="Step 4: Risk Assessment Complete ✓", state="complete")
+            status.update(label=f"Step 4: Risk Assessment Complete ✓ ({elapsed_ms:.1f} ms)", state="complete")
         
         # Step 5: Decision
         with st.status("Step 5: Making credit decision...", expanded=True) as status:
-            time.sleep(0.6)
-            
-            plaid_signals = {"signal": signal, "beacon": beacon, "trust": trust}
             metrics = {"debt": debt_metrics, "liquidity": liquidity_metrics}
+            scored, elapsed_ms = run_stage("decision", selected_app_id, fingerprint, demo_pacing, stage_timings)
+            decision = stamp_decision(scored)
             
-            decision = agent_make_decision(app_data, plaid_signals, metrics)
-            
-            status.update(label="Step 5: Decision Rendered ✓", state="complete")
+            status.update(label=f"Step 5: Decision Rendered ✓ ({elapsed_ms:.1f} ms)", state="complete")
         
         # Display Decision
         st.markdown("---")
@@ -841,6 +672,24 @@ PERCEIVE → REASON → VERIFY → ACT
             st.markdown(f"**Loan Amount:** ${app_data['loan_amount']:,}")
             st.markdown(f"**Decision Reason:** {decision['reason']}")
             st.markdown(f"**Timestamp:** {decision['timestamp']}")
+            if decision["decision"] != "APPROVED":
+                # Decisions price the loan over LOAN_TERM_MONTHS, so only a standard-term
+                # amount "would be approved" on resubmission; longer terms are shown apart
+                counter_offer = max_approvable_loan(app_data, terms=(LOAN_TERM_MONTHS,))
+                any_term = max_approvable_loan(app_data)
+                if counter_offer and counter_offer["loan_amount"] < app_data["loan_amount"]:
+                    st.info(
+                        f"**Counter-offer:** ${counter_offer['loan_amount']:,.0f} over {counter_offer['term_months']} months "
+                        f"(${counter_offer['monthly_payment']:,.2f}/mo, DSCR {counter_offer['dscr']}x) would be approved"
+                    )
+                if any_term and any_term["term_months"] != LOAN_TERM_MONTHS:
+                    st.info(
+                        f"**Longer term:** ${any_term['loan_amount']:,.0f} over {any_term['term_months']} months "
+                        f"(${any_term['monthly_payment']:,.2f}/mo, DSCR {any_term['dscr']}x) meets the policy, "
+                        f"but decisions are priced over {LOAN_TERM_MONTHS} months, so it needs a term change"
+                    )
+                if counter_offer is None and any_term is None:
+                    st.caption("No loan amount up to the requested one would be approved")
         
         # Decision Factors
         st.markdown("### Decision Factors (Explainability)")
@@ -856,47 +705,25 @@ PERCEIVE → REASON → VERIFY → ACT
                 return "background-color: #FEF3C7; color: #92400E"
         
         st.dataframe(
-            factors_df.style.applymap(color_result, subset=["Result"]),
+            factors_df.style.map(color_result, subset=["Result"]),
             use_container_width=True,
             hide_index=True
         )
         
+        # Offer Grid
+        with st.expander("Loan Offers (Term x APR Pricing Grid)"):
+            offers = generate_offers(app_data, cash_flow, signal["risk_tier"])
+            if offers:
+                st.caption(f"{signal['risk_tier']} risk tier pricing - offers with DSCR of at least 1.2x")
+                st.dataframe(pd.DataFrame(offers), use_container_width=True, hide_index=True)
+            else:
+                st.caption("No term / APR / amount combination reaches 1.2x DSCR")
+        
         # Audit Trail
         with st.expander("Full Audit Trail (Compliance)"):
-            audit_data = {
-                "audit_id": decision["audit_id"],
-                "timestamp": decision["timestamp"],
-                "application_id": selected_app_id,
-                "applicant": app_data["business_name"],
-                "loan_amount": app_data["loan_amount"],
-                "loan_purpose": app_data["loan_purpose"],
-                "decision": decision["decision"],
-                "decision_reason": decision["reason"],
-                "decision_score": f"{decision['score']}/{decision['max_score']}",
-                "plaid_data_sources": [
-                    "plaid_layer",
-                    "plaid_identity",
-                    "plaid_mcp_server",
-                    "plaid_transactions",
-                    "plaid_bank_income",
-                    "plaid_signal",
-                    "plaid_beacon",
-                    "plaid_trust_index_v2"
-                ],
-                "risk_scores": {
-                    "signal_score": signal["signal_score"],
-                    "trust_index": trust["trust_index"],
-                    "beacon_fraud_detected": beacon["fraud_detected"]
-                },
-                "credit_metrics": {
-                    "dscr": debt_metrics["dscr"],
-                    "dti_ratio": debt_metrics["dti_ratio"],
-                    "runway_months": liquidity_metrics["runway_months"]
-                },
-                "decision_factors": decision["factors"],
-                "agent_version": "credit-agent-v1.0",
-                "model_id": "plaid-underwriting-2025"
-            }
+            audit_data = build_audit_record(selected_app_id, app_data, decision, plaid_signals, metrics, stage_timings)
+            # Each Execute stamps a new audit_id (stamp_decision), so this runs once per decision
+            shared_audit_log().append(audit_data, durable=True)
             st.json(audit_data)
 
         with st.expander("Product Rationale: Real-Time Data in Credit Decisions"):
@@ -0,0 +1,133 @@
+"""
+Champion / challenger evaluation of decision policies.
+
+The decision features for the whole book (Plaid risk scores, credit
+metrics, income fields) are computed once. Every policy is then evaluated
+over the same feature arrays, and factors or overrides that policies have
+in common are bucketed only once. For each challenger the report gives the
+decision-flip matrix against the champion and the change in decision rates.
+
+    python policy_comparison.py challenger_a.json challenger_b.json --input applications.jsonl
+    python policy_comparison.py challenger_a.json --rows 1000000
+    python policy_comparison.py challenger_a.json --feature-store feature_store/
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from decision_policy import APPROVED, DECISION_LABEL_LIST, DECISION_POLICY, CompiledPolicy, compile_policy
+from feature_store import FeatureStore, application_features
+from portfolio_scoring import batch_decision_features
+
+# =============================================================================
+# COMPARISON
+# =============================================================================
+
+def decision_rates(decision_code: np.ndarray) -> dict:
+    counts = np.bincount(decision_code, minlength=len(DECISION_LABEL_LIST))
+    total = max(len(decision_code), 1)
+    return {label: counts[i] / total for i, label in enumerate(DECISION_LABEL_LIST)}
+
+
+def flip_matrix(champion_code: np.ndarray, challenger_code: np.ndarray) -> np.ndarray:
+    """(champion decision, challenger decision) counts; off-diagonal cells are flips"""
+    n = len(DECISION_LABEL_LIST)
+    pairs = champion_code.astype(np.int64) * n + challenger_code
+    return np.bincount(pairs, minlength=n * n).reshape(n, n)
+
+
+def compare_policies(features: dict, challengers: dict, champion: CompiledPolicy = None) -> dict:
+    """
+    Evaluate the champion and every challenger ({name: CompiledPolicy}) over
+    one set of feature arrays (see portfolio_scoring.batch_decision_features).
+    """
+    champion = champion or DECISION_POLICY.current()
+    cache = {}
+    base = champion.evaluate(features, cache)
+    base_rates = decision_rates(base["decision_code"])
+    n_rows = len(base["decision_code"])
+
+    report = {
+        "rows": n_rows,
+        "champion": {"policy_version": champion.version, "decision_rates": base_rates},
+        "challengers": {},
+    }
+    for name, policy in challengers.items():
+        result = policy.evaluate(features, cache)
+        rates = decision_rates(result["decision_code"])
+        flips = flip_matrix(base["decision_code"], result["decision_code"])
+        flipped = n_rows - int(np.trace(flips))
+        report["challengers"][name] = {
+            "policy_version": policy.version,
+            "decision_rates": rates,
+            "decision_rate_deltas": {label: rates[label] - base_rates[label] for label in rates},
+            "approval_rate_delta": rates[DECISION_LABEL_LIST[APPROVED]] - base_rates[DECISION_LABEL_LIST[APPROVED]],
+            "flip_matrix": flips,
+            "flipped": flipped,
+            "flip_rate": flipped / n_rows if n_rows else 0.0,
+            "mean_score_delta": float(np.mean(result["score"] - base["score"])) if n_rows else 0.0,
+        }
+    return report
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+def print_report(report: dict, stream=sys.stdout):
+    labels = DECISION_LABEL_LIST
+    champion = report["champion"]
+    print(f"{report['rows']:,} applications | champion {champion['policy_version']}", file=stream)
+    print("  " + "  ".join(f"{label} {rate:6.2%}" for label, rate in champion["decision_rates"].items()), file=stream)
+    for name, result in report["challengers"].items():
+        print(f"\nchallenger {name} ({result['policy_version']})", file=stream)
+        print(f"  approval rate {result['decision_rates'][labels[APPROVED]]:6.2%} "
+              f"({result['approval_rate_delta']:+.2%})  flipped {result['flipped']:,} ({result['flip_rate']:.2%})  "
+              f"mean score {result['mean_score_delta']:+.2f}", file=stream)
+        width = max(len(label) for label in labels) + 2
+        print("  " + " " * width + "".join(f"{label:>{width}}" for label in labels) + "   (rows: champion)", file=stream)
+        for label, row in zip(labels, result["flip_matrix"]):
+            print("  " + f"{label:<{width}}" + "".join(f"{count:>{width},}" for count in row), file=stream)
+
+
+def _load_policy(path: str) -> CompiledPolicy:
+    with open(path, encoding="utf-8") as f:
+        return compile_policy(json.load(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare challenger decision policies against the active policy")
+    parser.add_argument("challengers", nargs="+", help="challenger policy JSON files")
+    parser.add_argument("--champion", help="champion policy JSON (default: the active policy)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input", help="applications JSONL (as read by batch_runner)")
+    source.add_argument("--rows", type=int, default=100_000, help="synthetic book size when no --input")
+    parser.add_argument("--feature-store", help="reuse stored features; without --input, compare over the whole stored book")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    store = FeatureStore(args.feature_store) if args.feature_store else None
+    if args.input:
+        from batch_runner import read_jsonl
+        with open(args.input, encoding="utf-8") as f:
+            applications = dict(read_jsonl(f))
+        features = application_features(applications, store)
+    elif store is not None:
+        _, features = store.load()
+    else:
+        from parallel_scoring import synthetic_columns
+        features = batch_decision_features(synthetic_columns(args.rows))
+
+    champion = _load_policy(args.champion) if args.champion else None
+    report = compare_policies(features, {path: _load_policy(path) for path in args.challengers}, champion)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as out:
+            json.dump(report, out, indent=2, default=lambda value: value.tolist())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Server-side aggregates for the Streamlit portfolio page.
+
+Takes a scored book (portfolio_scoring.score_portfolio / score_features)
+and reduces it to decision rates, fixed-bin histograms, factor status
+rates and count grids, and pages of rows in a chosen sort order. Every
+function takes an optional boolean row mask for one segment of the book.
+"""
+import numpy as np
+
+from decision_policy import DECISION_LABEL_LIST, FACTOR_STATUS_LABELS
+
+# =============================================================================
+# SERVER-SIDE PORTFOLIO AGGREGATES
+# =============================================================================
+# The portfolio page covers hundreds of thousands of scored decisions (see
+# portfolio_scoring.score_portfolio). Everything it draws is reduced here, in
+# NumPy, to a few hundred numbers: rate tables, fixed-bin histograms and
+# density grids instead of raw points. Rows only leave the server one page at
+# a time (row_window).
+
+# Histogram ranges for continuous metrics; values outside fall in the end bins
+METRIC_RANGES = {
+    "dscr": (-2.0, 6.0),
+    "runway_months": (0.0, 24.0),
+    "signal_score": (0.0, 100.0),
+    "trust_index": (0.0, 1.0),
+}
+
+# Columns a row window can return (and sort by)
+ROW_COLUMNS = ("decision", "score", "dscr", "runway_months", "signal_score", "trust_index",
+               "monthly_net_cash_flow", "estimated_monthly_payment")
+
+
+def segment_mask(result: dict, decisions=None) -> np.ndarray:
+    """Rows whose decision label is in `decisions` (all rows when None)"""
+    codes = np.asarray(result["decision_code"])
+    if decisions is None:
+        return np.ones(len(codes), dtype=bool)
+    wanted = [DECISION_LABEL_LIST.index(label) for label in decisions]
+    return np.isin(codes, wanted)
+
+
+def decision_summary(result: dict, mask: np.ndarray = None) -> dict:
+    """Row count, decision counts / rates and mean score"""
+    codes = np.asarray(result["decision_code"])
+    scores = np.asarray(result["score"])
+    if mask is not None:
+        codes, scores = codes[mask], scores[mask]
+    counts = np.bincount(codes, minlength=len(DECISION_LABEL_LIST))
+    total = max(len(codes), 1)
+    return {
+        "rows": len(codes),
+        "counts": {label: int(counts[i]) for i, label in enumerate(DECISION_LABEL_LIST)},
+        "rates": {label: counts[i] / total for i, label in enumerate(DECISION_LABEL_LIST)},
+        "mean_score": float(scores.mean()) if len(scores) else 0.0,
+    }
+
+
+def score_histogram(result: dict, bins: int = 20, max_score: int = 100, mask: np.ndarray = None) -> dict:
+    """Score counts per bin, split by decision: {"edges", "counts": {label: array}}"""
+    codes = np.asarray(result["decision_code"], dtype=np.int64)
+    scores = np.asarray(result["score"], dtype=np.float64)
+    if mask is not None:
+        codes, scores = codes[mask], scores[mask]
+    edges = np.linspace(0, max_score, bins + 1)
+    index = np.clip((scores * bins / max_score).astype(np.int64), 0, bins - 1)
+    n_labels = len(DECISION_LABEL_LIST)
+    counts = np.bincount(index * n_labels + codes, minlength=bins * n_labels).reshape(bins, n_labels)
+    return {"edges": edges, "counts": {label: counts[:, i] for i, label in enumerate(DECISION_LABEL_LIST)}}
+
+
+def factor_status_rates(result: dict, mask: np.ndarray = None) -> dict:
+    """Share of rows with each status, per factor: {factor: {"PASS": r, "MARGINAL": r, "FAIL": r}}"""
+    rates = {}
+    for name, status in result["factor_status_code"].items():
+        status = np.asarray(status, dtype=np.int64)
+        if mask is not None:
+            status = status[mask]
+        counts = np.bincount(status, minlength=len(FACTOR_STATUS_LABELS))
+        total = max(len(status), 1)
+        rates[name] = {str(label): counts[i] / total for i, label in enumerate(FACTOR_STATUS_LABELS)}
+    return rates
+
+
+def metric_histogram(values, value_range: tuple, bins: int = 40, mask: np.ndarray = None) -> dict:
+    """Fixed-bin histogram over `value_range`, outliers clipped into the end bins"""
+    values = np.asarray(values, dtype=np.float64)
+    if mask is not None:
+        values = values[mask]
+    values = values[np.isfinite(values)]
+    low, high = value_range
+    edges = np.linspace(low, high, bins + 1)
+    index = np.clip(((values - low) * (bins / (high - low))).astype(np.int64), 0, bins - 1)
+    return {"edges": edges, "counts": np.bincount(index, minlength=bins)}
+
+
+def density_grid(x, y, x_range: tuple, y_range: tuple, bins: tuple = (40, 40), mask: np.ndarray = None) -> dict:
+    """
+    2-D count grid of (x, y) pairs: a scatter plot of the whole book reduced
+    to bins[0] x bins[1] cells. Values outside the ranges are clipped in.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if mask is not None:
+        x, y = x[mask], y[mask]
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = np.clip(x[finite], *x_range), np.clip(y[finite], *y_range)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins, range=(x_range, y_range))
+    # counts[i, j] is x bin i, y bin j; plot grids are indexed [y][x]
+    return {"x_edges": x_edges, "y_edges": y_edges, "counts": counts.T.astype(np.int64)}
+
+
+def row_order(result: dict, mask: np.ndarray = None, order_by: str = None, descending: bool = False) -> np.ndarray:
+    """Row indices of the segment, sorted by `order_by` (stable; book order when None)"""
+    rows = np.flatnonzero(mask) if mask is not None else np.arange(len(result["decision_code"]))
+    if order_by is None:
+        return rows
+    values = np.asarray(result[order_by])[rows]
+    if values.dtype.kind in "OUS":
+        order = np.argsort(values.astype(str), kind="stable")
+        return rows[order[::-1]] if descending else rows[order]
+    if values.dtype == bool:
+        values = values.astype(np.int8)
+    return rows[np.argsort(-values if descending else values, kind="stable")]
+
+
+def row_window(result: dict, order: np.ndarray, offset: int, limit: int, columns=ROW_COLUMNS) -> dict:
+    """One page of rows, `limit` rows from `offset` in `order` (see row_order)"""
+    rows = order[offset:offset + limit]
+    window = {"row": rows}
+    if "application_id" in result:
+        window["application_id"] = np.asarray(result["application_id"])[rows]
+    window.update((name, np.asarray(result[name])[rows]) for name in columns)
+    return window
@@ -0,0 +1,244 @@
+import numpy as np
+
+from cash_flow_series import SERIES_DIGITS, SERIES_FEATURES, series_metrics
+from decision_policy import DECISION_POLICY, CompiledPolicy
+from loan_pricing import LOAN_APR, LOAN_TERM_MONTHS, monthly_payment
+from transaction_store import WINDOW_MONTHS, TransactionTable
+
+# =============================================================================
+# COLUMNAR APPLICATION TABLE
+# =============================================================================
+# One row per application. These are the raw aggregates the scalar pipeline
+# derives from the nested Plaid payloads; everything downstream (Signal, Trust
+# Index, Beacon, debt/liquidity metrics, decision) is computed from them.
+APPLICATION_COLUMNS = (
+    "loan_amount",
+    "years_in_business",
+    "verified_income",
+    "income_stability",
+    "months_of_history",
+    "nsf_overdraft_count_90d",
+    "negative_balance_days_90d",
+    "account_age_days",
+    "beacon_network_flags",
+    "total_inflows_90d",
+    "total_outflows_90d",
+    "liquid_assets",
+)
+
+# Version of the feature code (batch_decision_features and everything it
+# calls). Bump it whenever a feature's definition changes so stored features
+# (see feature_store.py) are recomputed.
+FEATURE_VERSION = "features-v2"
+
+
+def py_round(values, ndigits: int) -> np.ndarray:
+    """
+    Vectorized round() that agrees with Python's built-in bit for bit.
+    np.round rounds the scaled double, Python rounds the exact decimal value;
+    they can only disagree on (near-)ties, which are re-rounded in Python.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+
+    with np.errstate(invalid="ignore"):
+        frac = np.abs(scaled - np.trunc(scaled))
+        suspect = np.abs(frac - 0.5) <= 4 * np.spacing(np.abs(scaled))
+    if suspect.any():
+        rounded[suspect] = [round(float(v), ndigits) for v in values[suspect]]
+    return rounded
+
+
+def applications_to_columns(applications) -> dict:
+    """
+    Flatten Plaid-shaped application dicts into a columnar table.
+    Accepts a mapping of application_id -> app_data (like LOAN_APPLICATIONS)
+    or any iterable of app_data dicts.
+    """
+    if hasattr(applications, "items"):
+        application_ids = list(applications.keys())
+        applications = list(applications.values())
+    else:
+        applications = list(applications)
+        application_ids = None
+
+    transactions = TransactionTable.from_applications(applications)
+    cash_flow = transactions.cash_flow_totals()
+
+    rows = {name: [] for name in APPLICATION_COLUMNS}
+    for app in applications:
+        risk = app["risk_signals"]
+        income = app["bank_income"]
+        liquid = sum(a["balance"] for a in app["linked_accounts"] if a["type"] == "depository" and a["balance"] > 0)
+
+        rows["loan_amount"].append(app["loan_amount"])
+        rows["years_in_business"].append(app["years_in_business"])
+        rows["verified_income"].append(income["verified_income"])
+        rows["income_stability"].append(income["income_stability"])
+        rows["months_of_history"].append(income["months_of_history"])
+        rows["nsf_overdraft_count_90d"].append(risk["nsf_overdraft_count_90d"])
+        rows["negative_balance_days_90d"].append(risk["negative_balance_days_90d"])
+        rows["account_age_days"].append(risk["account_age_days"])
+        rows["beacon_network_flags"].append(risk["beacon_network_flags"])
+        rows["liquid_assets"].append(liquid)
+
+    rows["total_inflows_90d"] = cash_flow["inflows"]
+    rows["total_outflows_90d"] = cash_flow["outflows"]
+    columns = {
+        name: np.asarray(values, dtype=object if name == "income_stability" else np.float64)
+        for name, values in rows.items()
+    }
+    for name in ("nsf_overdraft_count_90d", "negative_balance_days_90d", "account_age_days", "beacon_network_flags"):
+        columns[name] = columns[name].astype(np.int64)
+    # Whole-history monthly statistics (optional columns; see batch_decision_features)
+    series = series_metrics(transactions, columns["liquid_assets"])
+    columns.update((name, py_round(series[name], SERIES_DIGITS[name])) for name in SERIES_FEATURES)
+    if application_ids is not None:
+        columns["application_id"] = np.asarray(application_ids, dtype=object)
+    return columns
+
+
+# =============================================================================
+# VECTORIZED PLAID RISK SCORES
+# =============================================================================
+
+def batch_signal_score(nsf_count, negative_days, account_age_days) -> np.ndarray:
+    """Vectorized plaid_signal_score: ACH risk score (0-100) per row"""
+    nsf_count = np.asarray(nsf_count, dtype=np.int64)
+    negative_days = np.asarray(negative_days, dtype=np.int64)
+    account_age_days = np.asarray(account_age_days)
+
+    score = np.full(nsf_count.shape, 70, dtype=np.int64)
+    score += np.where(nsf_count == 0, 15, -nsf_count * 8)
+    score += np.where(negative_days == 0, 10, -negative_days * 2)
+    score += np.where(account_age_days > 365, 5, 0)
+    score += np.where(account_age_days > 730, 5, 0)
+    return np.clip(score, 0, 100).astype(np.float64)
+
+
+def batch_trust_index(beacon_flags, nsf_count, years_in_business) -> np.ndarray:
+    """Vectorized plaid_trust_index: network trust (0-1) per row"""
+    beacon_flags = np.asarray(beacon_flags)
+    nsf_count = np.asarray(nsf_count, dtype=np.float64)
+    years_in_business = np.asarray(years_in_business, dtype=np.float64)
+
+    # Same order of float operations as the scalar function
+    trust = np.full(beacon_flags.shape, 0.85)
+    trust = np.where(beacon_flags == 0, trust + 0.08, trust - 0.30)
+    trust = np.where(nsf_count == 0, trust + 0.05, trust - nsf_count * 0.08)
+    trust = np.where(years_in_business >= 2, trust + 0.02, trust)
+    return py_round(np.clip(trust, 0, 1), 3)
+
+
+# =============================================================================
+# VECTORIZED CREDIT METRICS
+# =============================================================================
+
+def batch_credit_metrics(columns) -> dict:
+    """Vectorized calculate_cash_flow/debt/liquidity_metrics over a table"""
+    loan_amount = np.asarray(columns["loan_amount"], dtype=np.float64)
+    verified_income = np.asarray(columns["verified_income"], dtype=np.float64)
+    inflows = np.asarray(columns["total_inflows_90d"], dtype=np.float64)
+    outflows = np.asarray(columns["total_outflows_90d"], dtype=np.float64)
+    liquid_assets = np.asarray(columns["liquid_assets"], dtype=np.float64)
+
+    # Cash flow (data is 90 days)
+    monthly_inflow = inflows / WINDOW_MONTHS
+    monthly_outflow = outflows / WINDOW_MONTHS
+    net_income = py_round(monthly_inflow - monthly_outflow, 2)
+    monthly_burn = py_round(monthly_outflow, 2)
+
+    # Debt
+    payment = monthly_payment(loan_amount, LOAN_APR, LOAN_TERM_MONTHS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dscr = np.where(payment > 0, net_income / payment, 0.0)
+        dti = np.where(verified_income > 0, payment / verified_income * 100, 100.0)
+        runway = np.where(monthly_burn > 0, liquid_assets / monthly_burn, 0.0)
+        loan_to_cash = np.where(liquid_assets > 0, loan_amount / liquid_assets, np.inf)
+
+    return {
+        "monthly_avg_inflow": py_round(monthly_inflow, 2),
+        "monthly_net_cash_flow": net_income,
+        "estimated_monthly_payment": py_round(payment, 2),
+        "dscr": py_round(dscr, 2),
+        "dti_ratio": py_round(dti, 1),
+        "runway_months": py_round(runway, 1),
+        "loan_to_cash_ratio": py_round(loan_to_cash, 2),
+        "monthly_burn_rate": monthly_burn,
+    }
+
+
+# =============================================================================
+# VECTORIZED DECISION ENGINE
+# =============================================================================
+
+def batch_make_decision(signal_score, trust_index, fraud_detected, dscr, runway_months,
+                        income_stability, months_of_history, policy: CompiledPolicy = None) -> dict:
+    """Vectorized agent_make_decision: score, decision and per-factor results"""
+    income_stability = np.asarray(income_stability)
+    # Accept the raw labels or a precomputed "is HIGH" bool column
+    income_high = income_stability if income_stability.dtype == bool else income_stability == "HIGH"
+    policy = policy or DECISION_POLICY.current()
+    return policy.evaluate({
+        "signal_score": signal_score,
+        "trust_index": trust_index,
+        "fraud_detected": np.asarray(fraud_detected, dtype=bool),
+        "dscr": dscr,
+        "runway_months": runway_months,
+        "income_stability_high": income_high,
+        "months_of_history": months_of_history,
+    })
+
+
+def batch_decision_features(table) -> dict:
+    """
+    Everything the decision policy reads, as per-row arrays: Plaid risk
+    scores, credit metrics and income fields. Computed once and shared by
+    every policy evaluated against the same book.
+    """
+    columns = {name: np.asarray(table[name]) for name in APPLICATION_COLUMNS}
+
+    signal_score = batch_signal_score(
+        columns["nsf_overdraft_count_90d"], columns["negative_balance_days_90d"], columns["account_age_days"]
+    )
+    trust_index = batch_trust_index(
+        columns["beacon_network_flags"], columns["nsf_overdraft_count_90d"], columns["years_in_business"]
+    )
+    income_stability = columns["income_stability"]
+    return {
+        "signal_score": signal_score,
+        "trust_index": trust_index,
+        "fraud_detected": columns["beacon_network_flags"] > 0,
+        **batch_credit_metrics(columns),
+        # Accept the raw labels or a precomputed "is HIGH" bool column
+        "income_stability_high": income_stability if income_stability.dtype == bool else income_stability == "HIGH",
+        "months_of_history": columns["months_of_history"],
+        # Present when the table was built from transactions (applications_to_columns)
+        **{name: np.asarray(table[name], dtype=np.float64) for name in SERIES_FEATURES if name in table},
+    }
+
+
+def score_portfolio(table, policy: CompiledPolicy = None) -> dict:
+    """
+    Score a whole book in one pass.
+    `table` is a dict of NumPy arrays or a pandas DataFrame with APPLICATION_COLUMNS
+    (see applications_to_columns). Returns a dict of per-row arrays that match
+    the scalar plaid_* / calculate_* / agent_make_decision path exactly.
+    """
+    application_ids = table["application_id"] if "application_id" in table else None
+    return score_features(batch_decision_features(table), policy, application_ids)
+
+
+def score_features(features: dict, policy: CompiledPolicy = None, application_ids=None) -> dict:
+    """score_portfolio for precomputed batch_decision_features (e.g. a FeatureStore book)"""
+    policy = policy or DECISION_POLICY.current()
+    result = {
+        name: values for name, values in features.items()
+        if name not in ("income_stability_high", "months_of_history")
+    }
+    result.update(policy.evaluate(features))
+    if application_ids is not None:
+        result["application_id"] = np.asarray(application_ids)
+    return result
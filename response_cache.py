@@ -0,0 +1,315 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from metrics_cache import application_fingerprint
+
+# =============================================================================
+# TWO-TIER PLAID RESPONSE CACHE
+# =============================================================================
+# Identity and Bank Income change slowly, but every decision fetched them
+# again. Responses are cached per (item, endpoint) with a per-endpoint TTL:
+#   - an in-process LRU, checked first (no I/O)
+#   - an optional SQLite file (WAL mode) shared by every worker process on
+#     the host, so one worker's fetch serves the others and survives restarts
+# Invalidating an item deletes its disk entries at once. Other processes
+# drop their in-memory copies at their next sync, which happens at most
+# `sync_interval` seconds after the invalidation.
+
+# Seconds a response stays fresh; endpoints not listed (or 0) are never cached
+DEFAULT_TTLS = {
+    "identity": 24 * 3600,
+    "bank_income": 12 * 3600,
+}
+
+PURGE_EVERY_STORES = 256
+# Each sync re-reads this many seconds of invalidations so one committed
+# while the previous sync ran isn't missed (re-applying one is harmless)
+SYNC_OVERLAP_S = 5.0
+# Invalidations are kept this long: longer than any fetch can be in flight,
+# so a response fetched before an invalidation is never stored after it.
+# A process that hasn't synced for this long drops its whole memory tier.
+INVALIDATION_RETENTION_S = 3600.0
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS responses (item_id TEXT NOT NULL, endpoint TEXT NOT NULL, "
+    "stored_at REAL NOT NULL, expires_at REAL NOT NULL, value TEXT NOT NULL, PRIMARY KEY (item_id, endpoint))",
+    "CREATE TABLE IF NOT EXISTS invalidations (item_id TEXT PRIMARY KEY, invalidated_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS invalidations_by_time ON invalidations (invalidated_at)",
+)
+
+
+def plaid_item_id(app_data: dict, fingerprint: str = None) -> str:
+    """
+    The Plaid item a payload belongs to: its plaid_item_id, else its access
+    token, else (demo payloads) a content hash, so edited data is a new item.
+    Pass the payload's application_fingerprint if it is already known.
+    """
+    return (app_data.get("plaid_item_id") or app_data.get("plaid_access_token")
+            or fingerprint or application_fingerprint(app_data))
+
+
+class ResponseCache:
+    """
+    Thread- and process-safe TTL cache of Plaid responses. `path` is the
+    SQLite file of the shared tier (memory-only when None). Cached responses
+    are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, path: str = None, ttls: dict = None, maxsize: int = 1024, sync_interval: float = 1.0):
+        self.path = path
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.maxsize = maxsize
+        self.sync_interval = sync_interval
+        self._entries = OrderedDict()  # (item_id, endpoint) -> (stored_at, expires_at, value)
+        self._invalidated = {}  # item_id -> latest invalidation seen by this process
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._synced_at = time.time()
+        self._next_sync = 0.0
+        self._stores = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            db = self._db()
+            with db:
+                for statement in _SCHEMA:
+                    db.execute(statement)
+
+    def _db(self) -> sqlite3.Connection:
+        """This thread's connection (reopened after a fork)"""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            local.db.execute("PRAGMA journal_mode=WAL")
+            local.db.execute("PRAGMA synchronous=NORMAL")
+            local.pid = os.getpid()
+        return local.db
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def get_or_fetch(self, endpoint: str, app_data: dict, fetch, item_id: str = None):
+        """
+        Cached response for the payload's item, or fetch(app_data) stored for
+        the endpoint's TTL. Callers making several lookups for one payload
+        pass its plaid_item_id so it is worked out once.
+        """
+        ttl = self.ttls.get(endpoint, 0)
+        if not ttl:
+            return fetch(app_data)
+        item_id = item_id or plaid_item_id(app_data)
+        found, value = self.get(item_id, endpoint)
+        if found:
+            return value
+        fetched_at = time.time()
+        value = fetch(app_data)
+        self.put(item_id, endpoint, value, ttl, fetched_at)
+        return value
+
+    def get(self, item_id: str, endpoint: str) -> tuple:
+        """(found, response)"""
+        now = time.time()
+        self._sync(now)
+        key = (item_id, endpoint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return True, entry[2]
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.path:
+            row = self._db().execute(
+                "SELECT stored_at, expires_at, value FROM responses WHERE item_id = ? AND endpoint = ? AND expires_at > ?",
+                (item_id, endpoint, now),
+            ).fetchone()
+            if row is not None:
+                value = json.loads(row[2])
+                self._remember(key, row[0], row[1], value)
+                with self._lock:
+                    self.disk_hits += 1
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def put(self, item_id: str, endpoint: str, value, ttl: float = None, fetched_at: float = None) -> bool:
+        """
+        Store a response fetched at `fetched_at` (time.time() before the
+        fetch started; default now). A response whose item was invalidated at
+        or after that time is stale and is not stored. Returns whether it was.
+        """
+        ttl = self.ttls.get(endpoint, 0) if ttl is None else ttl
+        stored_at = time.time() if fetched_at is None else fetched_at
+        expires_at = stored_at + ttl
+        if self.path:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT invalidated_at FROM invalidations WHERE item_id = ?", (item_id,)).fetchone()
+                stale = row is not None and row[0] >= stored_at
+                if not stale:
+                    db.execute(
+                        "INSERT OR REPLACE INTO responses (item_id, endpoint, stored_at, expires_at, value) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (item_id, endpoint, stored_at, expires_at, json.dumps(value, default=str)),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            if stale:
+                return False
+        if not self._remember((item_id, endpoint), stored_at, expires_at, value):
+            return False
+        if self.path:
+            with self._lock:
+                self._stores += 1
+                purge = self._stores % PURGE_EVERY_STORES == 0
+            if purge:
+                self._purge(time.time())
+        return True
+
+    def _purge(self, now: float):
+        """Delete expired responses and invalidations past their retention"""
+        db = self._db()
+        expired = db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        db.execute("DELETE FROM invalidations WHERE invalidated_at < ?", (now - INVALIDATION_RETENTION_S,))
+        with self._lock:
+            self.expirations += expired
+
+    def _remember(self, key: tuple, stored_at: float, expires_at: float, value) -> bool:
+        with self._lock:
+            if self._invalidated.get(key[0], -1.0) >= stored_at:
+                return False
+            self._entries[key] = (stored_at, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    # -------------------------------------------------------------------------
+    # Invalidation
+    # -------------------------------------------------------------------------
+
+    def invalidate(self, item_id: str) -> int:
+        """Drop every cached response for an item (e.g. on a Plaid webhook); returns entries removed"""
+        now = time.time()
+        removed = self._forget(item_id, now)
+        if self.path:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                removed += db.execute("DELETE FROM responses WHERE item_id = ?", (item_id,)).rowcount
+                db.execute("INSERT OR REPLACE INTO invalidations (item_id, invalidated_at) VALUES (?, ?)", (item_id, now))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._purge(now)
+        self._prune_invalidated(now)
+        with self._lock:
+            self.invalidations += 1
+        return removed
+
+    def _forget(self, item_id: str, invalidated_at: float) -> int:
+        """
+        Remove in-memory responses for an item stored no later than
+        `invalidated_at`, and refuse ones fetched before it from now on.
+        """
+        with self._lock:
+            if invalidated_at > self._invalidated.get(item_id, -1.0):
+                self._invalidated[item_id] = invalidated_at
+            keys = [
+                key for key, (stored_at, _, _) in self._entries.items()
+                if key[0] == item_id and stored_at <= invalidated_at
+            ]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def _sync(self, now: float):
+        """Apply invalidations made by other processes since the last sync"""
+        if not self.path or time.monotonic() < self._next_sync:
+            return
+        self._next_sync = time.monotonic() + self.sync_interval
+        if self._synced_at < now - INVALIDATION_RETENTION_S:
+            # Invalidations this old may have been pruned: nothing in memory can be trusted
+            with self._lock:
+                self._entries.clear()
+        rows = self._db().execute(
+            "SELECT item_id, invalidated_at FROM invalidations WHERE invalidated_at >= ?", (self._synced_at,)
+        ).fetchall()
+        self._synced_at = now - SYNC_OVERLAP_S
+        for item_id, invalidated_at in rows:
+            self._forget(item_id, invalidated_at)
+        self._prune_invalidated(now)
+
+    def _prune_invalidated(self, now: float):
+        retained = now - INVALIDATION_RETENTION_S
+        with self._lock:
+            self._invalidated = {item: at for item, at in self._invalidated.items() if at >= retained}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            self._db().execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class CachingBackend:
+    """async_pipeline backend that serves cacheable endpoints from a ResponseCache"""
+
+    def __init__(self, backend, cache: "ResponseCache"):
+        self.backend = backend
+        self.cache = cache
+
+    async def call(self, endpoint: str, app_data: dict) -> dict:
+        ttl = self.cache.ttls.get(endpoint, 0)
+        if not ttl:
+            return await self.backend.call(endpoint, app_data)
+        item_id = plaid_item_id(app_data)
+        found, value = self.cache.get(item_id, endpoint)
+        if found:
+            return value
+        fetched_at = time.time()
+        value = await self.backend.call(endpoint, app_data)
+        self.cache.put(item_id, endpoint, value, ttl, fetched_at)
+        return value
+
+
+# Process-wide cache used by the decision pipeline; PLAID_CACHE_PATH enables the shared disk tier
+PLAID_RESPONSE_CACHE = ResponseCache(os.environ.get("PLAID_CACHE_PATH"))
@@ -0,0 +1,159 @@
+import functools
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter_ns
+
+# =============================================================================
+# PIPELINE STAGE INSTRUMENTATION
+# =============================================================================
+# Agent lifecycle stages, in pipeline order
+PIPELINE_STAGES = ("perceive", "reason", "verify", "act")
+
+# Histogram upper bounds in seconds (Prometheus `le` labels); +Inf is implicit
+LATENCY_BUCKETS_S = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+_BUCKET_BOUNDS_NS = tuple(round(b * 1e9) for b in LATENCY_BUCKETS_S)
+
+
+class LatencyHistogram:
+    """Call count, total time and fixed-bucket latency counts for one timer"""
+
+    __slots__ = ("count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(_BUCKET_BOUNDS_NS) + 1)
+
+    def observe(self, elapsed_ns: int):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[bisect_left(_BUCKET_BOUNDS_NS, elapsed_ns)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound (seconds) containing quantile q; +Inf bucket reports max"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return LATENCY_BUCKETS_S[i] if i < len(LATENCY_BUCKETS_S) else self.max_ns / 1e9
+        return self.max_ns / 1e9
+
+
+class StageMetrics:
+    """
+    Process-wide timers for pipeline stages and Plaid calls.
+    Observing costs one lock acquisition and a bisect (well under a
+    microsecond); when disabled, instrumented calls skip the clock entirely.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}  # (kind, name) -> LatencyHistogram
+
+    def observe(self, kind: str, name: str, elapsed_ns: int):
+        key = (kind, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(elapsed_ns)
+
+    def instrument(self, kind: str = "plaid_call", name: str = None):
+        """Decorator timing every call of the wrapped function (named after it by default)"""
+        def decorator(fn):
+            label = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                started = perf_counter_ns()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(kind, label, perf_counter_ns() - started)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        """JSON-friendly {kind: {name: stats}}"""
+        with self._lock:
+            items = [(key, h.count, h.total_ns, h.max_ns, h.quantile(0.5), h.quantile(0.99))
+                     for key, h in self._histograms.items()]
+        result = {}
+        for (kind, name), count, total_ns, max_ns, p50, p99 in sorted(items):
+            result.setdefault(kind, {})[name] = {
+                "count": count,
+                "total_ms": round(total_ns / 1e6, 3),
+                "mean_us": round(total_ns / count / 1e3, 2) if count else 0.0,
+                "p50_le_ms": round(p50 * 1000, 3),
+                "p99_le_ms": round(p99 * 1000, 3),
+                "max_ms": round(max_ns / 1e6, 3),
+            }
+        return result
+
+    def prometheus_text(self, prefix: str = "credit_agent") -> str:
+        """Prometheus text exposition format (cumulative histogram buckets)"""
+        with self._lock:
+            items = sorted((key, h.count, h.total_ns, list(h.buckets)) for key, h in self._histograms.items())
+
+        lines = []
+        for kind in sorted({key[0] for key, *_ in items}):
+            metric = f"{prefix}_{kind}_duration_seconds"
+            lines.append(f"# HELP {metric} Latency of {kind.replace('_', ' ')}s")
+            lines.append(f"# TYPE {metric} histogram")
+            for (item_kind, name), count, total_ns, buckets in items:
+                if item_kind != kind:
+                    continue
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS_S + ("+Inf",), buckets):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{name="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{name="{name}"}} {total_ns / 1e9:.9f}')
+                lines.append(f'{metric}_count{{name="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class StageClock:
+    """
+    Per-decision stage timer: call lap(stage) at the end of each stage.
+    Always records the timings for the audit record; also feeds the shared
+    histograms when metrics are enabled.
+    """
+
+    __slots__ = ("metrics", "timings_ns", "_last")
+
+    def __init__(self, metrics: StageMetrics):
+        self.metrics = metrics
+        self.timings_ns = {}
+        self._last = perf_counter_ns()
+
+    def lap(self, stage: str):
+        now = perf_counter_ns()
+        elapsed = now - self._last
+        self._last = now
+        self.timings_ns[stage] = elapsed
+        if self.metrics.enabled:
+            self.metrics.observe("stage", stage, elapsed)
+
+    def timings_ms(self) -> dict:
+        return {stage: round(ns / 1e6, 3) for stage, ns in self.timings_ns.items()}
+
+
+# Shared registry; set STAGE_METRICS=0 to start disabled
+STAGE_METRICS = StageMetrics(enabled=os.environ.get("STAGE_METRICS", "1") != "0")
@@ -0,0 +1,261 @@
+"""
+Monte Carlo cash-flow stress testing.
+
+DSCR and runway are point estimates from one 90-day window. This module
+simulates many cash-flow paths per applicant under a revenue-shock scenario:
+  - per-merchant revenue noise
+  - random loss of paying merchants
+  - expense noise
+  - deterministic scenario shocks (a payout processor down 30%, the loss of
+    the largest insurance payer, ...)
+For each applicant it reports DSCR and runway percentiles and the
+probability that the credit decision flips.
+
+Each applicant draws from its own random streams, derived from the seed and
+the application ID. Results are reproducible, and they don't depend on book
+order, block size or chunk size. Paths are simulated in chunks. Memory is
+bounded by `max_cells` simulated values, whatever the book size.
+
+    python stress_testing.py --scenario stripe_down_30 --paths 20000 --seed 7
+    python stress_testing.py --input applications.jsonl --scenario insurance_payer_loss --output stress.csv
+"""
+import argparse
+import csv
+import hashlib
+import sys
+import time
+
+import numpy as np
+
+from decision_policy import APPROVED, DECISION_POLICY, CompiledPolicy
+from loan_pricing import LOAN_APR, LOAN_TERM_MONTHS, monthly_payment
+from merchant_normalization import DEFAULT_NORMALIZER, transaction_merchant_codes
+from portfolio_scoring import applications_to_columns, batch_decision_features, py_round
+from transaction_store import WINDOW_MONTHS, TransactionTable
+
+# =============================================================================
+# SCENARIOS
+# =============================================================================
+# Shock parameters; scenarios override any of them.
+#   revenue_volatility      sigma of each merchant's lognormal revenue multiplier (mean 1)
+#   expense_volatility      sigma of the lognormal outflow multiplier (mean 1)
+#   payer_loss_probability  chance that each paying merchant disappears on a path
+#   revenue_multiplier      applied to all inflows
+#   merchant_multipliers    {canonical merchant: multiplier} applied to that merchant's inflows
+#   lose_top_payer_of       the applicant's largest payer among these merchants is lost on every path
+DEFAULT_SHOCKS = {
+    "revenue_volatility": 0.15,
+    "expense_volatility": 0.08,
+    "payer_loss_probability": 0.02,
+    "revenue_multiplier": 1.0,
+    "merchant_multipliers": {},
+    "lose_top_payer_of": (),
+}
+
+INSURANCE_PAYERS = ("Delta Dental", "Cigna", "Aetna")
+
+STRESS_SCENARIOS = {
+    "baseline": {},
+    "stripe_down_30": {"merchant_multipliers": {"Stripe": 0.7}},
+    "insurance_payer_loss": {"lose_top_payer_of": INSURANCE_PAYERS},
+    "recession": {"revenue_multiplier": 0.85, "revenue_volatility": 0.25, "payer_loss_probability": 0.05},
+}
+
+PERCENTILES = (5, 50, 95)
+DEFAULT_MAX_CELLS = 2_000_000
+DEFAULT_CHUNK_PATHS = 4096
+
+
+def scenario_shocks(scenario) -> dict:
+    """Full shock parameters for a scenario name or a dict of overrides"""
+    overrides = STRESS_SCENARIOS[scenario] if isinstance(scenario, str) else scenario
+    unknown = set(overrides) - set(DEFAULT_SHOCKS)
+    if unknown:
+        raise ValueError(f"Unknown shock parameters: {sorted(unknown)}")
+    return {**DEFAULT_SHOCKS, **overrides}
+
+
+def applicant_seed(seed: int, application_id) -> np.random.SeedSequence:
+    digest = hashlib.blake2b(str(application_id).encode(), digest_size=8).digest()
+    return np.random.SeedSequence([seed, int.from_bytes(digest, "little")])
+
+
+# =============================================================================
+# APPLICANT INPUTS
+# =============================================================================
+
+def merchant_inflows(applications: list) -> list:
+    """(merchant codes, 90-day inflow per merchant) for each application"""
+    txns = TransactionTable.from_applications(applications)
+    codes = transaction_merchant_codes(applications).astype(np.int64)
+    inflow = txns.amounts > 0
+    width = int(codes.max()) + 1 if len(codes) else 1
+    keys, position = np.unique(txns.owners[inflow] * width + codes[inflow], return_inverse=True)
+    totals = np.bincount(position, weights=txns.amounts[inflow], minlength=len(keys))
+    bounds = np.searchsorted(keys // width, np.arange(txns.n_owners + 1))
+    return [(keys[lo:hi] % width, totals[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def _merchant_scale(codes: np.ndarray, shocks: dict) -> np.ndarray:
+    """Deterministic scenario multiplier per merchant for one applicant"""
+    names = [DEFAULT_NORMALIZER.merchants[code] for code in codes]
+    scale = np.array([shocks["merchant_multipliers"].get(name, 1.0) for name in names]) * shocks["revenue_multiplier"]
+    return scale
+
+
+# =============================================================================
+# SIMULATION
+# =============================================================================
+
+def _simulate_applicant(seed: np.random.SeedSequence, revenue: np.ndarray, outflow: float,
+                        shocks: dict, n_paths: int, chunk_paths: int):
+    """Yield (monthly inflow, monthly outflow) arrays for successive path chunks"""
+    revenue_rng, loss_rng, expense_rng = (np.random.default_rng(s) for s in seed.spawn(3))
+    revenue_sigma = shocks["revenue_volatility"]
+    expense_sigma = shocks["expense_volatility"]
+    loss_probability = shocks["payer_loss_probability"]
+    for start in range(0, n_paths, chunk_paths):
+        n = min(chunk_paths, n_paths - start)
+        multipliers = revenue_rng.lognormal(-revenue_sigma ** 2 / 2, revenue_sigma, (n, len(revenue)))
+        if loss_probability > 0:
+            multipliers *= loss_rng.random((n, len(revenue))) >= loss_probability
+        inflow = multipliers @ revenue
+        expense = expense_rng.lognormal(-expense_sigma ** 2 / 2, expense_sigma, n) * outflow
+        yield inflow, expense
+
+
+def stress_test(applications: dict, scenario="baseline", n_paths: int = 10_000, seed: int = 0,
+                policy: CompiledPolicy = None, chunk_paths: int = DEFAULT_CHUNK_PATHS,
+                max_cells: int = DEFAULT_MAX_CELLS) -> dict:
+    """
+    Simulate `n_paths` cash-flow paths per application (a mapping of
+    application_id -> app_data) and return per-application arrays:
+    base and percentile DSCR / runway, approval probability and the
+    probability that the decision differs from the unstressed one.
+    """
+    shocks = scenario_shocks(scenario)
+    policy = policy or DECISION_POLICY.current()
+    application_ids = list(applications)
+    apps = [applications[a] for a in application_ids]
+    n_apps = len(apps)
+
+    table = applications_to_columns(apps)
+    features = batch_decision_features(table)
+    base = policy.evaluate(features)
+    inflows = merchant_inflows(apps)
+    outflows = np.asarray(table["total_outflows_90d"]) / WINDOW_MONTHS
+    payment = monthly_payment(np.asarray(table["loan_amount"], dtype=np.float64), LOAN_APR, LOAN_TERM_MONTHS)
+    liquid = np.asarray(table["liquid_assets"], dtype=np.float64)
+
+    result = {"application_id": np.asarray(application_ids, dtype=object), "base_decision": base["decision"]}
+    for name in ("dscr", "runway_months"):
+        result[f"base_{name}"] = features[name]
+        for q in PERCENTILES:
+            result[f"{name}_p{q}"] = np.zeros(n_apps)
+    result["approval_probability"] = np.zeros(n_apps)
+    result["flip_probability"] = np.zeros(n_apps)
+
+    # Applicants per block so the block's per-path outputs fit in max_cells
+    block_apps = max(1, max_cells // max(n_paths, 1))
+    chunk_paths = max(1, min(chunk_paths, max_cells // block_apps))
+    for block_start in range(0, n_apps, block_apps):
+        rows = np.arange(block_start, min(block_start + block_apps, n_apps))
+        dscr = np.empty((len(rows), n_paths), dtype=np.float32)
+        runway = np.empty((len(rows), n_paths), dtype=np.float32)
+        approved = np.zeros(len(rows), dtype=np.int64)
+        flipped = np.zeros(len(rows), dtype=np.int64)
+
+        streams = []
+        for i in rows:
+            codes, totals = inflows[i]
+            revenue = totals / WINDOW_MONTHS * _merchant_scale(codes, shocks)
+            if shocks["lose_top_payer_of"]:
+                names = np.array([DEFAULT_NORMALIZER.merchants[c] for c in codes], dtype=object)
+                candidates = np.flatnonzero(np.isin(names, list(shocks["lose_top_payer_of"])))
+                if len(candidates):
+                    revenue[candidates[np.argmax(revenue[candidates])]] = 0.0
+            streams.append(_simulate_applicant(
+                applicant_seed(seed, application_ids[i]), revenue, outflows[i], shocks, n_paths, chunk_paths
+            ))
+
+        for start in range(0, n_paths, chunk_paths):
+            chunks = [next(stream) for stream in streams]
+            n = len(chunks[0][0])
+            inflow = np.concatenate([c[0] for c in chunks])
+            expense = np.concatenate([c[1] for c in chunks])
+            owner = np.repeat(rows, n)
+
+            # Same rounding as calculate_debt_metrics / calculate_liquidity_metrics
+            net = py_round(inflow - expense, 2)
+            burn = py_round(expense, 2)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                path_dscr = py_round(np.where(payment[owner] > 0, net / payment[owner], 0.0), 2)
+                path_runway = py_round(np.where(burn > 0, liquid[owner] / burn, 0.0), 1)
+
+            columns = {name: np.asarray(values)[owner] for name, values in features.items()}
+            columns["dscr"] = path_dscr
+            columns["runway_months"] = path_runway
+            decision = policy.evaluate(columns)["decision_code"].reshape(len(rows), n)
+
+            dscr[:, start:start + n] = path_dscr.reshape(len(rows), n)
+            runway[:, start:start + n] = path_runway.reshape(len(rows), n)
+            approved += (decision == APPROVED).sum(axis=1)
+            flipped += (decision != base["decision_code"][rows, None]).sum(axis=1)
+
+        for name, values in (("dscr", dscr), ("runway_months", runway)):
+            for q, column in zip(PERCENTILES, np.percentile(values, PERCENTILES, axis=1)):
+                result[f"{name}_p{q}"][rows] = np.round(column, 2)
+        result["approval_probability"][rows] = approved / n_paths
+        result["flip_probability"][rows] = flipped / n_paths
+    return result
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo cash-flow stress test of credit decisions")
+    parser.add_argument("--input", help="applications JSONL (default: the built-in demo applications)")
+    parser.add_argument("--scenario", choices=sorted(STRESS_SCENARIOS), default="baseline")
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-paths", type=int, default=DEFAULT_CHUNK_PATHS)
+    parser.add_argument("--max-cells", type=int, default=DEFAULT_MAX_CELLS, help="simulated values held in memory")
+    parser.add_argument("--output", help="write per-application results to this CSV")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        from batch_runner import read_jsonl
+        with open(args.input, encoding="utf-8") as f:
+            applications = dict(read_jsonl(f))
+    else:
+        from credit_engine import LOAN_APPLICATIONS
+        applications = LOAN_APPLICATIONS
+
+    started = time.perf_counter()
+    result = stress_test(applications, args.scenario, args.paths, args.seed,
+                         chunk_paths=args.chunk_paths, max_cells=args.max_cells)
+    elapsed = time.perf_counter() - started
+    n_apps = len(result["application_id"])
+    print(f"{n_apps:,} applications x {args.paths:,} paths ({args.scenario}, seed {args.seed}) in {elapsed:.2f}s",
+          file=sys.stderr)
+
+    fields = list(result)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(fields)
+            writer.writerows(zip(*(result[name].tolist() for name in fields)))
+        return
+
+    print(f"{'application':<16}{'decision':>15}{'DSCR p5/p50/p95':>24}{'runway p5/p50/p95':>24}{'P(approve)':>12}{'P(flip)':>10}")
+    for i in range(min(n_apps, 50)):
+        print(f"{result['application_id'][i]:<16}{result['base_decision'][i]:>15}"
+              f"{result['dscr_p5'][i]:>10.2f}{result['dscr_p50'][i]:>7.2f}{result['dscr_p95'][i]:>7.2f}"
+              f"{result['runway_months_p5'][i]:>10.1f}{result['runway_months_p50'][i]:>7.1f}{result['runway_months_p95'][i]:>7.1f}"
+              f"{result['approval_probability'][i]:>12.1%}{result['flip_probability'][i]:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
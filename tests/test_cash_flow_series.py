@@ -0,0 +1,35 @@
+import math
+
+from cash_flow_series import calculate_cash_flow_series
+from credit_engine import LOAN_APPLICATIONS, calculate_cash_flow_metrics, run_decision_pipeline
+from portfolio_scoring import applications_to_columns, score_portfolio
+
+
+def _without_transactions():
+    return {**LOAN_APPLICATIONS["APP-2025-0847"], "transactions_90d": []}
+
+
+def test_series_metrics_without_transactions():
+    series = calculate_cash_flow_series(_without_transactions())
+    assert series["history_months"] == 0
+    assert math.isnan(series["monthly_net_mean"])
+    assert series["lowest_balance_month"] is None
+
+
+def test_batch_scoring_without_transactions_matches_scalar():
+    app = _without_transactions()
+    batch = score_portfolio(applications_to_columns([app]))
+    assert batch["decision"][0] == run_decision_pipeline("APP", app)["decision"]["decision"]
+
+
+def _with_first_date(value):
+    app = LOAN_APPLICATIONS["APP-2025-0847"]
+    transactions = [dict(t) for t in app["transactions_90d"]]
+    transactions[0]["date"] = value
+    return {**app, "transactions_90d": transactions}
+
+
+def test_malformed_date_is_treated_as_undated():
+    app = _with_first_date("2025/01/27")
+    assert calculate_cash_flow_metrics(app) == calculate_cash_flow_metrics(LOAN_APPLICATIONS["APP-2025-0847"])
+    assert calculate_cash_flow_series(app) == calculate_cash_flow_series(_with_first_date(None))
@@ -0,0 +1,48 @@
+import copy
+
+import numpy as np
+
+from decision_policy import DEFAULT_POLICY, compile_policy
+from parallel_scoring import score_portfolio_parallel, synthetic_columns
+from portfolio_scoring import score_portfolio
+
+
+def _assert_same(parallel: dict, serial: dict):
+    assert parallel.keys() == serial.keys()
+    for name, expected in serial.items():
+        if isinstance(expected, dict):
+            _assert_same(parallel[name], expected)
+        else:
+            np.testing.assert_array_equal(parallel[name], expected, err_msg=name)
+
+
+def test_parallel_scoring_uses_the_given_policy():
+    spec = copy.deepcopy(DEFAULT_POLICY)
+    spec["version"] = "renamed-factor"
+    spec["factors"][0]["name"] = "ACH Risk"
+    spec["score_cutoffs"][0]["min_score"] = 70
+    policy = compile_policy(spec)
+    table = synthetic_columns(3000, seed=1)
+
+    parallel = score_portfolio_parallel(table, workers=2, chunk_rows=1000, policy=policy)
+    _assert_same(parallel, score_portfolio(table, policy))
+    assert "ACH Risk" in parallel["factor_points"]
+
+
+def test_parallel_scoring_carries_series_features():
+    spec = copy.deepcopy(DEFAULT_POLICY)
+    spec["version"] = "cash-flow-stability"
+    spec["factors"][4] = {"name": "Cash Flow Stability", "tiers": [
+        {"min": {"cash_flow_stability": 0.5}, "points": 10, "status": "PASS", "reason": "{cash_flow_stability}"},
+        {"points": 0, "status": "FAIL", "reason": "{cash_flow_stability}"},
+    ]}
+    policy = compile_policy(spec)
+    table = synthetic_columns(3000, seed=2)
+    rng = np.random.default_rng(2)
+    table["cash_flow_stability"] = np.round(rng.uniform(0, 1, 3000), 3)
+    table["cash_flow_stability"][::7] = np.nan  # too little history
+    table["history_months"] = rng.integers(0, 24, 3000).astype(np.float64)
+
+    parallel = score_portfolio_parallel(table, workers=2, chunk_rows=1000, policy=policy)
+    _assert_same(parallel, score_portfolio(table, policy))
+    assert "cash_flow_stability" in parallel
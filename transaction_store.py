@@ -0,0 +1,193 @@
+import threading
+
+import numpy as np
+
+# =============================================================================
+# COLUMNAR TRANSACTION STORE
+# =============================================================================
+# Plaid category taxonomy. Every label gets one bit; a category list is
+# compiled once, when it is first interned, to the bitmask of the labels that
+# appear in it (same test as `"Payroll" in str(t["category"])`). Membership
+# tests afterwards are a single AND on an integer.
+CATEGORY_TAXONOMY = (
+    "Transfer", "Credit", "Debit", "Deposit", "Payroll", "Payment", "Rent", "Loan",
+    "Service", "Software", "Advertising", "Merchandise", "Insurance", "Utilities",
+    "Tax", "Bank Fees", "Travel", "Food and Drink",
+)
+
+# Expense categories tracked by calculate_cash_flow_metrics
+CASH_FLOW_CATEGORIES = ("Payroll", "Rent", "Software")
+
+# transactions_90d covers a 90-day window; monthly figures divide by its length in months
+CASH_FLOW_WINDOW_DAYS = 90
+DAYS_PER_MONTH = 30
+
+
+def window_months(window_days: int) -> float:
+    """Length of a cash-flow window in (30-day) months"""
+    return window_days / DAYS_PER_MONTH
+
+
+WINDOW_MONTHS = window_months(CASH_FLOW_WINDOW_DAYS)
+CASH_FLOW_FIELDS = ("inflows", "outflows") + tuple(c.lower() for c in CASH_FLOW_CATEGORIES)
+
+
+class CategoryVocabulary:
+    """
+    Interns Plaid category lists to small integer codes with precompiled label
+    bitmasks. Safe to share between threads. Once `max_size` lists are
+    interned, a new list shares the code of the first list with the same
+    bitmask (category() then returns that list), so the tables stay bounded.
+    """
+
+    def __init__(self, labels=CATEGORY_TAXONOMY, max_size: int = 4096):
+        self.labels = tuple(labels)
+        self.max_size = max_size
+        self._bits = {label: 1 << i for i, label in enumerate(self.labels)}
+        self._lock = threading.Lock()
+        self._codes = {}
+        self._mask_codes = {}  # bitmask -> first code with it
+        self._categories = []
+        self._masks = []
+        self._mask_array = None
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def code(self, category) -> int:
+        key = tuple(category) if isinstance(category, list) else category
+        code = self._codes.get(key)
+        if code is None:
+            text = str(category)
+            mask = sum(bit for label, bit in self._bits.items() if label in text)
+            with self._lock:
+                code = self._codes.get(key)
+                if code is None:
+                    code = self._mask_codes.get(mask) if len(self._categories) >= self.max_size else None
+                if code is None:
+                    code = len(self._categories)
+                    self._codes[key] = code
+                    self._mask_codes.setdefault(mask, code)
+                    self._categories.append(category)
+                    self._masks.append(mask)
+                    self._mask_array = None
+        return code
+
+    def category(self, code: int):
+        return self._categories[code]
+
+    def bit(self, label: str) -> int:
+        return self._bits[label]
+
+    def mask(self, code: int) -> int:
+        """Bitmask of the taxonomy labels in one category code"""
+        return self._masks[code]
+
+    def has(self, code: int, label: str) -> bool:
+        return bool(self._masks[code] & self._bits[label])
+
+    def mask_array(self) -> np.ndarray:
+        """int64 bitmask per category code, for vectorized membership tests"""
+        with self._lock:
+            if self._mask_array is None:
+                self._mask_array = np.array(self._masks, dtype=np.int64)
+            return self._mask_array
+
+
+# Shared so category codes are stable across tables and applicants
+DEFAULT_VOCABULARY = CategoryVocabulary()
+
+
+def _parse_date(value) -> np.datetime64:
+    try:
+        return np.datetime64(value, "D")
+    except (TypeError, ValueError):
+        return np.datetime64("NaT", "D")
+
+
+def parse_dates(values) -> np.ndarray:
+    """datetime64[D] per value; missing or unparseable dates become NaT"""
+    try:
+        return np.asarray(values, dtype="datetime64[D]")
+    except (TypeError, ValueError):
+        return np.array([_parse_date(value) for value in values], dtype="datetime64[D]")
+
+
+class TransactionTable:
+    """
+    Struct-of-arrays view of one or more applicants' transactions.
+    `owners[i]` is the applicant row that transaction i belongs to.
+    Dates are only parsed when a date-based feature first reads `dates`.
+    """
+
+    __slots__ = ("amounts", "_dates", "category_codes", "owners", "n_owners", "vocabulary")
+
+    def __init__(self, amounts, dates, category_codes, owners=None, n_owners=1, vocabulary=None):
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self._dates = dates
+        self.category_codes = np.asarray(category_codes, dtype=np.int32)
+        self.owners = np.zeros(len(self.amounts), dtype=np.int64) if owners is None else np.asarray(owners, dtype=np.int64)
+        self.n_owners = n_owners
+        self.vocabulary = vocabulary or DEFAULT_VOCABULARY
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @property
+    def dates(self) -> np.ndarray:
+        """datetime64[D] per transaction; missing or unparseable dates are NaT"""
+        dates = self._dates
+        if not (isinstance(dates, np.ndarray) and dates.dtype == "datetime64[D]"):
+            dates = self._dates = parse_dates(dates)
+        return dates
+
+    @classmethod
+    def from_transactions(cls, transactions: list, vocabulary=None) -> "TransactionTable":
+        """Build from a Plaid transactions list (e.g. app_data["transactions_90d"])"""
+        return cls.from_applications([{"transactions_90d": transactions}], vocabulary)
+
+    @classmethod
+    def from_applications(cls, applications, vocabulary=None) -> "TransactionTable":
+        """Build one table over many applications; owner i is the i-th application"""
+        vocabulary = vocabulary or DEFAULT_VOCABULARY
+        amounts, dates, codes, owners = [], [], [], []
+        n_owners = 0
+        for owner, app in enumerate(applications):
+            n_owners += 1
+            for t in app["transactions_90d"]:
+                amounts.append(t["amount"])
+                dates.append(t.get("date") or "NaT")
+                codes.append(vocabulary.code(t.get("category", [])))
+                owners.append(owner)
+        return cls(amounts, dates, codes, owners, n_owners, vocabulary)
+
+    def category_bits(self) -> np.ndarray:
+        """Per-transaction taxonomy bitmask"""
+        return self.vocabulary.mask_array()[self.category_codes]
+
+    def category_mask(self, label: str) -> np.ndarray:
+        """Per-transaction bool mask for one of the vocabulary's labels"""
+        return (self.category_bits() & self.vocabulary.bit(label)) != 0
+
+    def cash_flow_totals(self) -> dict:
+        """
+        Inflows, outflows and per-category totals per owner in a single pass.
+        Each (owner, field) bucket is summed in transaction order, so results
+        are identical to the sequential sums in the original dict code.
+        Outflows and category totals are absolute values.
+        """
+        width = len(CASH_FLOW_FIELDS)
+        bits = self.category_bits()
+        membership = np.column_stack(
+            [self.amounts > 0, self.amounts < 0]
+            + [(bits & self.vocabulary.bit(label)) != 0 for label in CASH_FLOW_CATEGORIES]
+        )
+
+        field, rows = np.nonzero(membership.T)
+        totals = np.bincount(
+            self.owners[rows] * width + field,
+            weights=self.amounts[rows],
+            minlength=self.n_owners * width,
+        ).reshape(self.n_owners, width)
+        totals[:, 1:] = np.abs(totals[:, 1:])
+        return {name: totals[:, i] for i, name in enumerate(CASH_FLOW_FIELDS)}